@@ -0,0 +1,194 @@
+# Core imports
+import concurrent.futures
+import os
+import threading
+import time
+
+# Third party imports
+import requests
+from airtable import Airtable
+from airtable.auth import AirtableAuth
+
+# Local imports
+from . import ratelimit
+
+# Connections kept alive per host, and the most that can be open at once across threads
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
+# Methods retried when Airtable fails on its side (5xx); a create (POST) that failed may still
+# have made the record, so only rate limited (429) creates are retried
+SERVER_ERROR_RETRY_METHODS = frozenset(["GET", "PATCH", "PUT", "DELETE"])
+
+# Number of record IDs looked up per request; about 3 KB of formula, well inside the URL
+# length Airtable accepts, and the response fits in a single page
+RECORDS_PER_FORMULA = 50
+
+_lock = threading.Lock()
+_session = None
+_session_key = None
+_tables = {}
+
+
+class PacedAirtable(Airtable):
+    """
+    An Airtable client whose requests are paced by the base's rate limiter, and retried when
+    Airtable rate limits them (429) or, unless they create records, fails on its side (5xx)
+    """
+
+    # The rate limiter paces every request, so the client doesn't sleep between pages and batches itself
+    API_LIMIT = 0
+
+    def __init__(self, base_id: str, table_name: str, api_key: str):
+        super().__init__(base_id, table_name, api_key=api_key)
+        self.limiter = ratelimit.get_limiter(base_id)
+
+    def _request(self, method, url, params=None, json_data=None):
+        for attempt in range(ratelimit.MAX_RETRIES + 1):
+            self.limiter.acquire()
+            response = self.session.request(method, url, params=params, json=json_data, timeout=self.timeout)
+
+            retryable = response.status_code == 429 or (
+                response.status_code >= 500 and method.upper() in SERVER_ERROR_RETRY_METHODS
+            )
+            if not retryable or attempt == ratelimit.MAX_RETRIES:
+                break
+
+            delay = ratelimit.get_retry_delay(attempt, response.headers.get("Retry-After"))
+            print(
+                "Airtable responded {} to {} {}, retrying in {:.1f} seconds".format(
+                    response.status_code, method.upper(), url, delay
+                )
+            )
+
+            if response.status_code == 429:
+                # Every client of the base backs off, not just this one
+                self.limiter.defer(delay)
+            else:
+                time.sleep(delay)
+
+        return self._process_response(response)
+
+
+def get_table(base_id: str, table_name: str) -> PacedAirtable:
+    """
+    Returns the shared client for an Airtable table, creating it the first time it's used
+
+    Every client shares one keep-alive HTTP session, so connections, and their TLS
+    handshakes, are reused across calls, and across invocations of a warm Lambda,
+    instead of being set up for every call. Requests to a base are paced to its
+    rate limit (see ``ratelimit``).
+
+    Parameters:
+        base_id (``str``): The Airtable base ID
+        table_name (``str``): The name of the table
+
+    Returns:
+        table (``PacedAirtable``): The client
+    """
+    api_key = os.environ["AIRTABLE_API_KEY"]
+
+    with _lock:
+        session = _get_session(api_key)
+
+        table = _tables.get((base_id, table_name))
+        if table is None:
+            table = PacedAirtable(base_id, table_name, api_key)
+            table.session = session
+            _tables[(base_id, table_name)] = table
+
+    return table
+
+
+def get_records_by_id(table: Airtable, record_ids: list) -> dict:
+    """
+    Reads records by ID, a chunk of IDs per request rather than one request per record
+
+    Parameters:
+        table (``Airtable``): The client of the table to read
+        record_ids (``list``): The IDs of the records
+
+    Returns:
+        records (``dict``): The records found, keyed by ID
+    """
+    records = {}
+    for start in range(0, len(record_ids), RECORDS_PER_FORMULA):
+        end = start + RECORDS_PER_FORMULA
+        chunk = record_ids[start:end]
+        formula = "OR({})".format(", ".join('RECORD_ID() = "{}"'.format(record_id) for record_id in chunk))
+
+        for record in table.get_all(formula=formula):
+            records[record["id"]] = record
+
+    return records
+
+
+def iter_records(table: Airtable, **options):
+    """
+    Yields the records of a table a page at a time as they're read, rather than reading them all first
+
+    The next page is read on a background thread while the caller works through the current one, so
+    reading overlaps with the work, and only two pages are held in memory at once.
+
+    Parameters:
+        table (``Airtable``): The client of the table to read
+        options: The same as for ``Airtable.get_all``, such as view, formula and fields
+
+    Returns:
+        records (``generator``): The records
+    """
+    pages = table.get_iter(**options)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        next_page = executor.submit(next, pages, None)
+
+        while True:
+            page = next_page.result()
+            if page is None:
+                return
+
+            next_page = executor.submit(next, pages, None)
+
+            yield from page
+
+
+def clear():
+    """
+    Closes the shared session and forgets every client
+    """
+    global _session, _session_key
+
+    with _lock:
+        if _session is not None:
+            _session.close()
+
+        _session = None
+        _session_key = None
+        _tables.clear()
+
+
+def _get_session(api_key: str) -> requests.Session:
+    """
+    Returns the shared session, replacing it if the API key changed or this is a new process
+
+    A forked worker process mustn't share its parent's open connections, so it gets its own
+    session, and clients, the first time it makes a call.
+    """
+    global _session, _session_key
+
+    session_key = (api_key, os.getpid())
+    if _session is None or _session_key != session_key:
+        if _session is not None and _session_key[1] == os.getpid():
+            _session.close()
+
+        session = requests.Session()
+        session.auth = AirtableAuth(api_key=api_key)
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+
+        _session = session
+        _session_key = session_key
+        _tables.clear()
+
+    return _session
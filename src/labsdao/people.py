@@ -1,9 +1,8 @@
 # Core imports
-import os
-from functools import lru_cache
+import threading
 
-# Third party imports
-from airtable import Airtable
+# Local imports
+from . import clients
 
 SMT_BASE_ID = "appvMqcwCQosrsHhM"
 
@@ -16,6 +15,13 @@ STUDENTS_TABLE_BW_VIEWS = {
     "PTCT": "[DND] Current BW PTCT",
 }
 
+# Student records already read, keyed by record ID, for as long as the process is warm
+_students_lock = threading.Lock()
+_students = {}
+
+
+BW_STUDENT_FIELDS = ["First Name", "Last Name", "Lambda Email", "Active Track Team"]
+
 
 def get_all_bw_students(bw_section: str) -> list:
     """
@@ -26,37 +32,122 @@ def get_all_bw_students(bw_section: str) -> list:
     Returns:
         records (``list``): List of student records
     """
-    students_table = Airtable(SMT_BASE_ID, STUDENTS_TABLE, api_key=os.environ["AIRTABLE_API_KEY"])
+    students_table = clients.get_table(SMT_BASE_ID, STUDENTS_TABLE)
+
+    return students_table.get_all(view=STUDENTS_TABLE_BW_VIEWS[bw_section], fields=BW_STUDENT_FIELDS)
+
+
+def iter_all_bw_students(bw_section: str):
+    """
+    Yields the records of all students currently in a particular BW section, a page at a time as they're read
+
+    Parameters:
+        bw_section (``str``): One of "FT", "PTPT", "PTCT"
+    Returns:
+        records (``generator``): The student records
+    """
+    students_table = clients.get_table(SMT_BASE_ID, STUDENTS_TABLE)
 
-    return students_table.get_all(
-        view=STUDENTS_TABLE_BW_VIEWS[bw_section],
-        fields=["First Name", "Last Name", "Lambda Email", "Active Track Team"],
-    )
+    return clients.iter_records(students_table, view=STUDENTS_TABLE_BW_VIEWS[bw_section], fields=BW_STUDENT_FIELDS)
 
 
-def get_all_student_surveys(cohort: str) -> list:
+def get_all_student_surveys(cohort: str, fields: list = None) -> list:
     """
     Retrieves records for all students onboarding surveys in a cohort
 
     Note: Surveys are gathered from a view on the survey table with the same
           name as the `cohort` parameter.
 
+    Parameters:
+        cohort (``str``): The cohort ID
+        fields (``list``, optional): The only fields to read; every field if not given
+
     Returns:
         records (``list``): List of student survey records
     """
-    students_table = Airtable(SMT_BASE_ID, STUDENTS_SURVEYS_TABLE, api_key=os.environ["AIRTABLE_API_KEY"])
+    students_table = clients.get_table(SMT_BASE_ID, STUDENTS_SURVEYS_TABLE)
+
+    return students_table.get_all(**_get_student_surveys_options(cohort, fields))
+
+
+def iter_all_student_surveys(cohort: str, fields: list = None):
+    """
+    Yields the records of all students onboarding surveys in a cohort, a page at a time as they're read
 
-    return students_table.get_all(view=cohort)
+    Parameters:
+        cohort (``str``): The cohort ID
+        fields (``list``, optional): The only fields to read; every field if not given
+
+    Returns:
+        records (``generator``): The student survey records
+    """
+    students_table = clients.get_table(SMT_BASE_ID, STUDENTS_SURVEYS_TABLE)
+
+    return clients.iter_records(students_table, **_get_student_surveys_options(cohort, fields))
 
 
-@lru_cache
 def get_student(record_id: str) -> list:
     """
     Retrieves the student record ID
 
+    Records are cached, along with those read by ``get_students``.
+
     Returns:
         record: The student record
     """
-    students_table = Airtable(SMT_BASE_ID, STUDENTS_SURVEYS_TABLE, api_key=os.environ["AIRTABLE_API_KEY"])
+    with _students_lock:
+        if record_id in _students:
+            return _students[record_id]
+
+    students_table = clients.get_table(SMT_BASE_ID, STUDENTS_SURVEYS_TABLE)
+    record = students_table.get(record_id)
+
+    with _students_lock:
+        _students[record_id] = record
+
+    return record
+
+
+def get_students(record_ids: list) -> dict:
+    """
+    Retrieves many student records, a chunk of IDs per request rather than one request per student
+
+    Records are cached the same as by ``get_student``, and only those not already cached are read.
+
+    Parameters:
+        record_ids (``list``): The student record IDs
+
+    Returns:
+        records (``dict``): The student records found, keyed by ID
+    """
+    with _students_lock:
+        missing_ids = list(dict.fromkeys(record_id for record_id in record_ids if record_id not in _students))
+
+    if missing_ids:
+        students_table = clients.get_table(SMT_BASE_ID, STUDENTS_SURVEYS_TABLE)
+        records = clients.get_records_by_id(students_table, missing_ids)
+
+        with _students_lock:
+            _students.update(records)
+
+    with _students_lock:
+        return {record_id: _students[record_id] for record_id in record_ids if _students.get(record_id) is not None}
+
+
+def clear_students():
+    """
+    Forgets every cached student record
+    """
+    with _students_lock:
+        _students.clear()
+
+
+def _get_student_surveys_options(cohort: str, fields: list) -> dict:
+    """
+    Returns the options to read a cohort's surveys with; the view of the cohort, and the fields if given
+    """
+    options = {"view": cohort}
+    if fields is not None:
+        options["fields"] = fields
 
-    return students_table.get(record_id)
+    return options
@@ -1,8 +1,5 @@
-# Core imports
-import os
-
-# Third party imports
-from airtable import Airtable
+# Local imports
+from . import clients
 
 SMT_BASE_ID = "appvMqcwCQosrsHhM"
 
@@ -11,23 +8,43 @@ PROJECTS_TABLE = "Labs - Projects"
 PROJECTS_WHERE_COHORT_AND_ACTIVE = """AND(UPPER({{Cohort}}) = UPPER("{}"), {{Active?}} = True())"""
 
 
-def get_all_active_projects(cohort: str) -> list:
+def get_all_active_projects(cohort: str, fields: list = None) -> list:
     """
     Retrieves records for all active projects in a cohort
 
+    Parameters:
+        cohort (``str``): The cohort ID
+        fields (``list``, optional): The only fields to read; every field if not given
+
     Returns:
         records (``list``): List of people records
     """
-    projects_table = Airtable(SMT_BASE_ID, PROJECTS_TABLE, api_key=os.environ["AIRTABLE_API_KEY"])
+    projects_table = clients.get_table(SMT_BASE_ID, PROJECTS_TABLE)
+
+    return projects_table.get_all(**_get_active_projects_options(cohort, fields))
+
+
+def iter_all_active_projects(cohort: str, fields: list = None):
+    """
+    Yields the records of all active projects in a cohort, a page at a time as they're read
 
-    return projects_table.get_all(formula=PROJECTS_WHERE_COHORT_AND_ACTIVE.format(cohort))
+    Parameters:
+        cohort (``str``): The cohort ID
+        fields (``list``, optional): The only fields to read; every field if not given
+
+    Returns:
+        records (``generator``): The project records
+    """
+    projects_table = clients.get_table(SMT_BASE_ID, PROJECTS_TABLE)
+
+    return clients.iter_records(projects_table, **_get_active_projects_options(cohort, fields))
 
 
 def assign_student_to_project(student: dict, project: dict, score: int):
     """
     Assigns a student to a project
     """
-    projects_table = Airtable(SMT_BASE_ID, PROJECTS_TABLE, api_key=os.environ["AIRTABLE_API_KEY"])
+    projects_table = clients.get_table(SMT_BASE_ID, PROJECTS_TABLE)
 
     project_id = project["id"]
     project_name = project["fields"]["Name"]
@@ -49,3 +66,63 @@ def assign_student_to_project(student: dict, project: dict, score: int):
 
     print("Updating Airtable project record: {}".format(project_id))
     projects_table.update(project_id, {"Team Members": team_members})
+
+
+def assign_students_to_projects(assignments: list):
+    """
+    Assigns students to projects, writing each project record once
+
+    The assignments are grouped by project and merged with each project's current
+    Team Members, then all of the projects are written with batch updates of 10
+    records per request. This replaces two requests per student with one read per
+    50 projects and one write per 10 projects.
+
+    Parameters:
+        assignments (``list``): (student, project, score) for each assignment, the
+            same as the arguments of ``assign_student_to_project``
+    """
+    projects_table = clients.get_table(SMT_BASE_ID, PROJECTS_TABLE)
+
+    # The new team members of each project, in the order they were assigned
+    projects_by_id = {}
+    students_by_project_id = {}
+    for student, project, _ in assignments:
+        projects_by_id[project["id"]] = project
+        students_by_project_id.setdefault(project["id"], []).append(student)
+
+    current_project_records = clients.get_records_by_id(projects_table, list(projects_by_id))
+
+    updates = []
+    for project_id, students in students_by_project_id.items():
+        project_name = projects_by_id[project_id]["fields"]["Name"]
+        current_project_record = current_project_records.get(project_id, {"fields": {}})
+
+        team_members = []
+        if "Team Members" in current_project_record["fields"]:
+            team_members = list(current_project_record["fields"]["Team Members"])
+        else:
+            print("Creating new team {}".format(project_name))
+
+        for student in students:
+            student_id = student["fields"]["What is your name?"][0]
+            student_name = student["fields"]["Student Name"][0]
+
+            if student_id not in team_members:
+                print(f"Adding {student_name} to team {project_name}")
+                team_members.append(student_id)
+
+        updates.append({"id": project_id, "fields": {"Team Members": team_members}})
+
+    print("Updating {} Airtable project records".format(len(updates)))
+    projects_table.batch_update(updates)
+
+
+def _get_active_projects_options(cohort: str, fields: list) -> dict:
+    """
+    Returns the options to read a cohort's active projects with; the formula, and the fields if given
+    """
+    options = {"formula": PROJECTS_WHERE_COHORT_AND_ACTIVE.format(cohort)}
+    if fields is not None:
+        options["fields"] = fields
+
+    return options
@@ -1,8 +1,5 @@
-# Core imports
-import os
-
-# Third party imports
-from airtable import Airtable
+# Local imports
+from . import clients
 
 HIPPOCAMPUS_BASE_ID = "appThDY89pV0kOGQT"
 
@@ -18,7 +15,7 @@ def get_all_quotes() -> list:
     Returns:
         records (``list``): List of quotes
     """
-    airtable = Airtable(HIPPOCAMPUS_BASE_ID, QUOTES_TABLE_NAME, api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(HIPPOCAMPUS_BASE_ID, QUOTES_TABLE_NAME)
 
     return airtable.get_all(formula="Active = TRUE()")
 
@@ -30,6 +27,6 @@ def get_all_quote_channels() -> list:
     Returns:
         records (``list``): List of channels
     """
-    airtable = Airtable(HIPPOCAMPUS_BASE_ID, QUOTE_CHANNELS_TABLE_NAME, api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(HIPPOCAMPUS_BASE_ID, QUOTE_CHANNELS_TABLE_NAME)
 
     return airtable.get_all(formula="Active = TRUE()")
@@ -0,0 +1,148 @@
+# Core imports
+import os
+import random
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the pacing is only shared between threads
+    fcntl = None
+
+# Airtable allows 5 requests per second per base. A bucket of BURST requests refilling at
+# REQUESTS_PER_SECOND lets up to BURST + REQUESTS_PER_SECOND requests land in any one second,
+# counting one at each end, so the two together are kept to 5
+REQUESTS_PER_SECOND = 4
+
+# The most requests that may go out back to back after a quiet spell
+BURST = 1
+
+# Retries of a request that was rate limited (429), or that failed on Airtable's side (5xx) and isn't a create
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+
+_lock = threading.Lock()
+_limiters = {}
+
+
+class RateLimiter:
+    """
+    Paces the requests to one Airtable base, across threads and processes
+
+    A token bucket kept as the time the next request may go out: each request books
+    the next slot, 1 / REQUESTS_PER_SECOND after the last one, and sleeps until it
+    comes. Up to BURST requests may go out at once after a quiet spell. The booked
+    time is kept in a locked file in the temp directory, so that the worker processes
+    a handler starts share the pacing with each other and their parent; if the file
+    can't be used it's only shared between threads.
+    """
+
+    def __init__(self, base_id: str, requests_per_second: float = REQUESTS_PER_SECOND, burst: int = BURST):
+        self.interval = 1.0 / requests_per_second
+        self.tolerance = (burst - 1) * self.interval
+        self.path = os.path.join(tempfile.gettempdir(), "labsdao-{}.ratelimit".format(base_id))
+
+        self.lock = threading.Lock()
+        self.shared = fcntl is not None
+        self.next_time = 0.0
+
+    def acquire(self):
+        """
+        Waits for the next free slot to make a request
+        """
+        delay = self._book(lambda arrival_time, now: arrival_time + self.interval)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, seconds: float):
+        """
+        Holds back every request to the base for a while, such as after being told to retry later
+
+        Parameters:
+            seconds (``float``): How long to wait from now
+        """
+        self._book(lambda arrival_time, now: max(arrival_time, now + seconds + self.tolerance))
+
+    def _book(self, get_next_time) -> float:
+        """
+        Moves the time of the next free slot forward, returning how long to wait for the slot that was booked
+
+        The slot is booked at the later of the next free slot and now, and may be used up to the burst
+        tolerance early.
+        """
+        with self.lock:
+            now = time.time()
+
+            if self.shared:
+                try:
+                    return self._book_shared(get_next_time, now)
+                except OSError as error:
+                    print("Unable to share the Airtable rate limit with other processes: {}".format(error))
+                    self.shared = False
+
+            arrival_time = max(self.next_time, now)
+            self.next_time = get_next_time(arrival_time, now)
+
+            return arrival_time - self.tolerance - now
+
+    def _book_shared(self, get_next_time, now: float) -> float:
+        with open(self.path, "a+") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                text = state_file.read()
+                next_time = float(text) if text else 0.0
+
+                arrival_time = max(next_time, now)
+                next_time = get_next_time(arrival_time, now)
+
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(repr(next_time))
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+        return arrival_time - self.tolerance - now
+
+
+def get_limiter(base_id: str) -> RateLimiter:
+    """
+    Returns the rate limiter for a base, shared by every client of the base
+
+    Parameters:
+        base_id (``str``): The Airtable base ID
+
+    Returns:
+        limiter (``RateLimiter``): The limiter
+    """
+    with _lock:
+        if base_id not in _limiters:
+            _limiters[base_id] = RateLimiter(base_id)
+
+        return _limiters[base_id]
+
+
+def get_retry_delay(attempt: int, retry_after: str = None) -> float:
+    """
+    Returns how long to wait before retrying a request
+
+    Parameters:
+        attempt (``int``): The number of times the request has been made
+        retry_after (``str``, optional): The Retry-After header of the response, in seconds, if any
+
+    Returns:
+        delay (``float``): The delay in seconds; the Retry-After if given, otherwise an exponential
+            backoff with full jitter, so retries from different workers don't line up
+    """
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
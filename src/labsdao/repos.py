@@ -1,8 +1,5 @@
-# Core imports
-import os
-
-# Third party imports
-from airtable import Airtable
+# Local imports
+from . import clients
 
 SMT_BASE_ID = "appvMqcwCQosrsHhM"
 
@@ -19,11 +16,23 @@ def get_all_active() -> list:
     Returns:
         records (``list``): An SMT record
     """
-    airtable = Airtable(LABBY_BASE_ID, "Product Github Repos", api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(LABBY_BASE_ID, "Product Github Repos")
 
     return airtable.get_all(formula="Active = TRUE()")
 
 
+def iter_all_active():
+    """
+    Yields the active product GitHub repo records, a page at a time as they're read
+
+    Returns:
+        records (``generator``): The repo records
+    """
+    airtable = clients.get_table(LABBY_BASE_ID, "Product Github Repos")
+
+    return clients.iter_records(airtable, formula="Active = TRUE()")
+
+
 def update(record_id, record_fields) -> None:
     """[summary]
 
@@ -31,7 +40,7 @@ def update(record_id, record_fields) -> None:
         record_id {[type]} -- [description]
         record_fields {[type]} -- [description]
     """
-    airtable = Airtable(LABBY_BASE_ID, "Product Github Repos", api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(LABBY_BASE_ID, "Product Github Repos")
 
     airtable.update(record_id, record_fields)
 
@@ -43,7 +52,7 @@ def get_all_active_students() -> list:
     Returns:
         records (``list``): List of student records
     """
-    airtable = Airtable(LABS_BASE_ID, "Students", api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(LABS_BASE_ID, "Students")
 
     return airtable.get_all(fields="Name", formula="{Cohort Active?} = TRUE()")
 
@@ -55,7 +64,7 @@ def get_students_by_sprint_retros_submission(days) -> list:
     Returns:
         records (``list``): List of student sprint retro records
     """
-    airtable = Airtable(LABS_BASE_ID, "Students", api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(LABS_BASE_ID, "Students")
 
     formula = "AND({{Cohort Active?}} = TRUE(), {{Name}} != '', {{Days Since Last Student Sprint Retro}} > {})".format(
         days
@@ -71,16 +80,28 @@ def get_all_product_github_repo_records():
     Returns:
         [type] -- [description]
     """
-    airtable = Airtable(LABBY_BASE_ID, "Product Github Repos", api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(LABBY_BASE_ID, "Product Github Repos")
 
     return airtable.get_all()
 
 
+def iter_all_product_github_repo_records():
+    """
+    Yields every product GitHub repo record, a page at a time as they're read
+
+    Returns:
+        records (``generator``): The repo records
+    """
+    airtable = clients.get_table(LABBY_BASE_ID, "Product Github Repos")
+
+    return clients.iter_records(airtable)
+
+
 def upsert_repository_record(repository_id: str, grade: str, badge_token: str, test_reporter_id: str):
     """
     Updates the grade record for a repository
     """
-    airtable = Airtable(LABS_BASE_ID, LABS_CODE_CLIMATE_METRICS_TABLE, api_key=os.environ["AIRTABLE_API_KEY"])
+    airtable = clients.get_table(LABS_BASE_ID, LABS_CODE_CLIMATE_METRICS_TABLE)
 
     # Formulate the record to be upserted
     record = {
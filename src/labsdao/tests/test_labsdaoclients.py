@@ -0,0 +1,99 @@
+import os
+import threading
+import unittest
+import unittest.mock as mock
+
+import labsdao.clients
+
+
+@mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"})
+class TestGetTable(unittest.TestCase):
+    def setUp(self):
+        labsdao.clients.clear()
+        self.addCleanup(labsdao.clients.clear)
+
+    def test_reused(self):
+
+        # The same table gets the same client, and every table shares the session
+        projects_table = labsdao.clients.get_table("appBASE", "Projects")
+        students_table = labsdao.clients.get_table("appBASE", "Students")
+
+        self.assertIs(labsdao.clients.get_table("appBASE", "Projects"), projects_table)
+        self.assertIsNot(students_table, projects_table)
+        self.assertIs(students_table.session, projects_table.session)
+        self.assertEqual(projects_table.session.auth.api_key, "AFAKEKEY")
+
+    def test_new_api_key(self):
+
+        projects_table = labsdao.clients.get_table("appBASE", "Projects")
+
+        with mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "ANOTHERKEY"}):
+            new_projects_table = labsdao.clients.get_table("appBASE", "Projects")
+
+        self.assertIsNot(new_projects_table, projects_table)
+        self.assertEqual(new_projects_table.session.auth.api_key, "ANOTHERKEY")
+
+    def test_new_process(self):
+
+        # A forked worker doesn't reuse its parent's connections
+        projects_table = labsdao.clients.get_table("appBASE", "Projects")
+
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            worker_projects_table = labsdao.clients.get_table("appBASE", "Projects")
+
+        self.assertIsNot(worker_projects_table.session, projects_table.session)
+
+    def test_clear(self):
+
+        projects_table = labsdao.clients.get_table("appBASE", "Projects")
+        labsdao.clients.clear()
+
+        self.assertIsNot(labsdao.clients.get_table("appBASE", "Projects"), projects_table)
+
+
+class TestIterRecords(unittest.TestCase):
+    def test_pages(self):
+
+        # Every record, in order, with the options passed through
+        table = mock.Mock()
+        table.get_iter.return_value = iter([[{"id": "rec1"}, {"id": "rec2"}], [], [{"id": "rec3"}]])
+
+        records = list(labsdao.clients.iter_records(table, view="PT15", fields=["Name"]))
+
+        self.assertEqual(records, [{"id": "rec1"}, {"id": "rec2"}, {"id": "rec3"}])
+        table.get_iter.assert_called_once_with(view="PT15", fields=["Name"])
+
+    def test_prefetch(self):
+
+        # The second page is read while the caller is still on the first
+        second_page_read = threading.Event()
+
+        def get_iter():
+            yield [{"id": "rec1"}]
+            second_page_read.set()
+            yield [{"id": "rec2"}]
+
+        table = mock.Mock()
+        table.get_iter.return_value = get_iter()
+
+        records = labsdao.clients.iter_records(table)
+        self.assertEqual(next(records), {"id": "rec1"})
+
+        self.assertTrue(second_page_read.wait(5))
+        self.assertEqual(list(records), [{"id": "rec2"}])
+
+    def test_error(self):
+
+        # A failed read is raised to the caller once it reaches that page
+        def get_iter():
+            yield [{"id": "rec1"}]
+            raise ConnectionError("Connection reset")
+
+        table = mock.Mock()
+        table.get_iter.return_value = get_iter()
+
+        records = labsdao.clients.iter_records(table)
+        self.assertEqual(next(records), {"id": "rec1"})
+
+        with self.assertRaises(ConnectionError):
+            next(records)
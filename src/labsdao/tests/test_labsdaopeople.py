@@ -2,6 +2,7 @@ import os
 import unittest
 import unittest.mock as mock
 
+import labsdao.clients
 import labsdao.people
 
 
@@ -14,7 +15,7 @@ class TestGetStudent(unittest.TestCase):
         # No SMT record ID
         mock_airtable_get.return_value = None
 
-        labsdao.people.get_student.cache_clear()
+        labsdao.people.clear_students()
 
         student_record = labsdao.people.get_student("12345")
 
@@ -28,7 +29,7 @@ class TestGetStudent(unittest.TestCase):
         record_in = "Something"
         mock_airtable_get.return_value = record_in
 
-        labsdao.people.get_student.cache_clear()
+        labsdao.people.clear_students()
 
         student_record = labsdao.people.get_student("12345")
 
@@ -63,3 +64,86 @@ class TestGetAllQuoteChannels(unittest.TestCase):
         mock_airtable_get_all.assert_called_once()
 
         self.assertEqual(quote_channels_in, quote_channels_out)
+
+
+@mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"})
+@mock.patch("airtable.Airtable.__init__", mock.Mock(return_value=None))
+@mock.patch("airtable.Airtable.get")
+@mock.patch("airtable.Airtable.get_all")
+class TestGetStudents(unittest.TestCase):
+    def setUp(self):
+        labsdao.people.clear_students()
+        self.addCleanup(labsdao.people.clear_students)
+
+    def test_chunks(self, mock_airtable_get_all, mock_airtable_get):
+
+        # More students than fit in one formula, one of them not found
+        record_ids = ["student_{}".format(i) for i in range(labsdao.clients.RECORDS_PER_FORMULA + 1)]
+        mock_airtable_get_all.side_effect = [
+            [{"id": record_id} for record_id in record_ids[:-2]],
+            [{"id": record_ids[-1]}],
+        ]
+
+        students = labsdao.people.get_students(record_ids)
+
+        self.assertEqual(mock_airtable_get_all.call_count, 2)
+        self.assertIn('RECORD_ID() = "student_0"', mock_airtable_get_all.call_args_list[0][1]["formula"])
+        self.assertEqual(sorted(students), sorted(record_ids[:-2] + record_ids[-1:]))
+
+    def test_fills_cache(self, mock_airtable_get_all, mock_airtable_get):
+
+        # Students read in bulk aren't read again, one at a time or in bulk
+        mock_airtable_get_all.return_value = [{"id": "student_1"}, {"id": "student_2"}]
+        labsdao.people.get_students(["student_1", "student_2"])
+
+        self.assertEqual(labsdao.people.get_student("student_1"), {"id": "student_1"})
+        self.assertEqual(
+            labsdao.people.get_students(["student_2", "student_1"]),
+            {"student_2": {"id": "student_2"}, "student_1": {"id": "student_1"}},
+        )
+
+        mock_airtable_get.assert_not_called()
+        mock_airtable_get_all.assert_called_once()
+
+    def test_reads_only_missing(self, mock_airtable_get_all, mock_airtable_get):
+
+        # A student already read one at a time isn't in the formula
+        mock_airtable_get.return_value = {"id": "student_1"}
+        labsdao.people.get_student("student_1")
+
+        mock_airtable_get_all.return_value = [{"id": "student_2"}]
+        students = labsdao.people.get_students(["student_1", "student_2", "student_2"])
+
+        self.assertEqual(mock_airtable_get_all.call_args[1]["formula"], 'OR(RECORD_ID() = "student_2")')
+        self.assertEqual(sorted(students), ["student_1", "student_2"])
+
+
+@mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"})
+@mock.patch("airtable.Airtable.__init__", mock.Mock(return_value=None))
+@mock.patch("airtable.Airtable.get_all")
+class TestGetAllStudentSurveys(unittest.TestCase):
+    def test_fields(self, mock_airtable_get_all):
+
+        # Only the fields asked for, or all of them
+        labsdao.people.get_all_student_surveys("PT15", ["Track", "Gender"])
+        labsdao.people.get_all_student_surveys("PT15")
+
+        self.assertEqual(
+            mock_airtable_get_all.call_args_list,
+            [mock.call(view="PT15", fields=["Track", "Gender"]), mock.call(view="PT15")],
+        )
+
+
+@mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"})
+@mock.patch("airtable.Airtable.__init__", mock.Mock(return_value=None))
+@mock.patch("airtable.Airtable.get_iter")
+class TestIterAllStudentSurveys(unittest.TestCase):
+    def test_pages(self, mock_airtable_get_iter):
+
+        # The records of every page, with the same options as get_all_student_surveys
+        mock_airtable_get_iter.return_value = iter([[{"id": "rec1"}], [{"id": "rec2"}]])
+
+        surveys = labsdao.people.iter_all_student_surveys("PT15", ["Track"])
+
+        self.assertEqual(list(surveys), [{"id": "rec1"}, {"id": "rec2"}])
+        mock_airtable_get_iter.assert_called_once_with(view="PT15", fields=["Track"])
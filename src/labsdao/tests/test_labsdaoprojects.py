@@ -0,0 +1,76 @@
+import os
+import unittest
+import unittest.mock as mock
+
+import labsdao.clients
+import labsdao.projects
+
+
+def _assignment(student_id, project_id):
+    student = {"fields": {"What is your name?": [student_id], "Student Name": ["Name of " + student_id]}}
+    project = {"id": project_id, "fields": {"Name": "Name of " + project_id}}
+
+    return (student, project, 100)
+
+
+@mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"})
+@mock.patch("airtable.Airtable.__init__", mock.Mock(return_value=None))
+@mock.patch("airtable.Airtable.batch_update")
+@mock.patch("airtable.Airtable.get_all")
+class TestAssignStudentsToProjects(unittest.TestCase):
+    def test_grouped_by_project(self, mock_airtable_get_all, mock_airtable_batch_update):
+
+        # One project already has a team, the other doesn't
+        mock_airtable_get_all.return_value = [
+            {"id": "project_01", "fields": {"Team Members": ["student_00", "student_01"]}},
+            {"id": "project_02", "fields": {}},
+        ]
+
+        labsdao.projects.assign_students_to_projects(
+            [
+                _assignment("student_01", "project_01"),
+                _assignment("student_02", "project_02"),
+                _assignment("student_03", "project_01"),
+            ]
+        )
+
+        mock_airtable_get_all.assert_called_once()
+        mock_airtable_batch_update.assert_called_once_with(
+            [
+                {"id": "project_01", "fields": {"Team Members": ["student_00", "student_01", "student_03"]}},
+                {"id": "project_02", "fields": {"Team Members": ["student_02"]}},
+            ]
+        )
+
+    def test_reads_in_chunks(self, mock_airtable_get_all, mock_airtable_batch_update):
+
+        # More projects than fit in one formula
+        mock_airtable_get_all.return_value = []
+        number_of_projects = labsdao.clients.RECORDS_PER_FORMULA + 1
+
+        labsdao.projects.assign_students_to_projects(
+            [_assignment("student_{}".format(i), "project_{}".format(i)) for i in range(number_of_projects)]
+        )
+
+        self.assertEqual(mock_airtable_get_all.call_count, 2)
+        self.assertIn('RECORD_ID() = "project_0"', mock_airtable_get_all.call_args_list[0][1]["formula"])
+
+        updates = mock_airtable_batch_update.call_args[0][0]
+        self.assertEqual(len(updates), number_of_projects)
+
+
+@mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"})
+@mock.patch("airtable.Airtable.__init__", mock.Mock(return_value=None))
+@mock.patch("airtable.Airtable.get_all")
+class TestGetAllActiveProjects(unittest.TestCase):
+    def test_fields(self, mock_airtable_get_all):
+
+        # Only the fields asked for, or all of them
+        labsdao.projects.get_all_active_projects("PT15", ["Name"])
+        labsdao.projects.get_all_active_projects("PT15")
+
+        formula = labsdao.projects.PROJECTS_WHERE_COHORT_AND_ACTIVE.format("PT15")
+        self.assertEqual(
+            mock_airtable_get_all.call_args_list,
+            [mock.call(formula=formula, fields=["Name"]), mock.call(formula=formula)],
+        )
@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+import time
+import unittest
+import unittest.mock as mock
+import uuid
+
+import labsdao.clients
+import labsdao.ratelimit
+
+
+def _acquire_many(base_id, count):
+    limiter = labsdao.ratelimit.RateLimiter(base_id, requests_per_second=50, burst=1)
+    for _ in range(count):
+        limiter.acquire()
+
+
+def _response(status_code, headers=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = {"records": []}
+
+    return response
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        # Every test gets its own base, so they don't share the pacing
+        self.base_id = "app" + uuid.uuid4().hex
+        self.addCleanup(self._remove_state_file)
+
+    def _remove_state_file(self):
+        path = labsdao.ratelimit.RateLimiter(self.base_id).path
+        if os.path.exists(path):
+            os.remove(path)
+
+    def test_paced(self):
+
+        # 100 per second, one at a time
+        limiter = labsdao.ratelimit.RateLimiter(self.base_id, requests_per_second=100, burst=1)
+
+        started = time.time()
+        for _ in range(6):
+            limiter.acquire()
+
+        self.assertGreaterEqual(time.time() - started, 0.05)
+
+    def test_burst(self):
+
+        # After a quiet spell a burst goes out at once
+        limiter = labsdao.ratelimit.RateLimiter(self.base_id, requests_per_second=1, burst=3)
+
+        started = time.time()
+        for _ in range(3):
+            limiter.acquire()
+
+        self.assertLess(time.time() - started, 0.5)
+
+    def test_defer(self):
+
+        limiter = labsdao.ratelimit.RateLimiter(self.base_id, requests_per_second=100, burst=5)
+        limiter.defer(0.1)
+
+        started = time.time()
+        limiter.acquire()
+
+        self.assertGreaterEqual(time.time() - started, 0.09)
+
+    def test_shared_between_processes(self):
+
+        # Two workers making 10 requests each at 50 per second take as long as 20 requests from one
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_acquire_many, args=(self.base_id, 10)) for _ in range(2)]
+
+        started = time.time()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertGreaterEqual(time.time() - started, 19 / 50)
+
+    def test_within_airtable_limit(self):
+
+        # No more than 5 requests in any one second, including the bursts after quiet spells
+        clock = [1000.0]
+        sent = []
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        limiter = labsdao.ratelimit.RateLimiter(self.base_id)
+        with mock.patch("labsdao.ratelimit.time.time", lambda: clock[0]), mock.patch(
+            "labsdao.ratelimit.time.sleep", sleep
+        ):
+            for pause in [0, 0, 3, 0, 0, 0, 0.5, 0, 2, 0, 0, 0, 0, 0, 0, 0.1, 0, 0, 0, 0, 0, 0, 0]:
+                clock[0] += pause
+                limiter.acquire()
+                sent.append(clock[0])
+
+        for start in sent:
+            self.assertLessEqual(sum(1 for time_sent in sent if start <= time_sent <= start + 1), 5)
+
+    def test_without_shared_state(self):
+
+        limiter = labsdao.ratelimit.RateLimiter(self.base_id, requests_per_second=100, burst=1)
+        limiter.path = os.path.join(limiter.path, "not", "a", "directory")
+
+        started = time.time()
+        for _ in range(6):
+            limiter.acquire()
+
+        self.assertFalse(limiter.shared)
+        self.assertGreaterEqual(time.time() - started, 0.05)
+
+
+class TestGetRetryDelay(unittest.TestCase):
+    def test_retry_after(self):
+        self.assertEqual(labsdao.ratelimit.get_retry_delay(0, "30"), 30)
+
+    def test_backoff(self):
+
+        # Jittered, and capped
+        for attempt in range(10):
+            delay = labsdao.ratelimit.get_retry_delay(attempt, "not a number")
+
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(
+                delay,
+                min(labsdao.ratelimit.BACKOFF_MAX_SECONDS, labsdao.ratelimit.BACKOFF_BASE_SECONDS * 2 ** attempt),
+            )
+
+
+@mock.patch("labsdao.ratelimit.get_retry_delay", mock.Mock(return_value=0))
+@mock.patch("labsdao.ratelimit.RateLimiter.acquire", mock.Mock())
+class TestPacedAirtable(unittest.TestCase):
+    def setUp(self):
+        labsdao.clients.clear()
+        self.addCleanup(labsdao.clients.clear)
+
+        with mock.patch.dict(os.environ, {"AIRTABLE_API_KEY": "AFAKEKEY"}):
+            self.table = labsdao.clients.get_table("appBASE", "Projects")
+        self.table.session = mock.Mock()
+
+    def test_retries(self):
+
+        # Rate limited, then a server error, then through
+        self.table.session.request.side_effect = [
+            _response(429, {"Retry-After": "0"}),
+            _response(503),
+            _response(200),
+        ]
+
+        self.assertEqual(self.table.get_all(), [])
+        self.assertEqual(self.table.session.request.call_count, 3)
+
+    def test_creates_not_retried_on_server_errors(self):
+
+        # The record may have been made, so a create isn't repeated
+        self.table.session.request.return_value = _response(503)
+        self.table.session.request.return_value.raise_for_status.side_effect = labsdao.clients.requests.HTTPError()
+
+        with self.assertRaises(labsdao.clients.requests.HTTPError):
+            self.table.insert({"Name": "Project"})
+
+        self.table.session.request.assert_called_once()
+
+    def test_creates_retried_when_rate_limited(self):
+        created = _response(200)
+        created.json.return_value = {"id": "rec1"}
+        self.table.session.request.side_effect = [_response(429), created]
+
+        self.assertEqual(self.table.insert({"Name": "Project"}), {"id": "rec1"})
+        self.assertEqual(self.table.session.request.call_count, 2)
+
+    def test_gives_up(self):
+        self.table.session.request.return_value = _response(429)
+        self.table.session.request.return_value.raise_for_status.side_effect = labsdao.clients.requests.HTTPError()
+
+        with self.assertRaises(labsdao.clients.requests.HTTPError):
+            self.table.get_all()
+
+        self.assertEqual(self.table.session.request.call_count, labsdao.ratelimit.MAX_RETRIES + 1)
+
+    def test_client_errors_not_retried(self):
+        self.table.session.request.return_value = _response(422)
+        self.table.session.request.return_value.raise_for_status.side_effect = labsdao.clients.requests.HTTPError()
+
+        with self.assertRaises(labsdao.clients.requests.HTTPError):
+            self.table.get_all()
+
+        self.table.session.request.assert_called_once()
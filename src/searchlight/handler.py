@@ -21,18 +21,30 @@ def generate_labs_reviewer_csv(event, context):
         raise ("You must provide the cohort ID as data in the event")
 
     # Use the DAO to grab the list of all active projects
-    projects = projectsdao.get_all_active_projects(event)
+    projects = projectsdao.get_all_active_projects(event, fields=["Team Members"])
     print("Found {} projects".format(len(projects)))
 
+    # Read every team member up front, a chunk of students per request
+    students = peopledao.get_students(
+        [student_id for project in projects for student_id in project["fields"].get("Team Members", [])]
+    )
+    print("Found {} students".format(len(students)))
+
     peer_review_assignments = []
     for project in projects:
-        team_members = project["fields"]["Team Members"]
+        # Team members whose record wasn't found, such as deleted students, are left out of the reviews
+        team_members = []
+        for student_id in project["fields"]["Team Members"]:
+            if student_id in students:
+                team_members.append(student_id)
+            else:
+                print("Unable to find student record {}".format(student_id))
         # print("{}".format(team_members))
 
         for i in range(0, len(team_members)):
             reviewee_id = team_members[i]
 
-            reviewee = peopledao.get_student(reviewee_id)
+            reviewee = students[reviewee_id]
 
             csv_row = {}
             csv_row["first_name"] = reviewee["fields"]["First Name"][0]
@@ -49,7 +61,7 @@ def generate_labs_reviewer_csv(event, context):
             reviewer_position = 1
             for reviewer_id in team_members:
                 if reviewer_id != reviewee_id:
-                    reviewer = peopledao.get_student(reviewer_id)
+                    reviewer = students[reviewer_id]
 
                     # Create the columns for the reviewers
                     csv_row["reviewer_first_name_" + str(reviewer_position)] = reviewer["fields"]["First Name"][0]
@@ -93,16 +105,11 @@ def generate_bw_reviewer_csv(event, context):
     if not event:
         raise ("You must provide the Section as data in the event. One of: FT, PTPT, PTCT")
 
-    # Use the DAO to grab the list of all active projects
-    student_records = peopledao.get_all_bw_students(event)
-    print("Found {} student records".format(len(student_records)))
-
-    # Use a Lambda function to filter the metadata from the records
-    students = list(map(lambda student: student["fields"], student_records))
-
-    # Organize the students into track teams
+    # Organize the students into track teams as their records are read, without the record metadata
     track_teams = {}
-    for student in students:
+    number_of_students = 0
+    for student_record in peopledao.iter_all_bw_students(event):
+        student = student_record["fields"]
         track_team_id = student["Active Track Team"][0]
 
         if track_team_id not in track_teams.keys():
@@ -110,6 +117,10 @@ def generate_bw_reviewer_csv(event, context):
         else:
             track_teams[track_team_id].append(student)
 
+        number_of_students += 1
+
+    print("Found {} student records".format(number_of_students))
+
     peer_review_assignments = []
     for track_team, team_members in track_teams.items():
         print("\n")
@@ -0,0 +1,59 @@
+import contextlib
+import csv
+import glob
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+# The handler imports the DAOs relative to src, so it's imported from the repository root
+import src.searchlight.handler as handler
+
+
+def _student(record_id):
+    return {
+        "id": record_id,
+        "fields": {
+            "First Name": ["First " + record_id],
+            "Last Name": ["Last " + record_id],
+            "Lambda Email": [record_id + "@example.com"],
+        },
+    }
+
+
+class TestGenerateLabsReviewerCsv(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        # The CSV is written to the working directory
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+
+    def test_missing_team_member(self):
+
+        # The third team member's record was deleted, so isn't returned
+        projects = [{"id": "recProject", "fields": {"Team Members": ["recA", "recB", "recDeleted"]}}]
+        students = {"recA": _student("recA"), "recB": _student("recB")}
+
+        with mock.patch.object(
+            handler.projectsdao, "get_all_active_projects", return_value=projects
+        ), mock.patch.object(handler.peopledao, "get_students", return_value=students), contextlib.redirect_stdout(
+            io.StringIO()
+        ) as output:
+            handler.generate_labs_reviewer_csv("PT15", None)
+
+        self.assertIn("Unable to find student record recDeleted", output.getvalue())
+
+        (path,) = glob.glob("searchlight-export-PT15-*.csv")
+        with open(path) as csv_file:
+            rows = list(csv.DictReader(csv_file))
+
+        self.assertEqual([row["work_email"] for row in rows], ["recA@example.com", "recB@example.com"])
+        self.assertEqual([row["reviewer_email_1"] for row in rows], ["recB@example.com", "recA@example.com"])
+        self.assertEqual([row["reviewer_email_2"] for row in rows], ["", ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
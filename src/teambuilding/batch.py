@@ -0,0 +1,152 @@
+"""Builds the teams of several cohorts in one invocation.
+
+At the start of a term several part-time and full-time cohorts are launched
+together. Rather than invoking build_teams once per cohort, each paying the cold
+start and reading and writing Airtable one request after another, an event can
+list all of the cohorts:
+
+    {"cohorts": ["PT15", "PT16", "FT30"], "engine": "greedy"}
+
+Their surveys and projects are fetched concurrently on threads, their teams are
+built in parallel across a process pool, and the assignments of every cohort are
+written through a single Airtable projects writer, whose requests are paced to
+the API's rate limit, so cohorts don't compete for it. As with the multi-start
+engine, the cohorts are built one after the other when a pool can't be created,
+as in Lambda, splitting the time budget between them. They're also built one
+after the other with the multistart engine or decomposition, which already run
+their own pools sized to the cores.
+"""
+# Standard library imports
+import concurrent.futures
+import os
+import time
+from typing import List, Tuple
+
+# Local imports
+from labsdao import people as peopledao
+from labsdao import projects as projectsdao
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+# A cohort's teams: (project index, student index, score) for each assignment
+CohortResult = List[Tuple[int, int, int]]
+
+
+def build_teams(options: dict, context):
+    """Builds and writes the teams of every cohort listed in the build options
+
+    Args:
+        options (dict): The build options, with the cohort IDs under "cohorts"
+        context: AWS Lambda context, or None when not running in Lambda
+    """
+    cohorts = list(options["cohorts"])
+    deadline = time.monotonic() + handler._get_time_budget(options, context)
+
+    # Reading Airtable is I/O bound, so the cohorts are read at the same time on threads
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(cohorts)) as executor:
+        fetched_cohorts = list(executor.map(lambda cohort: _fetch_cohort(options, cohort), cohorts))
+
+    for surveys, _ in fetched_cohorts:
+        handler._sort_surveys(surveys)
+
+    # The multistart engine and decomposition already run their own process pools, sized to the cores
+    if options["engine"] == "multistart" or options["decompose"]:
+        results = _build_cohorts(options, fetched_cohorts, deadline)
+    else:
+        try:
+            results = _build_cohorts_in_pool(options, fetched_cohorts, deadline)
+        except (OSError, NotImplementedError, ImportError) as error:
+            print("Unable to create a process pool, building the cohorts one at a time: {}".format(error))
+            results = _build_cohorts(options, fetched_cohorts, deadline)
+
+    assignments: List[handler.AssignmentTuple] = []
+    for cohort, (surveys, projects), choices in zip(cohorts, fetched_cohorts, results):
+        cohort_assignments = [
+            handler.AssignmentTuple(projects[project_index], surveys[student_index], score)
+            for project_index, student_index, score in choices
+        ]
+
+        print("\nCohort {}: {} of {} students assigned".format(cohort, len(cohort_assignments), len(surveys)))
+        handler._print_assignments(cohort_assignments)
+
+        assignments.extend(cohort_assignments)
+
+    # One writer for every cohort, so their writes share the rate limit instead of each using all of it
+    projectsdao.assign_students_to_projects(
+        [(assignment.student, assignment.project, assignment.score) for assignment in assignments]
+    )
+
+
+def _fetch_cohort(options: dict, cohort: str) -> Tuple[List[dict], List[dict]]:
+    """Reads a cohort's surveys and active projects from Airtable"""
+    return (
+        peopledao.get_all_student_surveys(cohort, handler._get_survey_fields(options)),
+        projectsdao.get_all_active_projects(cohort, handler._get_project_fields(options)),
+    )
+
+
+def _build_cohorts_in_pool(
+    options: dict, fetched_cohorts: List[Tuple[List[dict], List[dict]]], deadline: float
+) -> List[CohortResult]:
+    """Builds each cohort's teams in its own process, with the whole time budget"""
+    time_budget = max(deadline - time.monotonic(), 0)
+
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(len(fetched_cohorts), os.cpu_count() or 1))
+    with executor:
+        futures = [
+            executor.submit(_build_cohort, options, surveys, projects, time_budget)
+            for surveys, projects in fetched_cohorts
+        ]
+
+        return [future.result() for future in futures]
+
+
+def _build_cohorts(
+    options: dict, fetched_cohorts: List[Tuple[List[dict], List[dict]]], deadline: float
+) -> List[CohortResult]:
+    """Builds the cohorts' teams one after the other in this process, sharing out the time budget"""
+    results = []
+    for index, (surveys, projects) in enumerate(fetched_cohorts):
+        time_budget = max(deadline - time.monotonic(), 0) / (len(fetched_cohorts) - index)
+        results.append(_build_cohort(options, surveys, projects, time_budget))
+
+    return results
+
+
+def _build_cohort(options: dict, surveys: List[dict], projects: List[dict], time_budget: float) -> CohortResult:
+    """Builds one cohort's teams as set out in the build options
+
+    The result refers to projects and students by index, as the records are copies when
+    run in another process.
+
+    Args:
+        options (dict): The build options
+        surveys (List[dict]): The cohort's surveys, already sorted
+        projects (List[dict]): The cohort's active projects
+        time_budget (float): Wall-clock seconds the engines may spend improving the teams
+
+    Returns:
+        CohortResult: The new assignments; on incremental runs, students already on a team aren't included
+    """
+    deadline = time.monotonic() + time_budget
+    features = featuresdb.StudentFeatureTable(surveys)
+    handler._report_unresolved_names(features)
+
+    unassigned_students = surveys
+    kept_assignments: List[handler.AssignmentTuple] = []
+    if options["incremental"]:
+        kept_assignments, unassigned_students = handler._get_current_assignments(projects, surveys)
+
+    assignments = handler._build_assignments(
+        options, projects, unassigned_students, features, deadline, kept_assignments
+    )
+
+    kept_students = {id(assignment.student) for assignment in kept_assignments}
+    project_indexes = {id(project): project_index for project_index, project in enumerate(projects)}
+    student_indexes = {id(student): student_index for student_index, student in enumerate(surveys)}
+
+    return [
+        (project_indexes[id(assignment.project)], student_indexes[id(assignment.student)], assignment.score)
+        for assignment in assignments
+        if id(assignment.student) not in kept_students
+    ]
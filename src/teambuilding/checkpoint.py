@@ -0,0 +1,222 @@
+"""Checkpoints of a team building run, so it can be resumed by the next invocation.
+
+The greedy engine saves the assignments made so far, and the students still to be
+placed, every CHECKPOINT_INTERVAL seconds. If the Lambda is about to run out of
+time it saves and stops before anything is written to Airtable; invoking it again
+with the same checkpoint picks up where it left off, placing the rest of the students
+around the assignments already made, exactly as the uninterrupted run would have.
+
+Every engine saves the complete plan before it's written to Airtable, and the
+checkpoint is deleted once the write has finished, so a run that times out while
+writing only has to redo the write. Adding a student to a team is idempotent, so
+rewriting projects that were already written is harmless.
+
+Checkpoints are JSON, kept in a local file or, for paths like s3://bucket/key, in S3.
+Students and projects are saved by record ID, and matched to the records read from
+Airtable on resume.
+"""
+# Standard library imports
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+
+# Local imports
+from teambuilding import handler
+
+# Seconds between saves while the greedy engine is running
+CHECKPOINT_INTERVAL = 30
+
+S3_PREFIX = "s3://"
+
+
+class OutOfTime(Exception):
+    """Raised by the engine after saving a checkpoint when the Lambda is about to time out"""
+
+
+class Checkpointer:
+    """Loads, saves and deletes the checkpoint of one run, and keeps track of when to save next"""
+
+    def __init__(self, path: str, cohort: str, context=None):
+        """
+        Args:
+            path (str): A local file, or s3://bucket/key
+            cohort (str): The cohort being built
+            context: AWS Lambda context, or None when not running in Lambda, in which case the run never
+                stops early
+        """
+        self.path = path
+        self.cohort = cohort
+        self.context = context
+        self.next_save = time.monotonic() + CHECKPOINT_INTERVAL
+
+    def load(self) -> Optional[dict]:
+        """Returns the saved checkpoint, or None if there isn't one for this cohort"""
+        if self.path.startswith(S3_PREFIX):
+            text = _read_s3(self.path)
+        elif os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as checkpoint_file:
+                text = checkpoint_file.read()
+        else:
+            text = None
+
+        if not text:
+            return None
+
+        checkpoint = json.loads(text)
+        if checkpoint["cohort"] != self.cohort:
+            print("Ignoring the checkpoint at {}, which is for cohort {}".format(self.path, checkpoint["cohort"]))
+            return None
+
+        print(
+            "Resuming from the checkpoint at {} with {} assignments".format(self.path, len(checkpoint["assignments"]))
+        )
+
+        return checkpoint
+
+    def save(
+        self, assignments: List[handler.AssignmentTuple], unassigned_students: List[dict], complete: bool = False
+    ):
+        """Saves the assignments made so far and the students still to be placed
+
+        Args:
+            assignments (List[AssignmentTuple]): The assignments made so far
+            unassigned_students (List[dict]): The students still to be placed, in priority order
+            complete (bool, optional): Whether the plan is finished and only has to be written
+        """
+        text = json.dumps(
+            {
+                "cohort": self.cohort,
+                "complete": complete,
+                "assignments": [
+                    [handler._get_project_id(assignment.project), assignment.student["id"], assignment.score]
+                    for assignment in assignments
+                ],
+                "unassigned": [student["id"] for student in unassigned_students],
+            }
+        )
+
+        if self.path.startswith(S3_PREFIX):
+            _write_s3(self.path, text)
+        else:
+            # Written to the side and moved into place, so a run killed mid-save keeps the last checkpoint
+            temporary_path = self.path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+                checkpoint_file.write(text)
+            os.replace(temporary_path, self.path)
+
+        self.next_save = time.monotonic() + CHECKPOINT_INTERVAL
+        print(
+            "Saved checkpoint with {} assignments and {} students to place to {}".format(
+                len(assignments), len(unassigned_students), self.path
+            )
+        )
+
+    def delete(self):
+        """Deletes the checkpoint, once the plan has been written"""
+        if self.path.startswith(S3_PREFIX):
+            _delete_s3(self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def update(
+        self,
+        current_assignments: List[handler.AssignmentTuple],
+        assignments: List[handler.AssignmentTuple],
+        unassigned_students: List[dict],
+    ):
+        """Called by the engine after every assignment; saves when it's time to, and stops the run when the
+        Lambda is about to time out
+
+        Args:
+            current_assignments (List[AssignmentTuple]): The assignments the engine started from
+            assignments (List[AssignmentTuple]): The assignments the engine has made
+            unassigned_students (List[dict]): The students still to be placed, in priority order
+
+        Raises:
+            OutOfTime: Once the assignments are saved, if there isn't time to carry on
+        """
+        out_of_time = self.is_out_of_time()
+
+        if out_of_time or time.monotonic() >= self.next_save:
+            self.save(list(current_assignments) + assignments, unassigned_students)
+
+        if out_of_time:
+            raise OutOfTime()
+
+    def is_out_of_time(self) -> bool:
+        """Returns True when the Lambda no longer has the time it needs to write the plan"""
+        if not hasattr(self.context, "get_remaining_time_in_millis"):
+            return False
+
+        return self.context.get_remaining_time_in_millis() / 1000.0 < handler.LAMBDA_TIME_RESERVE
+
+
+def resume(
+    checkpoint: dict, projects: List[dict], students: List[dict]
+) -> Tuple[List[handler.AssignmentTuple], List[dict]]:
+    """Matches a checkpoint's assignments and students to the records read for this run
+
+    Students missing from the checkpoint, such as surveys submitted since it was saved,
+    are placed after the ones it lists. Records that no longer exist are dropped.
+
+    Args:
+        checkpoint (dict): The loaded checkpoint
+        projects (List[dict]): All of the projects
+        students (List[dict]): All of the students, in priority order
+
+    Returns:
+        Tuple[List[AssignmentTuple], List[dict]]: The assignments already made, and the students still to be placed
+    """
+    projects_by_id = {handler._get_project_id(project): project for project in projects}
+    students_by_id = {student["id"]: student for student in students}
+
+    assignments = [
+        handler.AssignmentTuple(projects_by_id[project_id], students_by_id[student_id], score)
+        for project_id, student_id, score in checkpoint["assignments"]
+        if project_id in projects_by_id and student_id in students_by_id
+    ]
+
+    listed_ids = {student_id for _, student_id, _ in checkpoint["assignments"]}
+    listed_ids.update(checkpoint["unassigned"])
+
+    unassigned_students = [
+        students_by_id[student_id] for student_id in checkpoint["unassigned"] if student_id in students_by_id
+    ]
+    unassigned_students.extend(student for student in students if student["id"] not in listed_ids)
+
+    return assignments, unassigned_students
+
+
+def _split_s3_path(path: str) -> Tuple[str, str]:
+    prefix_length = len(S3_PREFIX)
+    bucket, _, key = path[prefix_length:].partition("/")
+
+    return bucket, key
+
+
+def _read_s3(path: str) -> Optional[str]:
+    # Imported here as boto3 is only needed for checkpoints in S3, and is provided by the Lambda runtime
+    import boto3
+
+    bucket, key = _split_s3_path(path)
+    s3_client = boto3.client("s3")
+
+    try:
+        return s3_client.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+
+def _write_s3(path: str, text: str):
+    import boto3
+
+    bucket, key = _split_s3_path(path)
+    boto3.client("s3").put_object(Bucket=bucket, Key=key, Body=text.encode("utf-8"))
+
+
+def _delete_s3(path: str):
+    import boto3
+
+    bucket, key = _split_s3_path(path)
+    boto3.client("s3").delete_object(Bucket=bucket, Key=key)
@@ -0,0 +1,69 @@
+"""Symmetric incompatibility graph between students, stored as bitsets.
+
+Two students are incompatible if either one listed the other's name in the
+incompatible students survey question. Every student is a bit, keyed by their
+row in the StudentFeatureTable, and each student has a bitmask of the students
+they're incompatible with. A team keeps a bitmask of its members, so checking a
+student against a team is a single AND of two integers.
+"""
+# Standard library imports
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+
+class IncompatibilityIndex:
+    """Bitset adjacency of the incompatibility graph, keyed by feature table row.
+
+    The index is grown one student at a time as surveys are compiled into the
+    feature table, so both directions of every edge are known as soon as both
+    students have been added.
+    """
+
+    def __init__(self):
+        # Bitmask of the rows each row is incompatible with
+        self.masks: List[int] = []
+
+        # Rows by their student name ID, and by the name IDs they listed as incompatible
+        self.rows_by_name: Dict[int, List[int]] = defaultdict(list)
+        self.rows_listing_name: Dict[int, List[int]] = defaultdict(list)
+
+    def add(self, row: int, name_id: int, incompatible_name_ids: List[int]):
+        """Adds a student to the graph, connecting them to everyone they listed and everyone who listed them
+
+        Args:
+            row (int): The student's row in the feature table; rows must be added in order
+            name_id (int): The student's interned name, or -1 if they didn't give one
+            incompatible_name_ids (List[int]): The interned names the student listed as incompatible
+        """
+        mask = 0
+
+        neighbours = [other for name in incompatible_name_ids for other in self.rows_by_name.get(name, [])]
+        if name_id >= 0:
+            neighbours.extend(self.rows_listing_name.get(name_id, []))
+
+        for other in neighbours:
+            mask |= 1 << other
+            self.masks[other] |= 1 << row
+
+        self.masks.append(mask)
+
+        if name_id >= 0:
+            self.rows_by_name[name_id].append(row)
+        for name in incompatible_name_ids:
+            self.rows_listing_name[name].append(row)
+
+    def conflicts(self, row: int, member_mask: int) -> bool:
+        """Returns True if the student is incompatible with any of the members in the mask"""
+        return bool(self.masks[row] & member_mask)
+
+    def get_incompatible_rows(self, row: int) -> Iterator[int]:
+        """Yields the rows of every student incompatible with the student"""
+        mask = self.masks[row]
+        while mask:
+            lowest_bit = mask & -mask
+            yield lowest_bit.bit_length() - 1
+            mask ^= lowest_bit
+
+    def get_unresolved_name_ids(self) -> List[int]:
+        """Returns the listed names that don't belong to any student in the index, in the order first listed"""
+        return [name for name in self.rows_listing_name if name not in self.rows_by_name]
@@ -0,0 +1,176 @@
+"""Splits a cohort into independent team building problems.
+
+A student can only be placed on a project needing their track, so the tracks and
+projects form a graph, with a track connected to every project that accepts it.
+Each connected component of that graph is a separate problem: no team has members
+from two components, so none of the scores in one component depend on the other.
+The track averages used by the team size criterion don't cross components either,
+as every project needing a track is in that track's component.
+
+Tracks that share a project are kept in the same component, which is how the
+diversity and timezone criteria across tracks stay coordinated. Components are
+built independently, across a process pool where one can be created, and the
+greedy engine makes exactly the same assignments as it would for the whole cohort.
+"""
+# Standard library imports
+from collections import namedtuple
+import concurrent.futures
+import os
+from typing import Dict, List, Tuple
+
+# Local imports
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+# The indexes of the projects and students of one independent problem, in their original order
+Component = namedtuple("Component", ["project_indexes", "student_indexes"])
+
+
+def build_assignments(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable,
+    options: dict,
+    time_budget: float,
+) -> List[handler.AssignmentTuple]:
+    """Builds the teams of each component separately with the engine selected in the build options
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable): The compiled surveys, or None to compile them
+        options (dict): The build options
+        time_budget (float): Wall-clock seconds to spend, shared between the components by number of students
+
+    Returns:
+        List[AssignmentTuple]: The assignments of every component
+    """
+    components, unplaceable_student_indexes = get_components(projects, students)
+
+    for student_index in reversed(unplaceable_student_indexes):
+        handler._report_unmatched_student(students[student_index])
+
+    print(
+        "Building {} independent groups of projects: {}".format(
+            len(components), [len(component.student_indexes) for component in components]
+        )
+    )
+
+    jobs = [
+        (
+            options,
+            [projects[project_index] for project_index in component.project_indexes],
+            [students[student_index] for student_index in component.student_indexes],
+            time_budget * len(component.student_indexes) / len(students),
+        )
+        for component in components
+    ]
+
+    # The multistart engine already runs its own process pool
+    if len(jobs) > 1 and options["engine"] != "multistart":
+        try:
+            results = _build_components_in_pool(jobs)
+        except (OSError, NotImplementedError, ImportError) as error:
+            print("Unable to create a process pool, building the groups one at a time: {}".format(error))
+            results = [_build_component(*job, features) for job in jobs]
+    else:
+        results = [_build_component(*job, features) for job in jobs]
+
+    assignments = []
+    for component, choices in zip(components, results):
+        for project_index, student_index, score in choices:
+            assignments.append(
+                handler.AssignmentTuple(
+                    projects[component.project_indexes[project_index]],
+                    students[component.student_indexes[student_index]],
+                    score,
+                )
+            )
+
+    return assignments
+
+
+def get_components(projects: List[dict], students: List[dict]) -> Tuple[List[Component], List[int]]:
+    """Groups the projects and students into the connected components of the track/project graph
+
+    Tracks are matched without regard to case, like ``handler._is_track_match``. Components
+    without any students are left out.
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): All of the students
+
+    Returns:
+        Tuple[List[Component], List[int]]: The components, and the indexes of the students whose
+            track isn't needed by any project
+    """
+    # Union-find over the tracks, joining all of the tracks a project needs
+    parents: Dict[str, str] = {}
+
+    def find(track: str) -> str:
+        while parents[track] != track:
+            parents[track] = parents[parents[track]]
+            track = parents[track]
+
+        return track
+
+    project_tracks = []
+    for project in projects:
+        tracks = [track.upper() for track in project["fields"][handler.PROJECT_TRACKS_FIELD]]
+        project_tracks.append(tracks)
+
+        for track in tracks:
+            parents.setdefault(track, track)
+        for track in tracks[1:]:
+            parents[find(track)] = find(tracks[0])
+
+    components: Dict[str, Component] = {}
+    unplaceable_student_indexes = []
+    for student_index, student in enumerate(students):
+        track = student["fields"].get(handler.SURVEY_TRACK_FIELD, "").upper()
+
+        if track not in parents:
+            unplaceable_student_indexes.append(student_index)
+            continue
+
+        components.setdefault(find(track), Component([], [])).student_indexes.append(student_index)
+
+    for project_index, tracks in enumerate(project_tracks):
+        if tracks and find(tracks[0]) in components:
+            components[find(tracks[0])].project_indexes.append(project_index)
+
+    return list(components.values()), unplaceable_student_indexes
+
+
+def _build_components_in_pool(jobs: List[tuple]) -> List[List[Tuple[int, int, int]]]:
+    """Builds the components across a process pool sized to the available cores"""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(_build_component, *job) for job in jobs]
+
+        return [future.result() for future in futures]
+
+
+def _build_component(
+    options: dict,
+    projects: List[dict],
+    students: List[dict],
+    time_budget: float,
+    features: featuresdb.StudentFeatureTable = None,
+) -> List[Tuple[int, int, int]]:
+    """Builds the teams of one component
+
+    The result refers to projects and students by their index in the component, as the
+    records are copies when run in another process.
+
+    Returns:
+        List[Tuple[int, int, int]]: (project index, student index, score) for each assignment
+    """
+    assignments = handler._run_engine(options, projects, students, features, time_budget)
+
+    project_indexes = {id(project): project_index for project_index, project in enumerate(projects)}
+    student_indexes = {id(student): student_index for student_index, student in enumerate(students)}
+
+    return [
+        (project_indexes[id(assignment.project)], student_indexes[id(assignment.student)], assignment.score)
+        for assignment in assignments
+    ]
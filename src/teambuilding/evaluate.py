@@ -0,0 +1,229 @@
+"""Whole-plan evaluation of complete sets of team assignments.
+
+``handler._get_score`` is a marginal score: it depends on the order students were
+assigned in, and only says how good one more assignment is. Plans are compared by
+``handler._get_plan_score`` instead, which scores every student against the rest
+of their team, so it doesn't depend on the order of the assignments. Every engine
+ranks its plans by that same objective, and this reports it along with a breakdown
+of each team, counted in one pass over NumPy arrays of the assignments:
+
+    * size deviation -- for each track the project needs, how far the team's number of
+      students of that track is from the cohort's average for the track
+    * average deviations -- for each AVERAGE_GOAL_CRITERIA survey field, how far the
+      team's average response is from the desired average
+    * genders and ethnicities -- how many are represented on the team, and how many of
+      those are shared by at least two members, the pairs the diversity criteria aim for
+    * conflicts -- how many pairs of members are incompatible
+
+A team's score is the sum of its members' scores, and the plan's score adds
+BAD_FIT_SCORE for each student who could have been placed but wasn't. Higher is
+better.
+"""
+# Standard library imports
+from collections import namedtuple
+from typing import Dict, List
+
+# Third party imports
+import numpy as np
+
+# Local imports
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+TeamEvaluation = namedtuple(
+    "TeamEvaluation",
+    [
+        "project",
+        "size",
+        "size_deviation",
+        "average_deviations",
+        "genders",
+        "gender_pairs",
+        "ethnicities",
+        "ethnicity_pairs",
+        "conflicts",
+        "score",
+    ],
+)
+
+PlanEvaluation = namedtuple("PlanEvaluation", ["score", "teams", "unassigned"])
+
+
+def evaluate_plan(
+    projects: List[dict],
+    students: List[dict],
+    assignments: List[handler.AssignmentTuple],
+    features: featuresdb.StudentFeatureTable = None,
+) -> PlanEvaluation:
+    """Scores a complete set of assignments as a whole, with a breakdown for every team
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): All of the students, assigned or not
+        assignments (List[AssignmentTuple]): The assignments
+        features (StudentFeatureTable, optional): The compiled surveys; compiled from the students if not provided
+
+    Returns:
+        PlanEvaluation: The plan's score, the evaluation of each project's team in project order, and the
+            number of students who could have been placed but weren't
+    """
+    if features is None:
+        features = featuresdb.StudentFeatureTable(students)
+
+    project_indexes = {handler._get_project_id(project): index for index, project in enumerate(projects)}
+    teams = np.array(
+        [project_indexes[handler._get_project_id(assignment.project)] for assignment in assignments], dtype=np.int64
+    )
+    rows = np.array([features.row(assignment.student) for assignment in assignments], dtype=np.int64)
+
+    required_tracks = [
+        {features.tracks.intern(track) for track in project["fields"][handler.PROJECT_TRACKS_FIELD]}
+        for project in projects
+    ]
+
+    size, size_deviation = _get_size_deviations(features, teams, rows, required_tracks)
+    average_deviations = _get_average_deviations(features, teams, rows, len(projects))
+    genders, gender_pairs = _count_shared_values(
+        len(projects), len(features.genders), teams, featuresdb._view(features.gender_ids, np.int32)[rows]
+    )
+    ethnicities, ethnicity_pairs = _count_shared_values(
+        len(projects), len(features.ethnicities), *_get_ethnicities(features, teams, rows)
+    )
+    conflicts = _count_conflicts(features, teams, rows, len(projects))
+
+    # Scored with the plan objective every engine uses, so the evaluation always agrees with the engines
+    member_scores = handler._get_member_scores(projects, assignments, features)
+    scores = np.bincount(teams, weights=member_scores, minlength=len(projects)).astype(np.int64)
+
+    team_evaluations = [
+        TeamEvaluation(
+            project,
+            int(size[index]),
+            float(size_deviation[index]),
+            {
+                survey_field: float(average_deviations[index, criterion_index])
+                for criterion_index, (survey_field, _, _) in enumerate(handler.AVERAGE_GOAL_CRITERIA)
+            },
+            int(genders[index]),
+            int(gender_pairs[index]),
+            int(ethnicities[index]),
+            int(ethnicity_pairs[index]),
+            int(conflicts[index]),
+            int(scores[index]),
+        )
+        for index, project in enumerate(projects)
+    ]
+
+    unassigned = handler._count_unplaced_students(projects, students, assignments)
+
+    return PlanEvaluation(sum(member_scores) + handler.BAD_FIT_SCORE * unassigned, team_evaluations, unassigned)
+
+
+def get_team_summary(team: TeamEvaluation) -> Dict[str, object]:
+    """Returns a team's evaluation, without the project record, ready to be serialized as JSON"""
+    summary = team._asdict()
+    project = summary.pop("project")
+    summary["project_id"] = handler._get_project_id(project)
+    summary["project_name"] = project["fields"].get(handler.PROJECT_NAME_FIELD)
+
+    return summary
+
+
+def _get_size_deviations(
+    features: featuresdb.StudentFeatureTable, teams: np.ndarray, rows: np.ndarray, required_tracks: List[set]
+) -> tuple:
+    """Returns the size of each team, and the sum over the tracks it needs of the distance from the track average"""
+    number_of_teams = len(required_tracks)
+    number_of_tracks = len(features.tracks)
+
+    required = np.zeros((number_of_teams, number_of_tracks), dtype=bool)
+    for index, track_ids in enumerate(required_tracks):
+        required[index, list(track_ids)] = True
+
+    tracks = featuresdb._view(features.track_ids, np.int32)[rows]
+    answered = tracks >= 0
+
+    track_sizes = np.zeros((number_of_teams, number_of_tracks))
+    np.add.at(track_sizes, (teams[answered], tracks[answered]), 1)
+
+    # Like the team size criterion, the average is over the projects that need the track
+    projects_requiring = required.sum(axis=0)
+    assigned = (track_sizes * required).sum(axis=0)
+    averages = np.divide(assigned, projects_requiring, out=np.zeros(number_of_tracks), where=projects_requiring > 0)
+
+    size = np.bincount(teams, minlength=number_of_teams)
+    size_deviation = (np.abs(track_sizes - averages) * required).sum(axis=1)
+
+    return size, size_deviation
+
+
+def _get_average_deviations(
+    features: featuresdb.StudentFeatureTable,
+    teams: np.ndarray,
+    rows: np.ndarray,
+    number_of_teams: int,
+) -> np.ndarray:
+    """Returns how far each team's average response is from the desired average, per averaged field; fields
+    nobody on a team answered don't count"""
+    criteria = handler.AVERAGE_GOAL_CRITERIA
+    desired_averages = np.array([desired_average for _, desired_average, _ in criteria], dtype=np.float64)
+
+    responses = np.stack([featuresdb._view(responses, np.float64)[rows] for responses in features.responses], axis=1)
+    responded = np.stack([featuresdb._view(responded, np.uint8)[rows] for responded in features.responded], axis=1)
+
+    response_sums = np.zeros((number_of_teams, len(criteria)))
+    response_counts = np.zeros((number_of_teams, len(criteria)))
+    np.add.at(response_sums, teams, responses * responded)
+    np.add.at(response_counts, teams, responded)
+
+    averages = np.divide(
+        response_sums,
+        response_counts,
+        out=np.broadcast_to(desired_averages, response_sums.shape).copy(),
+        where=response_counts > 0,
+    )
+    return np.abs(averages - desired_averages)
+
+
+def _get_ethnicities(features: featuresdb.StudentFeatureTable, teams: np.ndarray, rows: np.ndarray) -> tuple:
+    """Flattens the ethnicities of every assigned student, returning the team and the ethnicity ID of each"""
+    offsets = featuresdb._view(features.ethnicity_offsets, np.int32).astype(np.int64)
+    values = featuresdb._view(features.ethnicity_values, np.int32)
+
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+
+    # The position of each value in the flat array: the row's start plus the value's index within the row
+    positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+
+    return np.repeat(teams, lengths), values[positions]
+
+
+def _count_shared_values(number_of_teams: int, number_of_values: int, teams: np.ndarray, values: np.ndarray) -> tuple:
+    """Returns the number of distinct values on each team, and the number of those shared by at least two members"""
+    answered = values >= 0
+
+    counts = np.zeros((number_of_teams, max(number_of_values, 1)), dtype=np.int64)
+    np.add.at(counts, (teams[answered], values[answered]), 1)
+
+    return (counts >= 1).sum(axis=1), (counts >= 2).sum(axis=1)
+
+
+def _count_conflicts(
+    features: featuresdb.StudentFeatureTable, teams: np.ndarray, rows: np.ndarray, number_of_teams: int
+) -> np.ndarray:
+    """Returns the number of incompatible pairs of members on each team"""
+    masks = features.incompatibilities.masks
+
+    member_masks = [0] * number_of_teams
+    for team, row in zip(teams.tolist(), rows.tolist()):
+        member_masks[team] |= 1 << row
+
+    conflicts = np.zeros(number_of_teams, dtype=np.int64)
+    for team, row in zip(teams.tolist(), rows.tolist()):
+        conflicting_members = masks[row] & member_masks[team]
+        if conflicting_members:
+            conflicts[team] += bin(conflicting_members).count("1")
+
+    # Every pair is seen from both sides, as the incompatibilities are symmetric
+    return conflicts // 2
@@ -0,0 +1,165 @@
+"""Compact, array-backed copy of the survey answers used for team building.
+
+The scorers read every survey answer many times per run. Rather than looking up
+long survey question strings in each record's nested fields, the surveys are
+compiled once into a table: tracks, genders, ethnicities and names are interned
+to small integers and the numeric answers are stored column by column in
+contiguous arrays, with a presence mask for questions a student didn't answer.
+"""
+# Standard library imports
+from array import array
+from typing import Dict, Iterable, List
+
+# Third party imports
+import numpy as np
+
+# Local imports
+from teambuilding import compatibility
+from teambuilding import handler
+
+
+class Interner:
+    """Maps values to small integers, allocating them in the order values are first seen"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: str) -> int:
+        """Returns the integer standing in for the value, allocating one the first time it is seen"""
+        if value not in self.ids:
+            self.ids[value] = len(self.values)
+            self.values.append(value)
+
+        return self.ids[value]
+
+    def get(self, value: str) -> int:
+        """Returns the integer standing in for the value, or -1 if it has never been seen"""
+        return self.ids.get(value, -1)
+
+
+class StudentFeatureTable:
+    """Interned, column-oriented survey answers for a cohort, one row per survey.
+
+    Rows are looked up by the identity of the survey record, and surveys that
+    haven't been seen before are compiled on demand, so the table can be handed
+    records straight from the DAO.
+    """
+
+    def __init__(self, surveys: Iterable[dict] = ()):
+        self.surveys: List[dict] = []
+        self.rows: Dict[int, int] = {}
+
+        self.tracks = Interner()
+        self.genders = Interner()
+        self.ethnicities = Interner()
+        self.names = Interner()
+
+        # -1 when the student didn't answer
+        self.track_ids = array("i")
+        self.gender_ids = array("i")
+        self.name_ids = array("i")
+
+        # Variable length lists are stored flat, with the row's values between
+        # offsets[row] and offsets[row + 1]
+        self.ethnicity_offsets = array("i", [0])
+        self.ethnicity_values = array("i")
+        self.incompatible_name_offsets = array("i", [0])
+        self.incompatible_name_values = array("i")
+
+        # Who can't be on a team with whom, as bitsets keyed by row
+        self.incompatibilities = compatibility.IncompatibilityIndex()
+
+        # One column per averaged survey question, in AVERAGE_GOAL_CRITERIA order
+        self.criterion_indexes = {
+            survey_field: index for index, (survey_field, _, _) in enumerate(handler.AVERAGE_GOAL_CRITERIA)
+        }
+        self.responses = [array("d") for _ in handler.AVERAGE_GOAL_CRITERIA]
+        self.responded = [bytearray() for _ in handler.AVERAGE_GOAL_CRITERIA]
+
+        for survey in surveys:
+            self.add(survey)
+
+    def __len__(self) -> int:
+        return len(self.surveys)
+
+    def row(self, survey: dict) -> int:
+        """Returns the row of a survey, compiling it into the table if it isn't there yet"""
+        row = self.rows.get(id(survey))
+        if row is None:
+            row = self.add(survey)
+
+        return row
+
+    def add(self, survey: dict) -> int:
+        """Compiles a survey into a new row of the table
+
+        Args:
+            survey (dict): The student survey record
+
+        Returns:
+            int: The row of the survey
+        """
+        fields = survey["fields"]
+
+        row = len(self.surveys)
+        self.surveys.append(survey)
+        self.rows[id(survey)] = row
+
+        if handler.SURVEY_TRACK_FIELD in fields:
+            self.track_ids.append(self.tracks.intern(fields[handler.SURVEY_TRACK_FIELD]))
+        else:
+            self.track_ids.append(-1)
+
+        gender = fields.get(handler.SURVEY_GENDER_FIELD, None)
+        self.gender_ids.append(self.genders.intern(gender) if gender else -1)
+
+        if handler.SURVEY_STUDENT_NAME_FIELD in fields:
+            self.name_ids.append(self.names.intern(fields[handler.SURVEY_STUDENT_NAME_FIELD][0]))
+        else:
+            self.name_ids.append(-1)
+
+        for ethnicity in fields.get(handler.SURVEY_ETHNICITIES_FIELD, None) or []:
+            self.ethnicity_values.append(self.ethnicities.intern(ethnicity))
+        self.ethnicity_offsets.append(len(self.ethnicity_values))
+
+        for name in fields.get(handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD, []):
+            self.incompatible_name_values.append(self.names.intern(name))
+        self.incompatible_name_offsets.append(len(self.incompatible_name_values))
+
+        self.incompatibilities.add(row, self.name_ids[row], self.get_incompatible_name_ids(row))
+
+        for survey_field, criterion_index in self.criterion_indexes.items():
+            if survey_field in fields:
+                self.responses[criterion_index].append(fields[survey_field])
+                self.responded[criterion_index].append(1)
+            else:
+                self.responses[criterion_index].append(0.0)
+                self.responded[criterion_index].append(0)
+
+        return row
+
+    def get_ethnicity_ids(self, row: int) -> array:
+        start, end = self.ethnicity_offsets[row], self.ethnicity_offsets[row + 1]
+
+        return self.ethnicity_values[start:end]
+
+    def get_incompatible_name_ids(self, row: int) -> array:
+        start, end = self.incompatible_name_offsets[row], self.incompatible_name_offsets[row + 1]
+
+        return self.incompatible_name_values[start:end]
+
+    def get_unresolved_names(self) -> List[str]:
+        """Returns the names listed as incompatible that don't match the name of any compiled survey"""
+        return [self.names.values[name_id] for name_id in self.incompatibilities.get_unresolved_name_ids()]
+
+
+def _view(values: array, dtype) -> np.ndarray:
+    """Wraps one of the feature table's arrays as a NumPy array without copying it"""
+    if len(values) == 0:
+        return np.zeros(0, dtype=dtype)
+
+    return np.frombuffer(values, dtype=dtype)
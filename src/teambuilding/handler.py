@@ -1,17 +1,32 @@
+# Annotations refer to the features module, which imports this one, so they're only evaluated on demand
+from __future__ import annotations
+
 # Standard library imports
 from collections import Counter, namedtuple
+import heapq
+import json
 import math
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Third party imports
+import numpy as np
 
 # Local imports
 from labsdao import people as peopledao
 from labsdao import projects as projectsdao
+from teambuilding import features as featuresdb
+from teambuilding import instrumentation
 
 BAD_FIT_SCORE = -100000
 
+# Students aren't assigned to a team they score this low or lower on, such as one with an incompatible member
+MIN_ASSIGNMENT_SCORE = -5000
+
 TEAM_SIZE_WEIGHT = 200
 
 SURVEY_STUDENT_NAME_FIELD = "Student Name"
+SURVEY_STUDENT_ID_FIELD = "What is your name?"
 SURVEY_PRODUCT_OPT_OUT_FIELD = "Product Opt Out Text"
 
 SURVEY_ETHNICITIES_FIELD = "Ethnicities"
@@ -26,6 +41,7 @@ SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD = "Incompatible Student Names"
 PROJECT_NAME_FIELD = "Name"
 PROJECT_PRODUCT_NAME_FIELD = "Product Name"
 PROJECT_TRACKS_FIELD = "Tracks"
+PROJECT_TEAM_MEMBERS_FIELD = "Team Members"
 
 SURVEY_ASSERTIVENESS_FIELD = "How often do you speak up during group discussions?"
 SURVEY_ASSERTIVENESS_WEIGHT = 50
@@ -57,14 +73,234 @@ SURVEY_DOCKER_WEIGHT = 100
 SURVEY_STUDENT_TIMEZONE_FIELD = "Student Timezone Offset"
 SURVEY_STUDENT_TIMEZONE_WEIGHT = 150
 
+# The survey questions whose team average is steered toward a desired value:
+#   (survey field, desired team average, weight)
+AVERAGE_GOAL_CRITERIA = [
+    (SURVEY_STUDENT_TIMEZONE_FIELD, 3.00, SURVEY_STUDENT_TIMEZONE_WEIGHT),
+    (SURVEY_UX_INTEREST_FIELD, 3.00, SURVEY_UX_INTEREST_WEIGHT),
+    (SURVEY_GIT_FIELD, 3.00, SURVEY_GIT_WEIGHT),
+    (SURVEY_DOCKER_FIELD, 3.00, SURVEY_DOCKER_WEIGHT),
+    (SURVEY_FRONTEND_FIELD, 3.00, SURVEY_FRONTEND_WEIGHT),
+    (SURVEY_DATA_MODELING_FIELD, 3.00, SURVEY_DATA_MODELING_WEIGHT),
+    (SURVEY_WEB_DESIGN_FIELD, 3.00, SURVEY_WEB_DESIGN_WEIGHT),
+    (SURVEY_ASSERTIVENESS_FIELD, 3.00, SURVEY_ASSERTIVENESS_WEIGHT),
+    (SURVEY_PLANNING_FIELD, 3.00, SURVEY_PLANNING_WEIGHT),
+    (SURVEY_VISION_FIELD, 3.00, SURVEY_VISION_WEIGHT),
+]
+
 AssignmentTuple = namedtuple("Assignment", ["project", "student", "score"])
 
+# The criteria weights as data, for the engines that take them instead of reading the constants above:
+#   team_size -- TEAM_SIZE_WEIGHT
+#   ethnicity -- SURVEY_BASE_ETHNICITY_WEIGHT
+#   gender -- SURVEY_GENDER_BASE_WEIGHT
+#   average_goals -- The weight of each averaged question, in AVERAGE_GOAL_CRITERIA order
+ScoringWeights = namedtuple("ScoringWeights", ["team_size", "ethnicity", "gender", "average_goals"])
+
+# Options for a team building run that may be overridden in the Lambda event
+#   engine -- "greedy" scores every pair in Python; "matrix" uses the vectorized NumPy engine; "solver"
+#             improves on the greedy teams by repeatedly solving an assignment problem with SciPy, swapping
+#             students between the greedy teams' seats, so it keeps the greedy team sizes and never balances them;
+#             "multistart" runs the greedy engine on several random orderings in parallel and keeps the best
+#   time_budget -- Wall-clock seconds the solver engine and local search may spend improving the teams
+#   local_search -- Whether to improve the engine's teams with moves and swaps between same-track teams
+#   local_search_iterations -- The most moves and swaps the local search may try
+#   starts -- The number of orderings the multistart engine tries; defaults to the number of cores
+#   decompose -- Whether to split the cohort into groups of tracks and projects that don't share any teams,
+#                and build each group's teams separately, in parallel where possible
+#   instrument -- Whether to record calls and wall time per scoring criterion, printed as JSON at the end
+#   snapshot -- A snapshot file (see teambuilding.snapshot) to read the surveys and projects from instead of
+#               Airtable; the plan is then written to a file instead of Airtable, and the cohort is optional
+#   plan_output -- The file to write the plan to when building from a snapshot; defaults to next to the snapshot
+#   incremental -- Whether to keep the students already on a project's Team Members where they are and only
+#                  place the rest, with the greedy engine, for students joining after the teams were built
+#   checkpoint -- A local file or s3://bucket/key to save the run's progress to, and resume from when invoked
+#                 again after running out of time (see teambuilding.checkpoint)
+#   cohorts -- Several cohort IDs to build in one invocation instead of "cohort"; they're fetched concurrently,
+#              built in parallel processes and written together (see teambuilding.batch)
+#   full_records -- Whether to read every field of the surveys and projects from Airtable, rather than only the
+#                   fields named by the SURVEY_*_FIELD and PROJECT_*_FIELD constants, which the teams are built from
+BUILD_OPTION_DEFAULTS = {
+    "cohort": None,
+    "engine": "greedy",
+    "time_budget": 60,
+    "local_search": False,
+    "local_search_iterations": 100000,
+    "starts": None,
+    "decompose": False,
+    "instrument": False,
+    "snapshot": None,
+    "plan_output": None,
+    "incremental": False,
+    "checkpoint": None,
+    "cohorts": None,
+    "full_records": False,
+}
+
+# The most students the greedy engine keeps scored per project and track; the rest are only scored once
+# all of those have been assigned elsewhere, or the project's team changes. None scores every student.
+CANDIDATES_PER_TRACK = 16
+
+# Seconds of the Lambda's remaining time kept back for writing the assignments to Airtable
+LAMBDA_TIME_RESERVE = 120
+
+
+class TeamState:
+    """Running aggregates for the students assigned to a single project team.
+
+    Every scoring criterion reads from these aggregates, so scoring a student against
+    a team never has to filter the full list of assignments. Adding a student is O(1)
+    in the size of the team. Students are read from a shared StudentFeatureTable, so
+    the aggregates are keyed by the table's interned IDs.
+    """
+
+    def __init__(
+        self, project: dict, features: featuresdb.StudentFeatureTable = None, assigned_per_track: Counter = None
+    ):
+        self.project = project
+        self.features = features if features is not None else featuresdb.StudentFeatureTable()
+        self.students: List[dict] = []
+
+        # Students assigned per track across all teams, shared with the other teams of a TeamStates
+        self.assigned_per_track: Counter = assigned_per_track if assigned_per_track is not None else Counter()
+
+        # Number of team members per track
+        self.track_sizes: Counter = Counter()
+
+        # Running sum and count of the responses to each averaged survey question, in
+        # AVERAGE_GOAL_CRITERIA order
+        self.response_sums: List[float] = [0.0] * len(AVERAGE_GOAL_CRITERIA)
+        self.response_counts: List[int] = [0] * len(AVERAGE_GOAL_CRITERIA)
+
+        self.gender_counter: Counter = Counter()
+        self.ethnicity_counter: Counter = Counter()
+
+        # Bitmask of the team members' feature table rows, checked against the incompatibility index
+        self.member_mask: int = 0
+
+    @classmethod
+    def from_assignments(
+        cls, project: dict, assignments: List[AssignmentTuple], features: featuresdb.StudentFeatureTable = None
+    ) -> "TeamState":
+        """Builds the state of a team by replaying the assignments made to its project
+
+        Args:
+            project (dict): The project the team is working on
+            assignments (List[AssignmentTuple]): The current list of student/project assignments
+            features (StudentFeatureTable, optional): The table to read the students from
+
+        Returns:
+            TeamState: The aggregate state of the team
+        """
+        team = cls(project, features)
+
+        for assignment in assignments:
+            if _get_project_id(assignment.project) == _get_project_id(project):
+                team.add(assignment.student)
+
+        return team
+
+    def add(self, student: dict):
+        """Adds a student to the team, updating all of the running aggregates
+
+        Args:
+            student (dict): The student survey record being added to the team
+        """
+        features = self.features
+        row = features.row(student)
+
+        self.students.append(student)
+        self.track_sizes[features.track_ids[row]] += 1
+        self.assigned_per_track[features.track_ids[row]] += 1
+
+        for criterion_index, responded in enumerate(features.responded):
+            # Blank responses are ignored when averaging
+            if responded[row]:
+                self.response_sums[criterion_index] += features.responses[criterion_index][row]
+                self.response_counts[criterion_index] += 1
+
+        if features.gender_ids[row] >= 0:
+            self.gender_counter[features.gender_ids[row]] += 1
+
+        self.ethnicity_counter.update(features.get_ethnicity_ids(row))
+
+        self.member_mask |= 1 << row
+
+    def remove(self, student: dict):
+        """Removes a student from the team, reversing everything add did
+
+        Args:
+            student (dict): The student survey record being removed from the team
+        """
+        features = self.features
+        row = features.row(student)
+
+        self.students.pop(next(index for index, member in enumerate(self.students) if member is student))
+        self.track_sizes[features.track_ids[row]] -= 1
+        self.assigned_per_track[features.track_ids[row]] -= 1
+
+        for criterion_index, responded in enumerate(features.responded):
+            if responded[row]:
+                self.response_sums[criterion_index] -= features.responses[criterion_index][row]
+                self.response_counts[criterion_index] -= 1
+
+        if features.gender_ids[row] >= 0:
+            self.gender_counter[features.gender_ids[row]] -= 1
+
+        self.ethnicity_counter.subtract(features.get_ethnicity_ids(row))
+
+        self.member_mask &= ~(1 << row)
+
+    def get_track_size(self, track: str) -> int:
+        """Returns the number of team members on a track"""
+        track_id = self.features.tracks.get(track)
+
+        return self.track_sizes[track_id] if track_id >= 0 else 0
+
+
+class TeamStates(dict):
+    """The TeamState of every project keyed by project ID, all reading from one StudentFeatureTable.
+
+    Also keeps the per-track counters the team size criterion averages over, so the
+    average team size for a track is O(1) rather than a scan of every team and project.
+    Both are keyed by the feature table's track IDs.
+    """
+
+    def __init__(self, features: featuresdb.StudentFeatureTable, projects: List[dict] = ()):
+        super().__init__()
+        self.features = features
+
+        # Students assigned per track, across all of the teams; kept up to date by TeamState
+        self.assigned_per_track: Counter = Counter()
+
+        # Projects requiring each track; fixed for the run
+        self.projects_requiring_track: Counter = Counter()
+        for project in projects:
+            for track in set(project["fields"][PROJECT_TRACKS_FIELD]):
+                self.projects_requiring_track[features.tracks.intern(track)] += 1
+
+    def add_team(self, project: dict) -> TeamState:
+        """Adds an empty team for the project, sharing this collection's counters"""
+        team = TeamState(project, self.features, self.assigned_per_track)
+        self[_get_project_id(project)] = team
+
+        return team
+
+    def get_average_team_size(self, track: int) -> float:
+        """Returns the number of students assigned to the track per project requiring it
+
+        Args:
+            track (int): The feature table's ID for the track
+        """
+        return float(self.assigned_per_track[track]) / float(self.projects_requiring_track[track])
+
 
 def build_teams(event, context):
     """Main AWS Lambda handeler function that orchestrates the calculation.
 
     Parameters:
-        event -- AWS Lambda event
+        event -- AWS Lambda event; either the cohort ID, a list of cohort IDs, or a dict with the cohort ID
+                 under "cohort" (or several under "cohorts") and any build options (see BUILD_OPTION_DEFAULTS)
         context -- AWS Lambda context
 
     Returns:
@@ -73,48 +309,120 @@ def build_teams(event, context):
     if not event:
         raise ("You must provide the cohort ID as data in the event")
 
-    surveys: List[dict] = []
+    options = _get_build_options(event)
+
+    if options["cohorts"]:
+        # Imported here as the batch mode depends on this module
+        from teambuilding import batch
+
+        batch.build_teams(options, context)
+        return
+
+    deadline = time.monotonic() + _get_time_budget(options, context)
+
     projects: List[dict] = []
     assignments: List[AssignmentTuple] = []
 
-    # Use the DAO to grab the list of all of the surveys
-    unassigned_students = peopledao.get_all_student_surveys(event)
+    cohort_snapshot = None
+    if options["snapshot"]:
+        # Imported here as the snapshots depend on this module
+        from teambuilding import snapshot
 
-    # Sort the incoming surveys to help the algorithm produce the best results
-    # Note: Can't have just one of the element reverse sorted, so must to multiple sorts
-    #       Multiple sorts must be performed _least_ significant to _most_
-    unassigned_students.sort(
-        key=lambda survey: (str(survey["fields"].get(SURVEY_TRACK_FIELD, ""))),
-        reverse=False,
-    )
-    unassigned_students.sort(
-        key=lambda survey: (str(survey["fields"].get(SURVEY_PRODUCT_OPT_OUT_FIELD, ""))),
-        reverse=True,
-    )
-    unassigned_students.sort(
-        key=lambda survey: (str(survey["fields"].get(SURVEY_ETHNICITIES_FIELD, ""))),
-        reverse=False,
-    )
-    unassigned_students.sort(
-        key=lambda survey: (str(survey["fields"].get(SURVEY_GENDER_FIELD, ""))),
-        reverse=True,
-    )
+        cohort_snapshot = snapshot.load_snapshot(options["snapshot"])
+        options["cohort"] = options["cohort"] or cohort_snapshot.cohort
+        unassigned_students = cohort_snapshot.surveys
+    else:
+        # Use the DAO to grab the list of all of the surveys
+        unassigned_students = peopledao.get_all_student_surveys(options["cohort"], _get_survey_fields(options))
 
-    projects = projectsdao.get_all_active_projects(event)
+    _sort_surveys(unassigned_students)
 
-    while surveys:
-        best_assignment = _get_best_assignment(projects, assignments, unassigned_students)
+    # Compile the surveys into the compact table the scorers read from
+    all_students = list(unassigned_students)
+    features = featuresdb.StudentFeatureTable(all_students)
+    _report_unresolved_names(features)
 
-        if best_assignment.project is None:
-            print("\n")
-            print("*" * 120)
-            print("!!!Unable to match student: {}", unassigned_students.pop())
-            print("*" * 120)
-        else:
-            assignments.append(best_assignment)
+    if cohort_snapshot is not None:
+        projects = cohort_snapshot.projects
+    else:
+        projects = projectsdao.get_all_active_projects(options["cohort"], _get_project_fields(options))
 
-            unassigned_students.remove(best_assignment.student)
+    # Students already on a team stay there, and only the rest are placed around them
+    kept_assignments: List[AssignmentTuple] = []
+    if options["incremental"]:
+        kept_assignments, unassigned_students = _get_current_assignments(projects, unassigned_students)
+        print(
+            "Keeping {} students on their current teams, placing {} students".format(
+                len(kept_assignments), len(unassigned_students)
+            )
+        )
+
+    # Imported here as the checkpoints depend on this module
+    from teambuilding import checkpoint
+
+    checkpointer = None
+    saved_checkpoint = None
+    if options["checkpoint"]:
+        checkpointer = checkpoint.Checkpointer(options["checkpoint"], options["cohort"], context)
+        saved_checkpoint = checkpointer.load()
+
+    recorder = instrumentation.Recorder() if options["instrument"] else None
+
+    if saved_checkpoint is not None and saved_checkpoint["complete"]:
+        # The plan was finished by an earlier invocation, and only has to be written
+        assignments, _ = checkpoint.resume(saved_checkpoint, projects, unassigned_students)
+    else:
+        current_assignments = kept_assignments
+        if saved_checkpoint is not None:
+            resumed_assignments, unassigned_students = checkpoint.resume(
+                saved_checkpoint, projects, unassigned_students
+            )
+            current_assignments = kept_assignments + resumed_assignments
 
+        try:
+            with instrumentation.recording(recorder):
+                assignments = _build_assignments(
+                    options, projects, unassigned_students, features, deadline, current_assignments, checkpointer
+                )
+        except checkpoint.OutOfTime:
+            print("Ran out of time; invoke again with the same checkpoint to carry on building the teams")
+            return
+
+        # Nothing is written to Airtable until the plan is complete
+        if checkpointer is not None:
+            checkpointer.save(assignments, [], complete=True)
+
+        kept_students = {id(assignment.student) for assignment in kept_assignments}
+        assignments = [assignment for assignment in assignments if id(assignment.student) not in kept_students]
+
+    # Output the final assignments and write them to the DAO
+    _print_assignments(assignments)
+
+    if cohort_snapshot is not None:
+        # Offline runs write the plan, with the breakdown of every score, to a file instead
+        snapshot.save_plan(
+            options["plan_output"] or snapshot.get_plan_path(options["snapshot"]),
+            options,
+            projects,
+            all_students,
+            kept_assignments + assignments,
+            features,
+        )
+    else:
+        # This actually writes the teams to the DAO, a batch of projects at a time
+        projectsdao.assign_students_to_projects(
+            [(assignment.student, assignment.project, assignment.score) for assignment in assignments]
+        )
+
+    if checkpointer is not None:
+        checkpointer.delete()
+
+    if recorder is not None:
+        print(json.dumps({"instrumentation": recorder.get_summary()}))
+
+
+def _print_assignments(assignments: List[AssignmentTuple]):
+    """Sorts the assignments by project and prints them as a table"""
     print("\n")
     print("=" * 120)
     print("Team assignments")
@@ -130,7 +438,6 @@ def build_teams(event, context):
         )
     )
 
-    # Output the final assignments and write them to the DAO
     TABLE_FORMAT_STRING = "{:<35} {:>6} {:<30} {:<85} {:<55} {:>5}"
 
     print(
@@ -158,199 +465,956 @@ def build_teams(event, context):
             )
         )
 
-        # This actually writes the teams to the DAO
-        projectsdao.assign_student_to_project(assignment.student, assignment.project, assignment.score)
+
+def _sort_surveys(surveys: List[dict]):
+    """Sorts the surveys in place into the order the engines place students in"""
+    # Sort the incoming surveys to help the algorithm produce the best results
+    # Note: Can't have just one of the element reverse sorted, so must to multiple sorts
+    #       Multiple sorts must be performed _least_ significant to _most_
+    surveys.sort(
+        key=lambda survey: (str(survey["fields"].get(SURVEY_TRACK_FIELD, ""))),
+        reverse=False,
+    )
+    surveys.sort(
+        key=lambda survey: (str(survey["fields"].get(SURVEY_PRODUCT_OPT_OUT_FIELD, ""))),
+        reverse=True,
+    )
+    surveys.sort(
+        key=lambda survey: (str(survey["fields"].get(SURVEY_ETHNICITIES_FIELD, ""))),
+        reverse=False,
+    )
+    surveys.sort(
+        key=lambda survey: (str(survey["fields"].get(SURVEY_GENDER_FIELD, ""))),
+        reverse=True,
+    )
+
+
+def _report_unresolved_names(features: featuresdb.StudentFeatureTable):
+    """Prints the names students listed as incompatible that don't match any of the surveys being assigned
+
+    These are usually typos, and are otherwise silently ignored by the compatibility check.
+    """
+    unresolved_names = features.get_unresolved_names()
+    if not unresolved_names:
+        return
+
+    print("*" * 120)
+    print("Incompatible student names that don't match any survey: {}".format(len(unresolved_names)))
+    for name in unresolved_names:
+        print("    {}".format(name))
+    print("*" * 120)
+
+
+def _get_build_options(event) -> dict:
+    """Normalizes the Lambda event into the options for a team building run
+
+    Args:
+        event: Either the cohort ID, a list of cohort IDs, or a dict with the cohort ID under "cohort" (or several
+            under "cohorts") and any options to override
+
+    Returns:
+        dict: The build options, with defaults filled in
+    """
+    options = dict(BUILD_OPTION_DEFAULTS)
+
+    if isinstance(event, dict):
+        options.update(event)
+    elif isinstance(event, list):
+        options["cohorts"] = event
+    else:
+        options["cohort"] = event
+
+    if not options.get("cohort") and not options.get("snapshot") and not options.get("cohorts"):
+        raise ValueError("You must provide the cohort ID as data in the event")
+
+    if options["cohorts"] and (options["snapshot"] or options["checkpoint"] or options["instrument"]):
+        raise ValueError("Snapshots, checkpoints and instrumentation are for runs of a single cohort")
+
+    if options["incremental"] and (options["engine"] != "greedy" or options["decompose"] or options["local_search"]):
+        raise ValueError("Incremental runs only place the new students with the greedy engine")
+
+    if options["incremental"] and options["checkpoint"]:
+        raise ValueError("Incremental runs place too few students to need a checkpoint")
+
+    return options
+
+
+def _get_survey_fields(options: dict) -> Optional[List[str]]:
+    """Returns the survey fields to read from Airtable
+
+    Args:
+        options (dict): The build options
+
+    Returns:
+        Optional[List[str]]: The fields named by the SURVEY_*_FIELD constants, or None to read every field
+    """
+    return None if options["full_records"] else _get_record_fields("SURVEY_")
+
+
+def _get_project_fields(options: dict) -> Optional[List[str]]:
+    """Returns the project fields to read from Airtable
+
+    Args:
+        options (dict): The build options
+
+    Returns:
+        Optional[List[str]]: The fields named by the PROJECT_*_FIELD constants, or None to read every field
+    """
+    return None if options["full_records"] else _get_record_fields("PROJECT_")
+
+
+def _get_record_fields(prefix: str) -> List[str]:
+    """Returns the values of the field name constants with a prefix: the fields of the table the teams are built from"""
+    return sorted({value for name, value in globals().items() if name.startswith(prefix) and name.endswith("_FIELD")})
+
+
+def _build_assignments(
+    options: dict,
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable,
+    deadline: float,
+    current_assignments: List[AssignmentTuple] = (),
+    checkpointer=None,
+) -> List[AssignmentTuple]:
+    """Builds the teams as set out in the build options, from the engine through to any improvement passes
+
+    Args:
+        options (dict): The build options
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable): The compiled surveys
+        deadline (float): time.monotonic() by which the engines should be done improving the teams
+        current_assignments (List[AssignmentTuple], optional): Assignments already made, kept on incremental
+            runs or resumed from a checkpoint; the students are placed around them with the greedy engine
+        checkpointer (Checkpointer, optional): Where the greedy engine saves its progress
+
+    Returns:
+        List[AssignmentTuple]: The assignments, including the current ones
+    """
+    if current_assignments:
+        # Only the greedy engine can place students around assignments that were already made
+        assignments = list(current_assignments) + _build_assignments_greedy(
+            projects, students, features, current_assignments, checkpointer
+        )
+    elif options["engine"] == "greedy" and not options["decompose"]:
+        assignments = _build_assignments_greedy(projects, students, features, checkpointer=checkpointer)
+    elif options["decompose"]:
+        # Imported here as the decomposition depends on this module
+        from teambuilding import decomposition
+
+        assignments = decomposition.build_assignments(
+            projects, students, features, options, max(deadline - time.monotonic(), 0)
+        )
+    else:
+        assignments = _run_engine(options, projects, students, features, max(deadline - time.monotonic(), 0))
+
+    if options["local_search"]:
+        # Imported here as the local search depends on this module
+        from teambuilding import localsearch
+
+        assignments = localsearch.improve_assignments(
+            projects,
+            assignments,
+            features,
+            max(deadline - time.monotonic(), 0),
+            options["local_search_iterations"],
+            students=students,
+        )
+
+    return assignments
+
+
+def _run_engine(
+    options: dict,
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable,
+    time_budget: float,
+) -> List[AssignmentTuple]:
+    """Builds the teams with the engine selected in the build options
+
+    Args:
+        options (dict): The build options
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable): The compiled surveys, or None to compile them
+        time_budget (float): Wall-clock seconds the engine may spend
+
+    Returns:
+        List[AssignmentTuple]: The assignments
+    """
+    if options["engine"] == "matrix":
+        # Imported here as the matrix engine depends on this module
+        from teambuilding import matrix
+
+        return matrix.build_assignments(projects, students, features)
+    elif options["engine"] == "solver":
+        # Imported here as the solver engine depends on SciPy and on this module
+        from teambuilding import solver
+
+        return solver.build_assignments(projects, students, features, time_budget)
+    elif options["engine"] == "multistart":
+        # Imported here as the multistart engine depends on this module
+        from teambuilding import multistart
+
+        return multistart.build_assignments(projects, students, features, options["starts"], time_budget)
+    elif options["engine"] == "greedy":
+        return _build_assignments_greedy(projects, students, features)
+    else:
+        raise ValueError("Unknown team building engine: {}".format(options["engine"]))
+
+
+def _get_time_budget(options: dict, context) -> float:
+    """Returns the seconds the engines may spend improving the teams
+
+    Capped so that the Lambda has LAMBDA_TIME_RESERVE seconds left to write the assignments.
+
+    Args:
+        options (dict): The build options
+        context: AWS Lambda context, or None when not running in Lambda
+
+    Returns:
+        float: The time budget in seconds
+    """
+    time_budget = float(options["time_budget"])
+
+    if hasattr(context, "get_remaining_time_in_millis"):
+        remaining_seconds = context.get_remaining_time_in_millis() / 1000.0
+        time_budget = min(time_budget, max(remaining_seconds - LAMBDA_TIME_RESERVE, 0))
+
+    return time_budget
+
+
+def _build_assignments_greedy(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable = None,
+    current_assignments: List[AssignmentTuple] = (),
+    checkpointer=None,
+) -> List[AssignmentTuple]:
+    """Builds teams by repeatedly making the single best scoring assignment until all students are placed
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable, optional): The compiled surveys; compiled from the students if not provided
+        current_assignments (List[AssignmentTuple], optional): Assignments already made, which the teams
+            start from and which are left as they are
+        checkpointer (Checkpointer, optional): Saves the assignments every so often, and stops the run by
+            raising OutOfTime if the Lambda is about to time out
+
+    Returns:
+        List[AssignmentTuple]: The new assignments, in the order they were made
+    """
+    assignments: List[AssignmentTuple] = []
+    unassigned_students = list(students)
+
+    if features is None:
+        features = featuresdb.StudentFeatureTable(
+            [assignment.student for assignment in current_assignments] + unassigned_students
+        )
+
+    # Aggregate state for each team, kept up to date as students are assigned
+    team_states = _build_team_states(projects, current_assignments, features)
+
+    # The scored candidates, rescored one project at a time as teams change
+    candidates = CandidateQueue(projects, unassigned_students, team_states)
+
+    while unassigned_students:
+        best_assignment = _get_best_assignment(projects, assignments, unassigned_students, team_states, candidates)
+
+        recorder = instrumentation.current.recorder
+        if recorder is not None:
+            recorder.count("greedy_rounds")
+
+        if checkpointer is not None:
+            checkpointer.update(current_assignments, assignments, unassigned_students)
+
+        if best_assignment.project is None:
+            unmatched_student = unassigned_students.pop()
+            candidates.remove(unmatched_student)
+
+            _report_unmatched_student(unmatched_student)
+        else:
+            assignments.append(best_assignment)
+            team_states[_get_project_id(best_assignment.project)].add(best_assignment.student)
+
+            unassigned_students.remove(best_assignment.student)
+            candidates.assign(best_assignment.project, best_assignment.student)
+
+    return assignments
+
+
+def _get_current_assignments(
+    projects: List[dict], students: List[dict]
+) -> Tuple[List[AssignmentTuple], List[dict]]:
+    """Splits the students into those already on a project's Team Members and those still to be placed
+
+    Team Members link to the record a survey's SURVEY_STUDENT_ID_FIELD links to. A student listed
+    on more than one project is kept on the first.
+
+    Args:
+        projects (List[dict]): All of the projects, with their current Team Members
+        students (List[dict]): All of the students, in priority order
+
+    Returns:
+        Tuple[List[AssignmentTuple], List[dict]]: The current assignments, without scores, and the
+            students on no team, still in priority order
+    """
+    projects_by_member_id: Dict[str, dict] = {}
+    for project in projects:
+        for member_id in project["fields"].get(PROJECT_TEAM_MEMBERS_FIELD, []):
+            projects_by_member_id.setdefault(member_id, project)
+
+    current_assignments: List[AssignmentTuple] = []
+    unassigned_students: List[dict] = []
+    for student in students:
+        project = projects_by_member_id.get((student["fields"].get(SURVEY_STUDENT_ID_FIELD) or [None])[0])
+
+        if project is None:
+            unassigned_students.append(student)
+        else:
+            current_assignments.append(AssignmentTuple(project, student, None))
+
+    return current_assignments, unassigned_students
+
+
+def _report_unmatched_student(student: dict):
+    print("\n")
+    print("*" * 120)
+    print("!!!Unable to match student: {}", student)
+    print("*" * 120)
 
 
 def _get_best_assignment(
-    projects: List[dict], assignments: List[AssignmentTuple], students: List[AssignmentTuple]
+    projects: List[dict],
+    assignments: List[AssignmentTuple],
+    students: List[AssignmentTuple],
+    team_states: TeamStates = None,
+    candidates: "CandidateQueue" = None,
 ) -> AssignmentTuple:
     """Find the highest scoring assignment given a set of projects, assigned and unassigned students
 
     Args:
-        projects (List[dict]): [description]
-        assignments (List[AssignmentTuple]): [description]
-        students (List[AssignmentTuple]): [description]
+        projects (List[dict]): All of the projects
+        assignments (List[AssignmentTuple]): All of the current assignments
+        students (List[AssignmentTuple]): The unassigned students
+        team_states (TeamStates, optional): The aggregate state of each team, keyed by project ID;
+            built from the assignments if not provided
+        candidates (CandidateQueue, optional): The scored candidates for the students, kept across rounds;
+            built from scratch if not provided
+
+    Returns:
+        AssignmentTuple: The best assignment; the project and student are None if no acceptable assignment exists
+    """
+    if team_states is None:
+        team_states = _build_team_states(projects, assignments)
+
+    if candidates is None:
+        candidates = CandidateQueue(projects, students, team_states)
+
+    return candidates.get_best_assignment()
+
+
+class CandidateQueue:
+    """Scored project/student candidates for the greedy engine, kept across rounds.
+
+    Every score is the team size score plus the score of how well the student fits
+    the team (see ``_get_team_fit_score``). The fit only changes when the project's
+    team changes, so it is kept in a max-heap per project and track and only the
+    heaps of the project that received a student are rescored after an assignment.
+    The team size score depends on the track average, which moves for every project
+    on each assignment, but it is the same for every student of a track on a
+    project, so it is added to the top of each heap rather than stored in it.
+
+    The fit can go up as well as down when a team changes, so stale entries are not
+    an upper bound on their new score; the changed project is rescored right away
+    instead of lazily.
+
+    Rescoring a project only scores the students that could make its top
+    candidates_per_track for their track. Every student gets an upper bound on their
+    fit, computed for all of them at once with NumPy (see ``_get_fit_bounds``), and
+    students are scored best bound first until the bound drops below the fit of the
+    worst of the top candidates so far. Every student left out of a heap then scores
+    strictly less than everyone in it, so its top is the best student until the heap
+    runs out, at which point the project is rescored.
+    """
+
+    def __init__(
+        self,
+        projects: List[dict],
+        students: List[dict],
+        team_states: TeamStates,
+        candidates_per_track: int = CANDIDATES_PER_TRACK,
+    ):
+        self.projects = projects
+        self.students = list(students)
+        self.team_states = team_states
+        self.features = team_states.features
+        self.candidates_per_track = candidates_per_track
+
+        # Students are identified by their position in the original list, which is
+        # also the order the exhaustive scan visits them in
+        self.student_indexes = {id(student): index for index, student in enumerate(self.students)}
+        self.unassigned = set(range(len(self.students)))
+
+        # The parts of each student's fit bound that don't depend on the team
+        features = self.features
+        rows = np.array([features.row(student) for student in self.students], dtype=np.int64)
+        self.student_tracks = featuresdb._view(features.track_ids, np.int32)[rows]
+        self.student_genders = featuresdb._view(features.gender_ids, np.int32)[rows]
+        ethnicity_offsets = featuresdb._view(features.ethnicity_offsets, np.int32)
+        self.student_bounds = np.where(
+            ethnicity_offsets[rows + 1] > ethnicity_offsets[rows], 2 * SURVEY_BASE_ETHNICITY_WEIGHT, 0
+        )
+        self.responses = np.stack([featuresdb._view(values, np.float64)[rows] for values in features.responses], axis=1)
+        self.responded = (
+            np.stack([featuresdb._view(values, np.uint8)[rows] for values in features.responded], axis=1) > 0
+        )
+        self.weights = np.array([weight for _, _, weight in AVERAGE_GOAL_CRITERIA], dtype=np.int64)
+        self.desired_averages = np.array([desired for _, desired, _ in AVERAGE_GOAL_CRITERIA], dtype=np.float64)
+        self.unassigned_mask = np.ones(len(self.students), dtype=bool)
+
+        # The students of each project's tracks; students without a track never match
+        self.track_matches = []
+        for project in projects:
+            project_tracks = {track.upper() for track in project["fields"][PROJECT_TRACKS_FIELD]}
+            self.track_matches.append(
+                np.array(
+                    [student["fields"].get(SURVEY_TRACK_FIELD, "").upper() in project_tracks for student in students],
+                    dtype=bool,
+                )
+            )
+
+        # Max-heaps of (-fit score, -student index) per project index and student track ID, and the tracks
+        # of each project whose heap left students out
+        self.heaps: Dict[int, Dict[int, list]] = {}
+        self.truncated: Dict[int, set] = {}
+        for project_index in range(len(projects)):
+            self._rescore_project(project_index)
+
+    def get_best_assignment(self) -> AssignmentTuple:
+        """Finds the highest scoring candidate, preferring the last project, then the last student, on ties
+
+        Returns:
+            AssignmentTuple: The best assignment; the project and student are None if no acceptable assignment exists
+        """
+        average_team_sizes = {}
+
+        best_candidate = None
+        for project_index in range(len(self.projects)):
+            team = self.team_states[_get_project_id(self.projects[project_index])]
+
+            for track in list(self.heaps[project_index]):
+                top_candidate = self._get_top_candidate(project_index, track)
+                if top_candidate is None:
+                    continue
+
+                if track not in average_team_sizes:
+                    average_team_sizes[track] = self.team_states.get_average_team_size(track)
+
+                fit_score, student_index = top_candidate
+                score = fit_score + _get_team_size_score(average_team_sizes[track], team.track_sizes[track])
+
+                # Don't assign a student to team if the score is really low
+                if score > MIN_ASSIGNMENT_SCORE:
+                    candidate = (score, project_index, student_index)
+                    if best_candidate is None or candidate > best_candidate:
+                        best_candidate = candidate
+
+        if best_candidate is None:
+            return AssignmentTuple(None, None, None)
+
+        score, project_index, student_index = best_candidate
+
+        return AssignmentTuple(self.projects[project_index], self.students[student_index], score)
+
+    def assign(self, project: dict, student: dict):
+        """Removes the student from the candidates and rescores the project the student joined
+
+        Args:
+            project (dict): The project, whose team state must already include the student
+            student (dict): The student that was assigned
+        """
+        self.remove(student)
+
+        project_id = _get_project_id(project)
+        for project_index, candidate_project in enumerate(self.projects):
+            if _get_project_id(candidate_project) == project_id:
+                self._rescore_project(project_index)
+
+    def remove(self, student: dict):
+        """Removes the student from the candidates
+
+        Args:
+            student (dict): The student
+        """
+        student_index = self.student_indexes[id(student)]
+        self.unassigned.discard(student_index)
+        self.unassigned_mask[student_index] = False
+
+    def _get_top_candidate(self, project_index: int, track: int) -> Optional[Tuple[int, int]]:
+        """Returns the (fit score, student index) of the project's best unassigned student of the track, if any"""
+        heap = self.heaps[project_index].get(track)
+
+        while True:
+            # Students that have been assigned elsewhere are dropped as they surface
+            while heap and -heap[0][1] not in self.unassigned:
+                heapq.heappop(heap)
+
+            if heap:
+                return -heap[0][0], -heap[0][1]
+
+            if track not in self.truncated[project_index]:
+                return None
+
+            # Every student kept for the track has been assigned elsewhere, so fall back to scoring the rest
+            recorder = instrumentation.current.recorder
+            if recorder is not None:
+                recorder.count("candidate_lists_exhausted")
+
+            self._rescore_project(project_index)
+            heap = self.heaps[project_index].get(track)
+
+    def _get_fit_bounds(self, student_indexes, team: TeamState):
+        """Upper bounds on the fit of each of the students with the team, without scoring them
+
+        The averaged questions and gender diversity are scored exactly, the same way
+        ``_get_team_fit_score`` does. Compatibility is at most 0, and the ethnic diversity
+        score is at most its pairing score, so those parts are left optimistic.
+
+        Args:
+            student_indexes (np.ndarray): The students
+            team (TeamState): The team
+
+        Returns:
+            np.ndarray: The bound of each student
+        """
+        # With no responses the desired average stands in for the team average, so nobody moves the score
+        response_counts = np.array(team.response_counts, dtype=np.float64)
+        team_averages = np.divide(
+            np.array(team.response_sums, dtype=np.float64),
+            response_counts,
+            out=self.desired_averages.copy(),
+            where=response_counts > 0,
+        )
+        above = team_averages > self.desired_averages
+        below = team_averages < self.desired_averages
+
+        responses = self.responses[student_indexes]
+        responded = self.responded[student_indexes]
+        lower = responses < team_averages
+        higher = responses > team_averages
+        better = responded & ((above & lower) | (below & higher))
+        worse = responded & ((above & higher) | (below & lower))
+
+        # Indexed by gender ID, with the last entry for students who didn't answer
+        gender_scores = np.full(len(self.features.genders) + 1, SURVEY_GENDER_BASE_WEIGHT, dtype=np.int64)
+        gender_scores[-1] = 0
+        for gender, matching_gender_count in team.gender_counter.items():
+            if matching_gender_count == 1:
+                gender_scores[gender] = SURVEY_GENDER_BASE_WEIGHT * 2
+            elif matching_gender_count > 1:
+                gender_scores[gender] = 0
+
+        return (
+            self.student_bounds[student_indexes]
+            + (better.astype(np.int64) - worse) @ self.weights
+            + gender_scores[self.student_genders[student_indexes]]
+        )
+
+    def _rescore_project(self, project_index: int):
+        project = self.projects[project_index]
+        team = self.team_states[_get_project_id(project)]
+
+        student_indexes = np.flatnonzero(self.track_matches[project_index] & self.unassigned_mask)
+        bounds = self._get_fit_bounds(student_indexes, team)
+        tracks = self.student_tracks[student_indexes]
+
+        incompatible = 0
+        pruned_by_bound = 0
+
+        heaps: Dict[int, list] = {}
+        truncated = set()
+        for track in np.unique(tracks).tolist():
+            in_track = tracks == track
+            track_indexes = student_indexes[in_track]
+            track_bounds = bounds[in_track]
+
+            # Best bound first; with ties, the later student first, as they win ties on the fit too
+            order = np.lexsort((-track_indexes, -track_bounds))
+
+            # Min-heap of the best (fit score, student index) scored so far
+            heap = []
+            for position, (bound, student_index) in enumerate(
+                zip(track_bounds[order].tolist(), track_indexes[order].tolist())
+            ):
+                full = self.candidates_per_track is not None and len(heap) >= self.candidates_per_track
+                if full and bound < heap[0][0]:
+                    # Nobody left can score more than the worst of the top candidates, so they're left out
+                    pruned_by_bound += len(track_indexes) - position
+                    truncated.add(track)
+                    break
+
+                fit_score = _get_team_fit_score([], project, self.students[student_index], team)
+                if fit_score <= BAD_FIT_SCORE:
+                    # Counted, but kept, as the cutoff is applied once the team size score is added
+                    incompatible += 1
+
+                if full:
+                    heapq.heappushpop(heap, (fit_score, student_index))
+                    truncated.add(track)
+                else:
+                    heapq.heappush(heap, (fit_score, student_index))
+
+            heaps[track] = [(-fit_score, -student_index) for fit_score, student_index in heap]
+            heapq.heapify(heaps[track])
+
+        self.heaps[project_index] = heaps
+        self.truncated[project_index] = truncated
+
+        recorder = instrumentation.current.recorder
+        if recorder is not None:
+            recorder.count("candidates_scanned", len(self.unassigned))
+            recorder.count("candidates_pruned_by_track", len(self.unassigned) - len(student_indexes))
+            recorder.count("candidates_incompatible", incompatible)
+            recorder.count("candidates_pruned_by_bound", pruned_by_bound)
+
+
+def _get_scoring_weights(overrides: Dict[str, float] = None) -> ScoringWeights:
+    """Returns the weights of the scoring criteria, from the module's weight constants
+
+    Args:
+        overrides (Dict[str, float], optional): Weights to use instead, by the name of their constant, e.g.
+            {"TEAM_SIZE_WEIGHT": 300, "SURVEY_GIT_WEIGHT": 50}
+
+    Returns:
+        ScoringWeights: The weights
+
+    Raises:
+        ValueError: If an override isn't the name of a weight constant
+    """
+    weights = {name: value for name, value in globals().items() if name.endswith("_WEIGHT")}
+    for name, value in (overrides or {}).items():
+        if name not in weights:
+            raise ValueError("Unknown scoring weight: {}".format(name))
+        weights[name] = value
+
+    # Each averaged question's weight constant is named after its field constant
+    average_goal_weights = {
+        globals()[name[: -len("WEIGHT")] + "FIELD"]: value
+        for name, value in weights.items()
+        if name[: -len("WEIGHT")] + "FIELD" in globals()
+    }
+
+    return ScoringWeights(
+        weights["TEAM_SIZE_WEIGHT"],
+        weights["SURVEY_BASE_ETHNICITY_WEIGHT"],
+        weights["SURVEY_GENDER_BASE_WEIGHT"],
+        tuple(
+            average_goal_weights.get(survey_field, weight) for survey_field, _, weight in AVERAGE_GOAL_CRITERIA
+        ),
+    )
+
+
+def _get_project_id(project: dict) -> str:
+    """Returns the ID used to identify a project's team
+
+    Args:
+        project (dict): The project record
+
+    Returns:
+        str: The Airtable record ID, or the project's "id" field when the record ID isn't available
+    """
+    if "id" in project:
+        return project["id"]
+
+    return project["fields"]["id"]
+
+
+def _build_team_states(
+    projects: List[dict], assignments: List[AssignmentTuple], features: featuresdb.StudentFeatureTable = None
+) -> TeamStates:
+    """Builds the aggregate state of every team from the current assignments
+
+    Args:
+        projects (List[dict]): All of the projects
+        assignments (List[AssignmentTuple]): All of the current assignments
+        features (StudentFeatureTable, optional): The table to read the students from; students missing from
+            the table are compiled into it as they're seen
 
     Returns:
-        AssignmentTuple: [description]
+        TeamStates: The state of each team keyed by project ID
     """
-    scores: Dict[str, dict] = {}
-    highscore = 0
-    best_assignment = AssignmentTuple(None, None, None)
+    team_states = TeamStates(features if features is not None else featuresdb.StudentFeatureTable(), projects)
+
     for project in projects:
-        for student in students:
-            score = _get_score(projects, assignments, project, student)
-            scores[project["id"]] = {student["id"]: score}
+        team_states.add_team(project)
+
+    for assignment in assignments:
+        project_id = _get_project_id(assignment.project)
+
+        if project_id not in team_states:
+            team_states.add_team(assignment.project)
 
-            # Don't assign a student to team if the score is really low
-            if score > -5000:
-                if best_assignment.project is None:
-                    best_assignment = AssignmentTuple(project, student, score)
-                    highscore = score
-                elif score >= highscore:
-                    best_assignment = AssignmentTuple(project, student, score)
-                    highscore = score
+        team_states[project_id].add(assignment.student)
 
-    return best_assignment
+    return team_states
 
 
-def _get_score(projects: List[dict], assignments: List[AssignmentTuple], project: dict, student: dict) -> int:
+def _get_score(
+    projects: List[dict],
+    assignments: List[AssignmentTuple],
+    project: dict,
+    student: dict,
+    team_states: TeamStates = None,
+) -> int:
     score = 0
 
     # =======================================================================================
     # Match student track to project required track
     # =======================================================================================
-    project_tracks_upper = [track.upper() for track in project["fields"][PROJECT_TRACKS_FIELD]]
-    student_track_upper = student["fields"].get(SURVEY_TRACK_FIELD, "").upper()
-
-    if student_track_upper not in project_tracks_upper:
+    if not _is_track_match(project, student):
         return BAD_FIT_SCORE
 
+    if team_states is None:
+        team_states = _build_team_states(projects, assignments)
+
+    team = team_states[_get_project_id(project)]
+
     # =========================================================================
     # Returns a score reflecting how far this student will push team size from
     # the average
     # =========================================================================
-    team_size_score = _calculate_team_size_score(projects, assignments, project, student)
+    team_size_score = _calculate_team_size_score(projects, assignments, project, student, team_states)
     score += team_size_score
 
+    # =======================================================================================
+    # Returns a score reflecting how well the student fits with the other team members
+    # =======================================================================================
+    score += _get_team_fit_score(assignments, project, student, team)
+
+    return score
+
+
+def _get_plan_score(
+    projects: List[dict],
+    students: List[dict],
+    assignments: List[AssignmentTuple],
+    features: featuresdb.StudentFeatureTable = None,
+) -> int:
+    """Scores a complete set of assignments with the same criteria used to make each assignment
+
+    Every assigned student is scored with _get_score against the rest of their team, as if
+    they were the last one assigned to it. Students that could have been placed on a team
+    but weren't count as BAD_FIT_SCORE.
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): All of the students, assigned or not
+        assignments (List[AssignmentTuple]): The assignments
+        features (StudentFeatureTable, optional): The compiled surveys
+
+    Returns:
+        int: The score of the plan; higher is better
+    """
+    score = sum(_get_member_scores(projects, assignments, features))
+
+    return score + BAD_FIT_SCORE * _count_unplaced_students(projects, students, assignments)
+
+
+def _get_member_scores(
+    projects: List[dict], assignments: List[AssignmentTuple], features: featuresdb.StudentFeatureTable = None
+) -> List[int]:
+    """Scores every assigned student against the rest of their team
+
+    Args:
+        projects (List[dict]): All of the projects
+        assignments (List[AssignmentTuple]): The assignments
+        features (StudentFeatureTable, optional): The compiled surveys
+
+    Returns:
+        List[int]: The score of each assignment, in the same order as the assignments
+    """
+    team_states = _build_team_states(projects, assignments, features)
+
+    return [
+        _get_member_score(projects, team_states, assignment.project, assignment.student) for assignment in assignments
+    ]
+
+
+def _count_unplaced_students(projects: List[dict], students: List[dict], assignments: List[AssignmentTuple]) -> int:
+    """Returns the number of students who weren't assigned but need a track one of the projects needs"""
+    project_tracks = {track.upper() for project in projects for track in project["fields"][PROJECT_TRACKS_FIELD]}
+    assigned_students = {id(assignment.student) for assignment in assignments}
+
+    return sum(
+        1
+        for student in students
+        if id(student) not in assigned_students
+        and student["fields"].get(SURVEY_TRACK_FIELD, "").upper() in project_tracks
+    )
+
+
+def _get_member_score(projects: List[dict], team_states: TeamStates, project: dict, student: dict) -> int:
+    """Scores a student already on a project's team against the rest of the team
+
+    Args:
+        projects (List[dict]): All of the projects
+        team_states (TeamStates): The aggregate state of each team, including the student
+        project (dict): The project the student is assigned to
+        student (dict): The student being scored
+
+    Returns:
+        int: The score
+    """
+    team = team_states[_get_project_id(project)]
+
+    team.remove(student)
+    score = _get_score(projects, [], project, student, team_states)
+    team.add(student)
+
+    return score
+
+
+def _get_member_score_breakdown(
+    projects: List[dict], team_states: TeamStates, project: dict, student: dict
+) -> Dict[str, int]:
+    """Scores a student already on a project's team against the rest of the team, criterion by criterion
+
+    The criteria add up to _get_member_score.
+
+    Args:
+        projects (List[dict]): All of the projects
+        team_states (TeamStates): The aggregate state of each team, including the student
+        project (dict): The project the student is assigned to
+        student (dict): The student being scored
+
+    Returns:
+        Dict[str, int]: The score of each criterion, with the average goals by survey field
+    """
+    if not _is_track_match(project, student):
+        return {"track": BAD_FIT_SCORE}
+
+    team = team_states[_get_project_id(project)]
+
+    team.remove(student)
+    breakdown = {
+        "team_size": _calculate_team_size_score(projects, [], project, student, team_states),
+        "compatibility": _calculate_student_to_team_compatibility_score([], project, student, team),
+        "ethnic_diversity": _calculate_ethnic_diversity_score([], project, student, team),
+        "gender_diversity": _calculate_gender_diversity_score([], project, student, team),
+    }
+    for survey_field, desired_average, weight in AVERAGE_GOAL_CRITERIA:
+        breakdown[survey_field] = _calculate_score_for_average_goal(
+            [], project, student, survey_field, desired_average, weight, team
+        )
+    team.add(student)
+
+    return breakdown
+
+
+def _is_track_match(project: dict, student: dict) -> bool:
+    """Returns whether the student's track is one of the tracks the project requires"""
+    project_tracks_upper = [track.upper() for track in project["fields"][PROJECT_TRACKS_FIELD]]
+    student_track_upper = student["fields"].get(SURVEY_TRACK_FIELD, "").upper()
+
+    return student_track_upper in project_tracks_upper
+
+
+def _get_team_fit_score(assignments: List[AssignmentTuple], project: dict, student: dict, team: TeamState) -> int:
+    """Scores every criterion except team size, which only depend on the members of the project's team
+
+    Args:
+        assignments (List[AssignmentTuple]): All of the current assignments
+        project (dict): The project the student is being scored for
+        student (dict): The student being scored
+        team (TeamState): The aggregate state of the project team
+
+    Returns:
+        int: The score
+    """
+    recorder = instrumentation.current.recorder
+    if recorder is not None:
+        return _get_team_fit_score_recorded(recorder, assignments, project, student, team)
+
+    score = 0
+
     # =======================================================================================
     # Returns a score reflecting how compatible the student is with other team members
     # =======================================================================================
-    # print("\n== Team Compatibility Scoring ==")
-    team_compatibility_score = _calculate_student_to_team_compatibility_score(assignments, project, student)
-    # print("Adding team compatibility score: {}".format(team_compatibility_score))
+    team_compatibility_score = _calculate_student_to_team_compatibility_score(assignments, project, student, team)
     score += team_compatibility_score
 
     # =======================================================================================
     # These calculations prefer the creation of diverse teams
     # =======================================================================================
-    # print("\n== Ethnic Diversity Scoring ==")
-    ethnic_diversity_score = _calculate_ethnic_diversity_score(assignments, project, student)
-    # print("Adding ethnic diversity score: {}".format(ethnic_diversity_score))
+    ethnic_diversity_score = _calculate_ethnic_diversity_score(assignments, project, student, team)
     score += ethnic_diversity_score
 
-    # print("\n== Gender Diversity Scoring ==")
-    gender_diversity_score = _calculate_gender_diversity_score(assignments, project, student)
-    # print("Adding gender diversity score: {}".format(gender_diversity_score))
+    gender_diversity_score = _calculate_gender_diversity_score(assignments, project, student, team)
     score += gender_diversity_score
 
     # =======================================================================================
-    # Align team members by timezone
+    # Align team members by timezone and try to force the team to average particular
+    # skills/traits
     # =======================================================================================
-    # print("\n== {} ==".format(SURVEY_STUDENT_TIMEZONE_FIELD))
-    timezone_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_STUDENT_TIMEZONE_FIELD,
-        3.00,
-        SURVEY_STUDENT_TIMEZONE_WEIGHT,
-    )
-    score += timezone_score
+    for survey_field, desired_average, weight in AVERAGE_GOAL_CRITERIA:
+        score += _calculate_score_for_average_goal(
+            assignments, project, student, survey_field, desired_average, weight, team
+        )
 
-    # =======================================================================================
-    # These calculations try to force the team to average particular skills/traits
-    # =======================================================================================
-    # print("\n== {} ==".format(UX_INTEREST_FIELD))
-    ux_interest_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_UX_INTEREST_FIELD,
-        3.00,
-        SURVEY_UX_INTEREST_WEIGHT,
-    )
-    score += ux_interest_score
-
-    # print("\n== {} ==".format(SURVEY_GIT_FIELD))
-    git_expertise_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_GIT_FIELD,
-        3.00,
-        SURVEY_GIT_WEIGHT,
-    )
-    score += git_expertise_score
-
-    # print("\n== {} ==".format(SURVEY_DOCKER_FIELD))
-    docker_expertise_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_DOCKER_FIELD,
-        3.00,
-        SURVEY_DOCKER_WEIGHT,
-    )
-    score += docker_expertise_score
-
-    # print("\n== {} ==".format(SURVEY_FRONTEND_FIELD))
-    web_focus_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_FRONTEND_FIELD,
-        3.00,
-        SURVEY_FRONTEND_WEIGHT,
-    )
-    score += web_focus_score
-
-    # print("\n== {} ==".format(SURVEY_DATA_MODELING_FIELD))
-    web_data_modeling_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_DATA_MODELING_FIELD,
-        3.00,
-        SURVEY_DATA_MODELING_WEIGHT,
-    )
-    score += web_data_modeling_score
-
-    # print("\n== {} ==".format(SURVEY_WEB_DESIGN_FIELD))
-    web_design_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_WEB_DESIGN_FIELD,
-        3.00,
-        SURVEY_WEB_DESIGN_WEIGHT,
-    )
-    score += web_design_score
-
-    # print("\n== {} ==".format(SURVEY_ASSERTIVENESS_FIELD))
-    assertiveness_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_ASSERTIVENESS_FIELD,
-        3.00,
-        SURVEY_ASSERTIVENESS_WEIGHT,
-    )
-    score += assertiveness_score
-
-    # print("\n== {} ==".format(SURVEY_PLANNING_FIELD))
-    planning_score = _calculate_score_for_average_goal(
-        assignments,
-        project,
-        student,
-        SURVEY_PLANNING_FIELD,
-        3.00,
-        SURVEY_PLANNING_WEIGHT,
-    )
-    score += planning_score
+    return score
+
+
+def _get_team_fit_score_recorded(
+    recorder: instrumentation.Recorder,
+    assignments: List[AssignmentTuple],
+    project: dict,
+    student: dict,
+    team: TeamState,
+) -> int:
+    """Scores the criteria as ``_get_team_fit_score`` does, recording each one's calls and wall time
 
-    # print("\n== {} ==".format(SURVEY_VISION_FIELD))
-    vision_score = _calculate_score_for_average_goal(
-        assignments, project, student, SURVEY_VISION_FIELD, 3.00, SURVEY_VISION_WEIGHT
+    Args:
+        recorder (instrumentation.Recorder): Where to record to
+        assignments (List[AssignmentTuple]): All of the current assignments
+        project (dict): The project the student is being scored for
+        student (dict): The student being scored
+        team (TeamState): The aggregate state of the project team
+
+    Returns:
+        int: The score
+    """
+    score = recorder.time(
+        "compatibility", _calculate_student_to_team_compatibility_score, assignments, project, student, team
     )
-    score += vision_score
+    score += recorder.time("ethnic_diversity", _calculate_ethnic_diversity_score, assignments, project, student, team)
+    score += recorder.time("gender_diversity", _calculate_gender_diversity_score, assignments, project, student, team)
+
+    for survey_field, desired_average, weight in AVERAGE_GOAL_CRITERIA:
+        score += recorder.time(
+            "average_goal:" + survey_field,
+            _calculate_score_for_average_goal,
+            assignments,
+            project,
+            student,
+            survey_field,
+            desired_average,
+            weight,
+            team,
+        )
 
     return score
 
 
 def _calculate_team_size_score(
-    projects: List[dict], assignments: List[AssignmentTuple], project: dict, student: dict
+    projects: List[dict],
+    assignments: List[AssignmentTuple],
+    project: dict,
+    student: dict,
+    team_states: TeamStates = None,
 ) -> int:
     """Calculates the weighted score based on how far away from the average team size this project would
        be after assigning the student
@@ -360,28 +1424,48 @@ def _calculate_team_size_score(
         assignments (List[AssignmentTuple]): All of the current assignments
         project (dict): The project the student is being scored for
         student (dict): The student being scored
+        team_states (TeamStates, optional): The aggregate state of each team, keyed by project ID
 
     Returns:
         int: A score representing how far the project size would be from the average
     """
-    student_track = student["fields"][SURVEY_TRACK_FIELD]
+    if team_states is None:
+        team_states = _build_team_states(projects, assignments)
+
+    features = team_states.features
+    track_id = features.track_ids[features.row(student)]
+
+    # Students without a track (-1) aren't on any track's teams, so have no team size score
+    if track_id < 0:
+        return 0
+
+    student_track = features.tracks.values[track_id]
 
     # Calculate the current average team size for this track
-    average_team_size = _get_average_team_size_for_track(projects, assignments, student_track)
+    average_team_size = _get_average_team_size_for_track(projects, assignments, student_track, team_states)
 
     # Calculate the current size of the team for the track
-    project_team_member_count = sum(
-        assignment.project["fields"]["id"] == project["fields"]["id"]
-        and assignment.student["fields"][SURVEY_TRACK_FIELD] == student_track
-        for assignment in assignments
-    )
+    project_team_member_count = team_states[_get_project_id(project)].get_track_size(student_track)
 
-    score = math.ceil(TEAM_SIZE_WEIGHT * (average_team_size - project_team_member_count))
+    return _get_team_size_score(average_team_size, project_team_member_count)
 
-    return score
+
+def _get_team_size_score(average_team_size: float, team_member_count: int) -> int:
+    """Weights how far below (positive) or above (negative) the average a team of the given size is"""
+    # Counted but not timed while recording, as timing would cost more than the score
+    recorder = instrumentation.current.recorder
+    if recorder is not None:
+        recorder.calls["team_size"] += 1
+
+    return math.ceil(TEAM_SIZE_WEIGHT * (average_team_size - team_member_count))
 
 
-def _get_average_team_size_for_track(projects: List[dict], assignments: List[AssignmentTuple], track: str) -> float:
+def _get_average_team_size_for_track(
+    projects: List[dict],
+    assignments: List[AssignmentTuple],
+    track: str,
+    team_states: TeamStates = None,
+) -> float:
     """Calculates the average team size for a particular track by dividing the number of assignments for the track
        by the total number of projects requiring that track.
 
@@ -392,21 +1476,16 @@ def _get_average_team_size_for_track(projects: List[dict], assignments: List[Ass
         projects (List[dict]): All of the projects
         assignments (List[AssignmentTuple]): All of the current assignments
         track (str): The specific track to find the average for
+        team_states (TeamStates, optional): The aggregate state of each team, keyed by project ID
 
     Returns:
         float: The average number of assignments for the track
     """
-    # How many assignments have been made for the specified track?
-    number_of_assignments_for_track = sum(
-        track == assignment.student["fields"][SURVEY_TRACK_FIELD] for assignment in assignments
-    )
-
-    # Filter the list of projects down to only those requiring the track
-    number_of_teams_requiring_track = sum(track in project["fields"][PROJECT_TRACKS_FIELD] for project in projects)
+    if team_states is None:
+        team_states = _build_team_states(projects, assignments)
 
-    average_team_size = float(number_of_assignments_for_track) / float(number_of_teams_requiring_track)
-
-    return average_team_size
+    # The team states keep count of the assignments for each track and of the projects requiring it
+    return team_states.get_average_team_size(team_states.features.tracks.intern(track))
 
 
 def _calculate_score_for_average_goal(
@@ -416,24 +1495,24 @@ def _calculate_score_for_average_goal(
     survey_field: str,
     desired_average: float,
     weight: int,
+    team: TeamState = None,
 ) -> int:
+    if team is None:
+        team = TeamState.from_assignments(project, assignments)
+
+    features = team.features
+    row = features.row(student)
+    criterion_index = features.criterion_indexes[survey_field]
+
     # Check to see if the student responded to the survey, question
-    if survey_field not in student["fields"]:
+    if not features.responded[criterion_index][row]:
         # If not, this has no effect on the score
         return 0
 
-    # Get the list of current assignments for the project team
-    team_assignments = filter(lambda assignment: assignment.project["id"] == project["id"], assignments)
-
-    # Calculate the average response to the question for the current assignments;
-    # ignore blank responses
-    number_of_responses = 0
-    sum_of_responses = 0
-    for assignment in team_assignments:
-        # Only consider assignments with a response to the survey question
-        if survey_field in assignment.student["fields"]:
-            number_of_responses += 1
-            sum_of_responses += assignment.student["fields"][survey_field]
+    # The team keeps the number and sum of responses to the question for the current
+    # assignments; blank responses are ignored
+    number_of_responses = team.response_counts[criterion_index]
+    sum_of_responses = team.response_sums[criterion_index]
 
     # Calculate the average response
     team_response_average = 0.00
@@ -447,7 +1526,7 @@ def _calculate_score_for_average_goal(
         team_response_average = sum_of_responses / number_of_responses
 
     # This is the response from the student
-    student_response = student["fields"][survey_field]
+    student_response = features.responses[criterion_index][row]
 
     # The score is based on trying to pull the team average toward the desired average
     score = 0
@@ -473,7 +1552,7 @@ def _calculate_score_for_average_goal(
 
 
 def _calculate_student_to_team_compatibility_score(
-    assignments: List[AssignmentTuple], project: dict, student_to_score: dict
+    assignments: List[AssignmentTuple], project: dict, student_to_score: dict, team: TeamState = None
 ) -> int:
     """Returns a score representing the student's compatibility with students already assigned to project
 
@@ -481,83 +1560,52 @@ def _calculate_student_to_team_compatibility_score(
         assignments (List[AssignmentTuple]): The current list of student/project assignments
         project (dict): The project to score the student against
         student_to_score (dict): The student being scored
+        team (TeamState, optional): The aggregate state of the project team
 
     Returns:
         int: 0 if the student is compatible; BAD_FIT_SCORE if the student is not compatible
     """
-    # This is the student we're scoring
-    student_name = student_to_score["fields"][SURVEY_STUDENT_NAME_FIELD][0]
-
-    # Get the list of current assignments for the project team we're calculating the score for
-    team_assignments = filter(
-        lambda assignment: assignment.project["fields"]["id"] == project["fields"]["id"], assignments
-    )
-
-    # Go through each assignment to be sure the student being checked _and_ the already assigned students are compatible
-    for assignment in team_assignments:
-        # Check to see if the student we're scoring lists any other students as incompatible
-        if SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD in student_to_score["fields"]:
-            student_not_compatible_list = student_to_score["fields"][SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD]
-
-            # Get the name of the currently assigned student
-            assigned_student_name = assignment.student["fields"][SURVEY_STUDENT_NAME_FIELD][0]
-
-            # See if the student we're scoring listed the assigned student as incompatible
-            if assigned_student_name in student_not_compatible_list:
-
-                # If so, this student gets a really low score for this team
-                return BAD_FIT_SCORE
-
-        # Check whether the currently assigned student lists the student being scored as incompatible
-        if SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD in assignment.student["fields"]:
-            assigned_student_not_compatible_list = assignment.student["fields"][SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD]
-
-            # See if the student we're scoring is listed by the assigned student as incompatible
-            if student_name in assigned_student_not_compatible_list:
-
-                # If so, this student gets a really low score for this team
-                return BAD_FIT_SCORE
+    if team is None:
+        team = TeamState.from_assignments(project, assignments)
+
+    # The incompatibility index is symmetric, so this covers both the student listing one of the
+    # assigned students as incompatible and any of the assigned students listing the student
+    features = team.features
+    if features.incompatibilities.conflicts(features.row(student_to_score), team.member_mask):
+        # If so, this student gets a really low score for this team
+        return BAD_FIT_SCORE
 
     return 0
 
 
-def _calculate_ethnic_diversity_score(assignments: List[AssignmentTuple], project: dict, student: dict) -> int:
+def _calculate_ethnic_diversity_score(
+    assignments: List[AssignmentTuple], project: dict, student: dict, team: TeamState = None
+) -> int:
     """Calculates a score that indicates if this student will complete a ethnic pair
     on the team. This will try to always have at least 2 people who share the same
     ethnic identity on the same team.
 
     Parameters:
+        assignments -- The current list of student/project assignments
         project -- The project
         student -- The student
+        team -- The aggregate state of the project team (optional)
 
     Returns:
         A score
     """
+    if team is None:
+        team = TeamState.from_assignments(project, assignments)
+
     # Get the ethnicities specified by the student
-    student_ethnicities = student["fields"].get(SURVEY_ETHNICITIES_FIELD, None)
+    student_ethnicities = team.features.get_ethnicity_ids(team.features.row(student))
     if not student_ethnicities:
         # The student didn't specify ethnicities, so we can't calculate a score
         return 0
 
-    # Get the list of current assignments for the project team
-    team_assignments = filter(
-        lambda assignment: assignment.project["fields"]["id"] == project["fields"]["id"], assignments
-    )
-
-    # This list will hold the list of ethnicities on the team
-    team_ethnicities = []
-    for assignment in team_assignments:
-        assigned_student_ethnicities = assignment.student["fields"].get(SURVEY_ETHNICITIES_FIELD, None)
-
-        if assigned_student_ethnicities:
-            team_ethnicities.append(assigned_student_ethnicities)
-
-    # Team ethnicities is going to be a list of lists, so let's flatten it
-    team_ethnicities = [item for sublist in team_ethnicities for item in sublist]
-
     # ================================================================================================================
     # Get the count ethnicities for the already assigned students
-    ethnicity_counter = Counter(team_ethnicities)
+    ethnicity_counter = team.ethnicity_counter
 
     # Check each of the student's listed ethnicities and take the highest score
     best_ethnicity_score = 0
@@ -580,43 +1628,34 @@ def _calculate_ethnic_diversity_score(assignments: List[AssignmentTuple], projec
     return best_ethnicity_score
 
 
-def _calculate_gender_diversity_score(assignments: List[AssignmentTuple], project: dict, student: dict) -> int:
+def _calculate_gender_diversity_score(
+    assignments: List[AssignmentTuple], project: dict, student: dict, team: TeamState = None
+) -> int:
     """Calculates a score that indicates if this student will complete a gender pair
     on the team. This will try to always have at least 2 people who share the same
     gender identity on the same team.
 
     Parameters:
+        assignments -- The current list of student/project assignments
         project -- The project
         student -- The student
+        team -- The aggregate state of the project team (optional)
 
     Returns:
         A score
     """
+    if team is None:
+        team = TeamState.from_assignments(project, assignments)
+
     # Get the gender specified by the student
-    student_gender = student["fields"].get(SURVEY_GENDER_FIELD, None)
-    if not student_gender:
+    student_gender = team.features.gender_ids[team.features.row(student)]
+    if student_gender < 0:
         # The student didn't provide a gender, so we can't calculate a score
         return 0
 
-    # Get the list of current assignments for the project team
-    team_assignments = filter(
-        lambda assignment: assignment.project["fields"]["id"] == project["fields"]["id"], assignments
-    )
-
-    # This list will hold the list of genders on the team
-    team_genders = []
-    for assignment in team_assignments:
-        assigned_student_gender = assignment.student["fields"].get(SURVEY_GENDER_FIELD, None)
-
-        if assigned_student_gender:
-            team_genders.append(assigned_student_gender)
-
     # ================================================================================================================
-    # Get the count genders for the already assigned students
-    gender_counter = Counter(team_genders)
-
     # Get the count of the particular gender that matches the student
-    matching_gender_count = gender_counter.get(student_gender, 0)
+    matching_gender_count = team.gender_counter.get(student_gender, 0)
 
     if matching_gender_count == 0:
         # This is good, as it will make the team more diverse
@@ -0,0 +1,102 @@
+"""Opt-in profiling of the team scorer.
+
+While a Recorder is active, the scorer in ``handler`` times each of the scoring
+criteria and counts its calls, and the greedy engine reports how many rounds it
+ran and how many candidates it scored or pruned. The handler looks up the active
+recorder itself, once per team fit score and wherever it counts, so the only cost
+when instrumentation is off is that check. The team size criterion is a single
+multiplication, so its calls are counted but not timed.
+
+The recorder is kept per thread: only work done on the thread that started
+recording is recorded, and engines running on a process pool report their
+in-process work only.
+"""
+# Standard library imports
+from collections import Counter
+import contextlib
+import threading
+import time
+from typing import Dict
+
+
+class _Current(threading.local):
+    """The Recorder recording on each thread, or None when instrumentation is off"""
+
+    recorder = None
+
+
+# Read by the handler as ``current.recorder``
+current = _Current()
+
+
+class Recorder:
+    """Call counts and wall time per criterion, and counters for the engines"""
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.counters: Counter = Counter()
+        self.elapsed = 0.0
+
+    def count(self, name: str, value: int = 1):
+        """Adds to one of the engine counters"""
+        self.counters[name] += value
+
+    def get_summary(self) -> dict:
+        """Returns everything recorded, ready to be serialized as JSON
+
+        Returns:
+            dict: Calls and seconds per criterion, with the average goal criterion broken
+                down by survey field, the engine counters, and the total seconds recorded
+        """
+        criteria: Dict[str, dict] = {}
+        for key in sorted(self.calls, key=lambda key: -self.seconds[key]):
+            name, _, survey_field = key.partition(":")
+            entry = {"calls": self.calls[key], "seconds": round(self.seconds[key], 6)}
+
+            if survey_field:
+                criteria.setdefault(name, {})[survey_field] = entry
+            else:
+                criteria[name] = entry
+
+        return {"seconds": round(self.elapsed, 6), "criteria": criteria, "counters": dict(self.counters)}
+
+    def time(self, name: str, function, *args) -> int:
+        """Calls one of the scoring criteria, recording its call and wall time under the name
+
+        Args:
+            name (str): The name the criterion is reported under
+            function: The criterion
+            args: The criterion's arguments
+
+        Returns:
+            int: The criterion's score
+        """
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+            self.calls[name] += 1
+
+
+@contextlib.contextmanager
+def recording(recorder: Recorder = None):
+    """Records the scorer's work on this thread into the recorder for the duration of the block; does nothing if
+    it's None
+
+    Args:
+        recorder (Recorder, optional): Where to record to
+    """
+    if recorder is None:
+        yield
+        return
+
+    previous = current.recorder
+    current.recorder = recorder
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.elapsed += time.perf_counter() - started
+        current.recorder = previous
@@ -0,0 +1,199 @@
+"""Local search improvement pass for a set of team assignments.
+
+Takes the assignments made by any of the engines and hill climbs on them, trying
+random single moves of a student to another team needing their track, and swaps
+of two students of the same track on different teams. A change is kept when it
+raises ``handler._get_plan_score``, the objective every engine is judged by: the
+sum of each student's score against the rest of their team, and BAD_FIT_SCORE for
+each student left unplaced.
+
+Moves and swaps never change how many students of a track are placed, so the
+track average used by the team size criterion and the students left unplaced are
+fixed for the whole search, and every student's score only depends on their own team. The score of a change is
+therefore the change in score of the two teams involved, and nothing else in the
+plan needs to be rescored.
+"""
+# Standard library imports
+import random
+import time
+from typing import Dict, List
+
+# Local imports
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+# Stop early once this many changes in a row haven't improved the plan
+MAX_ATTEMPTS_WITHOUT_IMPROVEMENT = 5000
+
+
+def improve_assignments(
+    projects: List[dict],
+    assignments: List[handler.AssignmentTuple],
+    features: featuresdb.StudentFeatureTable = None,
+    time_budget: float = handler.BUILD_OPTION_DEFAULTS["time_budget"],
+    max_iterations: int = handler.BUILD_OPTION_DEFAULTS["local_search_iterations"],
+    seed: int = 0,
+    students: List[dict] = None,
+) -> List[handler.AssignmentTuple]:
+    """Hill climbs from the assignments with moves and swaps between same-track teams
+
+    Args:
+        projects (List[dict]): All of the projects
+        assignments (List[AssignmentTuple]): The assignments to improve on
+        features (StudentFeatureTable, optional): The compiled surveys; compiled on demand if not provided
+        time_budget (float, optional): Wall-clock seconds to spend searching
+        max_iterations (int, optional): The most moves and swaps to try
+        seed (int, optional): Seed for picking the moves and swaps to try, so runs are reproducible
+        students (List[dict], optional): All of the students, assigned or not, for the score to count the unplaced
+
+    Returns:
+        List[AssignmentTuple]: The improved assignments grouped by project, scored against the rest of their team
+    """
+    deadline = time.monotonic() + time_budget
+
+    search = LocalSearch(projects, assignments, features, students)
+    initial_score = search.score
+
+    rng = random.Random(seed)
+    attempts_without_improvement = 0
+    for _ in range(max_iterations):
+        if time.monotonic() >= deadline or attempts_without_improvement >= MAX_ATTEMPTS_WITHOUT_IMPROVEMENT:
+            break
+
+        if search.try_random_change(rng):
+            attempts_without_improvement = 0
+        else:
+            attempts_without_improvement += 1
+
+    print("Local search plan score: {} (started at: {})".format(search.score, initial_score))
+
+    return search.get_assignments()
+
+
+class LocalSearch:
+    """The teams being improved, with the cached score of every team.
+
+    Students are identified by the identity of their survey record, like in the
+    feature table.
+    """
+
+    def __init__(
+        self,
+        projects: List[dict],
+        assignments: List[handler.AssignmentTuple],
+        features: featuresdb.StudentFeatureTable = None,
+        students: List[dict] = None,
+    ):
+        self.projects = projects
+        self.team_states = handler._build_team_states(projects, assignments, features)
+
+        self.project_ids_by_student: Dict[int, str] = {}
+        self.students_by_track: Dict[str, List[dict]] = {}
+        for assignment in assignments:
+            track = assignment.student["fields"][handler.SURVEY_TRACK_FIELD]
+            self.project_ids_by_student[id(assignment.student)] = handler._get_project_id(assignment.project)
+            self.students_by_track.setdefault(track, []).append(assignment.student)
+
+        self.students = [student for students in self.students_by_track.values() for student in students]
+
+        # The projects each track's students can be moved to
+        self.project_ids_by_track: Dict[str, List[str]] = {
+            track: [
+                handler._get_project_id(project)
+                for project in projects
+                if handler._is_track_match(project, students[0])
+            ]
+            for track, students in self.students_by_track.items()
+        }
+
+        self.team_scores: Dict[str, int] = {
+            project_id: self._get_team_score(project_id) for project_id in self.team_states
+        }
+
+        # Only the assigned students are counted when the rest aren't known
+        unplaced = handler._count_unplaced_students(projects, students, assignments) if students else 0
+        self.score = sum(self.team_scores.values()) + handler.BAD_FIT_SCORE * unplaced
+
+    def try_random_change(self, rng: random.Random) -> bool:
+        """Tries a random move or swap, keeping it if it improves the plan
+
+        Args:
+            rng (random.Random): Picks the change to try
+
+        Returns:
+            bool: True if the change was kept
+        """
+        student = rng.choice(self.students)
+        track = student["fields"][handler.SURVEY_TRACK_FIELD]
+        project_id = self.project_ids_by_student[id(student)]
+
+        if rng.random() < 0.5:
+            other_project_id = rng.choice(self.project_ids_by_track[track])
+            if other_project_id == project_id:
+                return False
+
+            return self._try_change([(student, project_id, other_project_id)])
+
+        other_student = rng.choice(self.students_by_track[track])
+        other_project_id = self.project_ids_by_student[id(other_student)]
+        if other_project_id == project_id:
+            return False
+
+        return self._try_change(
+            [(student, project_id, other_project_id), (other_student, other_project_id, project_id)]
+        )
+
+    def get_assignments(self) -> List[handler.AssignmentTuple]:
+        """Returns the current teams as assignments grouped by project, each scored against the rest of its team"""
+        assignments = []
+        for project in self.projects:
+            project_id = handler._get_project_id(project)
+            team = self.team_states[project_id]
+
+            for student in list(team.students):
+                assignments.append(handler.AssignmentTuple(project, student, self._get_member_score(team, student)))
+
+        return assignments
+
+    def _try_change(self, changes: list) -> bool:
+        """Makes a set of student moves between two teams, undoing them unless the plan improves
+
+        Args:
+            changes (list): (student, from project ID, to project ID) for each student moving
+
+        Returns:
+            bool: True if the changes were kept
+        """
+        project_ids = {changes[0][1], changes[0][2]}
+        previous_score = sum(self.team_scores[project_id] for project_id in project_ids)
+
+        self._move_students(changes)
+
+        new_team_scores = {project_id: self._get_team_score(project_id) for project_id in project_ids}
+        delta = sum(new_team_scores.values()) - previous_score
+
+        if delta <= 0:
+            self._move_students([(student, to_id, from_id) for student, from_id, to_id in changes])
+            return False
+
+        self.team_scores.update(new_team_scores)
+        self.score += delta
+
+        return True
+
+    def _move_students(self, changes: list):
+        for student, from_project_id, _ in changes:
+            self.team_states[from_project_id].remove(student)
+        for student, _, to_project_id in changes:
+            self.team_states[to_project_id].add(student)
+            self.project_ids_by_student[id(student)] = to_project_id
+
+    def _get_team_score(self, project_id: str) -> int:
+        """Sums the score of every team member against the rest of the team"""
+        team = self.team_states[project_id]
+
+        return sum(self._get_member_score(team, student) for student in list(team.students))
+
+    def _get_member_score(self, team: handler.TeamState, student: dict) -> int:
+        """Scores a team member against the rest of the team"""
+        return handler._get_member_score(self.projects, self.team_states, team.project, student)
@@ -0,0 +1,298 @@
+"""Vectorized team building engine.
+
+Encodes all of the surveys and projects as NumPy arrays and keeps a full
+projects x students score matrix. Scores are identical to the ones produced by
+``handler._get_score`` and assignments are made in the same order as the greedy
+engine, but each round is an argmax over the masked matrix and only the column
+of the project that changed is recomputed after an assignment.
+
+The criteria weights can be passed in as data (see ``handler.ScoringWeights``)
+rather than read from the handler's constants, so runs with different weights can
+share the same compiled surveys (see ``teambuilding.sweep``).
+"""
+# Standard library imports
+from typing import List
+
+# Third party imports
+import numpy as np
+
+# Local imports
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+
+def build_assignments(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable = None,
+    weights: handler.ScoringWeights = None,
+) -> List[handler.AssignmentTuple]:
+    """Builds teams by repeatedly making the single best scoring assignment until all students are placed
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable, optional): The compiled surveys; compiled from the students if not provided
+        weights (ScoringWeights, optional): The criteria weights; the module's weight constants if not provided
+
+    Returns:
+        List[AssignmentTuple]: The assignments, in the order they were made
+    """
+    score_matrix = ScoreMatrix(projects, students, features, weights)
+
+    assignments: List[handler.AssignmentTuple] = []
+    while score_matrix.has_unassigned_students():
+        project_index, student_index, score = score_matrix.get_best_assignment()
+
+        if project_index is None:
+            handler._report_unmatched_student(students[score_matrix.drop_last_unassigned_student()])
+        else:
+            score_matrix.assign(project_index, student_index)
+            assignments.append(handler.AssignmentTuple(projects[project_index], students[student_index], score))
+
+    return assignments
+
+
+class ScoreMatrix:
+    """Projects x students score matrix for all of the ``_get_score`` criteria.
+
+    The team size criterion depends on the track average, which changes for every
+    project whenever a student is assigned, so it is kept in its own matrix and only
+    refreshed for the students of the track that changed. Everything else only
+    depends on the members of a single team and is kept per project row.
+    """
+
+    def __init__(
+        self,
+        projects: List[dict],
+        students: List[dict],
+        features: featuresdb.StudentFeatureTable = None,
+        weights: handler.ScoringWeights = None,
+    ):
+        self.projects = projects
+        self.students = students
+
+        if features is None:
+            features = featuresdb.StudentFeatureTable(students)
+
+        if weights is None:
+            weights = handler._get_scoring_weights()
+        self.weights = weights
+
+        project_count = len(projects)
+        student_count = len(students)
+
+        # The feature table's row for each student
+        rows = np.array([features.row(student) for student in students], dtype=np.int64)
+
+        # ===============================================================================
+        # Tracks
+        # ===============================================================================
+        self.student_tracks = featuresdb._view(features.track_ids, np.int32)[rows].astype(np.int64)
+
+        # Track matching is case insensitive, the team size counts are not
+        track_matches_by_track = np.zeros((project_count, len(features.tracks) + 1), dtype=bool)
+        self.projects_requiring_track = np.zeros(len(features.tracks), dtype=np.int64)
+        for project_index, project in enumerate(projects):
+            project_tracks_upper = [track.upper() for track in project["fields"][handler.PROJECT_TRACKS_FIELD]]
+            for track_index, track in enumerate(features.tracks.values):
+                track_matches_by_track[project_index, track_index] = track.upper() in project_tracks_upper
+                self.projects_requiring_track[track_index] += track in project["fields"][handler.PROJECT_TRACKS_FIELD]
+
+        # Students without a track (-1) land on the last column, which never matches
+        self.track_matches = track_matches_by_track[:, self.student_tracks]
+
+        self.assigned_per_track = np.zeros(len(features.tracks), dtype=np.int64)
+        self.team_track_sizes = np.zeros((project_count, len(features.tracks)), dtype=np.int64)
+
+        # ===============================================================================
+        # Survey responses that are averaged across the team
+        # ===============================================================================
+        criteria = handler.AVERAGE_GOAL_CRITERIA
+        self.desired_averages = np.array([desired for _, desired, _ in criteria], dtype=np.float64)
+        self.average_weights = np.array(weights.average_goals, dtype=np.int64)
+
+        self.responses = np.stack(
+            [featuresdb._view(responses, np.float64)[rows] for responses in features.responses], axis=1
+        ).reshape(student_count, len(criteria))
+        self.responded = np.stack(
+            [featuresdb._view(responded, np.uint8)[rows].astype(bool) for responded in features.responded], axis=1
+        ).reshape(student_count, len(criteria))
+
+        self.response_sums = np.zeros((project_count, len(criteria)), dtype=np.float64)
+        self.response_counts = np.zeros((project_count, len(criteria)), dtype=np.int64)
+
+        # ===============================================================================
+        # Genders and ethnicities
+        # ===============================================================================
+        self.student_genders = featuresdb._view(features.gender_ids, np.int32)[rows].astype(np.int64)
+        self.team_gender_counts = np.zeros((project_count, max(len(features.genders), 1)), dtype=np.int64)
+
+        self.student_ethnicity_ids = [features.get_ethnicity_ids(row).tolist() for row in rows]
+        self.student_ethnicities = np.zeros((student_count, max(len(features.ethnicities), 1)), dtype=bool)
+        for student_index, ethnicity_ids in enumerate(self.student_ethnicity_ids):
+            self.student_ethnicities[student_index, ethnicity_ids] = True
+        self.team_ethnicity_counts = np.zeros((project_count, max(len(features.ethnicities), 1)), dtype=np.int64)
+
+        # ===============================================================================
+        # Incompatibilities, kept as a projects x students conflict mask that is updated
+        # as students join a team
+        # ===============================================================================
+        self.incompatibilities = features.incompatibilities
+        self.rows = rows
+        self.student_indexes_by_row = {row: student_index for student_index, row in enumerate(rows.tolist())}
+
+        self.conflicts = np.zeros((project_count, student_count), dtype=bool)
+
+        # ===============================================================================
+        # Scores
+        # ===============================================================================
+        self.unassigned = np.ones(student_count, dtype=bool)
+
+        self.team_scores = np.zeros((project_count, student_count), dtype=np.int64)
+        for project_index in range(project_count):
+            self.team_scores[project_index] = self._calculate_team_scores(project_index)
+
+        self.team_size_scores = np.zeros((project_count, student_count), dtype=np.int64)
+        self._refresh_team_size_scores(np.ones(student_count, dtype=bool))
+
+    def has_unassigned_students(self) -> bool:
+        return bool(self.unassigned.any())
+
+    def get_best_assignment(self):
+        """Finds the highest scoring project/student pair, preferring the last pair on ties like the greedy engine
+
+        Returns:
+            tuple: (project index, student index, score); the indexes are None if no acceptable assignment exists
+        """
+        scores = np.where(
+            self.track_matches & self.unassigned[np.newaxis, :],
+            self.team_scores + self.team_size_scores,
+            handler.BAD_FIT_SCORE,
+        ).ravel()
+
+        highscore = scores.max() if scores.size else handler.BAD_FIT_SCORE
+
+        # Don't assign a student to team if the score is really low
+        if highscore <= handler.MIN_ASSIGNMENT_SCORE:
+            return None, None, None
+
+        # The greedy engine scans projects, then students, and keeps the last of the
+        # highest scoring pairs
+        flat_index = scores.size - 1 - int(np.argmax(scores[::-1] == highscore))
+        project_index, student_index = divmod(flat_index, len(self.students))
+
+        return project_index, student_index, int(highscore)
+
+    def drop_last_unassigned_student(self) -> int:
+        """Gives up on the last unassigned student, mirroring the greedy engine
+
+        Returns:
+            int: The index of the student that was dropped
+        """
+        student_index = int(np.flatnonzero(self.unassigned)[-1])
+        self.unassigned[student_index] = False
+
+        return student_index
+
+    def assign(self, project_index: int, student_index: int):
+        """Assigns a student to a project and refreshes the scores that changed
+
+        Args:
+            project_index (int): Index of the project
+            student_index (int): Index of the student
+        """
+        self.unassigned[student_index] = False
+
+        track_index = self.student_tracks[student_index]
+        self.assigned_per_track[track_index] += 1
+        self.team_track_sizes[project_index, track_index] += 1
+
+        self.response_sums[project_index] += np.where(self.responded[student_index], self.responses[student_index], 0)
+        self.response_counts[project_index] += self.responded[student_index]
+
+        if self.student_genders[student_index] >= 0:
+            self.team_gender_counts[project_index, self.student_genders[student_index]] += 1
+
+        for ethnicity_index in self.student_ethnicity_ids[student_index]:
+            self.team_ethnicity_counts[project_index, ethnicity_index] += 1
+
+        # Students incompatible with the new member now conflict with the team
+        incompatible_students = [
+            self.student_indexes_by_row[row]
+            for row in self.incompatibilities.get_incompatible_rows(self.rows[student_index])
+            if row in self.student_indexes_by_row
+        ]
+        self.conflicts[project_index, incompatible_students] = True
+
+        self.team_scores[project_index] = self._calculate_team_scores(project_index)
+        self._refresh_team_size_scores(self.student_tracks == track_index)
+
+    def _refresh_team_size_scores(self, student_mask: np.ndarray):
+        """Recalculates the team size score of every project for the selected students"""
+        student_indexes = np.flatnonzero(student_mask)
+        student_tracks = self.student_tracks[student_indexes]
+
+        # Students without a track (-1) aren't on any track's teams, so have no team size score
+        has_track = student_tracks >= 0
+        self.team_size_scores[:, student_indexes[~has_track]] = 0
+        student_indexes = student_indexes[has_track]
+        student_tracks = student_tracks[has_track]
+
+        average_team_sizes = self.assigned_per_track[student_tracks] / np.maximum(
+            self.projects_requiring_track[student_tracks], 1
+        )
+        team_member_counts = self.team_track_sizes[:, student_tracks]
+
+        team_size_scores = np.ceil(self.weights.team_size * (average_team_sizes[np.newaxis, :] - team_member_counts))
+
+        self.team_size_scores[:, student_indexes] = team_size_scores
+
+    def _calculate_team_scores(self, project_index: int) -> np.ndarray:
+        """Calculates every criterion except team size for all students against one project
+
+        Args:
+            project_index (int): Index of the project
+
+        Returns:
+            np.ndarray: The scores, one per student
+        """
+        # Compatibility
+        scores = np.where(self.conflicts[project_index], handler.BAD_FIT_SCORE, 0)
+
+        # Ethnic diversity: the best score of any of the student's ethnicities
+        ethnicity_counts = self.team_ethnicity_counts[project_index]
+        ethnicity_scores = np.select(
+            [ethnicity_counts == 0, ethnicity_counts == 1],
+            [self.weights.ethnicity, self.weights.ethnicity * 2],
+            0,
+        )
+        scores = scores + np.max(np.where(self.student_ethnicities, ethnicity_scores, 0), axis=1)
+
+        # Gender diversity
+        has_gender = self.student_genders >= 0
+        gender_counts = self.team_gender_counts[project_index, np.where(has_gender, self.student_genders, 0)]
+        scores = scores + np.select(
+            [has_gender & (gender_counts == 0), has_gender & (gender_counts == 1)],
+            [self.weights.gender, self.weights.gender * 2],
+            0,
+        )
+
+        # Average goals: if there are no responses yet, the desired average is the average
+        response_counts = self.response_counts[project_index]
+        team_averages = np.where(
+            response_counts == 0,
+            self.desired_averages,
+            self.response_sums[project_index] / np.maximum(response_counts, 1),
+        )
+        above_goal = team_averages > self.desired_averages
+        below_goal = team_averages < self.desired_averages
+        pulls_up = self.responses > team_averages
+        pulls_down = self.responses < team_averages
+
+        helps = (above_goal & pulls_down) | (below_goal & pulls_up)
+        hurts = (above_goal & pulls_up) | (below_goal & pulls_down)
+        average_scores = np.where(helps, self.average_weights, np.where(hurts, -self.average_weights, 0))
+        scores = scores + np.sum(np.where(self.responded, average_scores, 0), axis=1)
+
+        return scores.astype(np.int64)
@@ -0,0 +1,155 @@
+"""Randomized multi-start team building engine.
+
+The greedy engine's teams depend on the order of the surveys, which is why
+build_teams sorts them before building. This engine runs the greedy engine on a
+number of seeded orderings at once, across a process pool, scores each complete
+plan with ``handler._get_plan_score`` and keeps the best one.
+
+Start 0 always uses the surveys in the order they were given, so the result is
+never worse than the greedy engine on its own. Lambda doesn't support the shared
+memory a process pool needs, so the starts run one after the other when a pool
+can't be created.
+"""
+# Standard library imports
+import concurrent.futures
+import os
+import random
+import time
+from typing import List, Optional, Tuple
+
+# Local imports
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+# The greedy engine's choices for one start: (project index, student index, score) for each assignment
+StartResult = Tuple[int, int, List[Tuple[int, int, int]]]
+
+
+def build_assignments(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable = None,
+    starts: int = None,
+    time_budget: float = handler.BUILD_OPTION_DEFAULTS["time_budget"],
+) -> List[handler.AssignmentTuple]:
+    """Runs the greedy engine on several orderings of the students and keeps the best plan
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable, optional): The compiled surveys; only used by starts run in this process
+        starts (int, optional): The number of orderings to try; defaults to the number of cores
+        time_budget (float, optional): Wall-clock seconds to wait for the starts; the first start is always used
+
+    Returns:
+        List[AssignmentTuple]: The assignments of the best scoring start
+    """
+    if not starts:
+        starts = os.cpu_count() or 1
+
+    deadline = time.monotonic() + time_budget
+
+    try:
+        results = _run_starts_in_pool(projects, students, starts, deadline)
+    except (OSError, NotImplementedError, ImportError) as error:
+        print("Unable to create a process pool, running the starts one at a time: {}".format(error))
+        results = _run_starts(projects, students, features, starts, deadline)
+
+    # Highest score wins; ties go to the lowest seed so runs are reproducible
+    seed, score, choices = max(results, key=lambda result: (result[1], -result[0]))
+
+    print("Multi-start plan score: {} (seed {} of {} starts)".format(score, seed, len(results)))
+
+    return [
+        handler.AssignmentTuple(projects[project_index], students[student_index], assignment_score)
+        for project_index, student_index, assignment_score in choices
+    ]
+
+
+def _run_starts_in_pool(projects: List[dict], students: List[dict], starts: int, deadline: float) -> List[StartResult]:
+    """Runs the starts across a process pool sized to the available cores
+
+    The pool is always shut down waiting for its workers, as abandoning a live pool leaves
+    Python 3.8 hanging at exit. Starts past the deadline are cancelled if they haven't been
+    handed to a worker, and return straight away if they have, so the wait is for the starts
+    still running at most.
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(starts, os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(_run_start, projects, students, None, seed, deadline) for seed in range(starts)]
+        try:
+            # Starts that haven't finished by the deadline are dropped, but the first one is always waited for
+            concurrent.futures.wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            futures[0].result()
+
+            results = [future.result() for future in futures if future.done() and not future.cancelled()]
+        finally:
+            # shutdown() only takes cancel_futures on Python 3.9+
+            for future in futures:
+                future.cancel()
+
+    return [result for result in results if result is not None]
+
+
+def _run_starts(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable,
+    starts: int,
+    deadline: float,
+) -> List[StartResult]:
+    """Runs the starts one after the other in this process, stopping at the deadline after the first"""
+    results = []
+    for seed in range(starts):
+        if seed > 0 and time.monotonic() >= deadline:
+            break
+
+        results.append(_run_start(projects, students, features, seed))
+
+    return results
+
+
+def _run_start(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable,
+    seed: int,
+    deadline: float = None,
+) -> Optional[StartResult]:
+    """Runs the greedy engine on one seeded ordering of the students and scores the plan
+
+    The result refers to projects and students by index, as the records are copies when
+    run in another process.
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign, in priority order
+        features (StudentFeatureTable): The compiled surveys, or None to compile them
+        seed (int): 0 keeps the students in the given order; other seeds shuffle them
+        deadline (float, optional): The time.monotonic() after which starts other than the first are skipped
+
+    Returns:
+        StartResult: The seed, the plan score and the assignments made, or None if skipped
+    """
+    if seed and deadline is not None and time.monotonic() >= deadline:
+        return None
+
+    if features is None:
+        features = featuresdb.StudentFeatureTable(students)
+
+    ordering = list(range(len(students)))
+    if seed:
+        random.Random(seed).shuffle(ordering)
+
+    assignments = handler._build_assignments_greedy(
+        projects, [students[student_index] for student_index in ordering], features
+    )
+    score = handler._get_plan_score(projects, students, assignments, features)
+
+    project_indexes = {id(project): project_index for project_index, project in enumerate(projects)}
+    student_indexes = {id(student): student_index for student_index, student in enumerate(students)}
+    choices = [
+        (project_indexes[id(assignment.project)], student_indexes[id(assignment.student)], assignment.score)
+        for assignment in assignments
+    ]
+
+    return seed, score, choices
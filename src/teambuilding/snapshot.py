@@ -0,0 +1,216 @@
+"""Offline snapshots of a cohort, and plans written to files.
+
+A snapshot holds the surveys and projects for a cohort as JSON lines, gzipped
+when the file name ends in .gz. build_teams can read a snapshot instead of
+Airtable, and then writes the plan, with a breakdown of every student's score, to
+a file instead of Airtable, so weights and engine settings can be tried against
+real data without touching the network.
+
+Capture a snapshot, then build teams from it, from the src directory:
+
+    python -m teambuilding.snapshot capture PT15 pt15.jsonl.gz
+    python -m teambuilding.snapshot plan pt15.jsonl.gz --engine solver --time-budget 30
+"""
+# Standard library imports
+import argparse
+from collections import namedtuple
+import datetime
+import gzip
+import json
+from typing import List
+
+# Local imports
+from labsdao import people as peopledao
+from labsdao import projects as projectsdao
+from teambuilding import evaluate
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+Snapshot = namedtuple("Snapshot", ["cohort", "surveys", "projects"])
+
+
+def capture_snapshot(cohort: str, path: str):
+    """Reads a cohort's surveys and active projects from Airtable and saves them as a snapshot
+
+    Args:
+        cohort (str): The cohort ID
+        path (str): The snapshot file
+    """
+    surveys = peopledao.get_all_student_surveys(cohort)
+    projects = projectsdao.get_all_active_projects(cohort)
+
+    save_snapshot(path, Snapshot(cohort, surveys, projects))
+
+    print("Saved {} surveys and {} projects for {} to {}".format(len(surveys), len(projects), cohort, path))
+
+
+def save_snapshot(path: str, snapshot: Snapshot):
+    """Writes a snapshot: a header line, then one line per survey and per project
+
+    Args:
+        path (str): The snapshot file; gzipped if it ends in .gz
+        snapshot (Snapshot): The cohort, surveys and projects
+    """
+    with _open(path, "wt") as snapshot_file:
+        captured = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        _write_line(snapshot_file, {"type": "header", "cohort": snapshot.cohort, "captured": captured})
+
+        for survey in snapshot.surveys:
+            _write_line(snapshot_file, {"type": "survey", "record": survey})
+        for project in snapshot.projects:
+            _write_line(snapshot_file, {"type": "project", "record": project})
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """Reads a snapshot written by save_snapshot
+
+    Args:
+        path (str): The snapshot file; gzipped if it ends in .gz
+
+    Returns:
+        Snapshot: The cohort, surveys and projects
+    """
+    cohort = None
+    surveys = []
+    projects = []
+
+    with _open(path, "rt") as snapshot_file:
+        for line in snapshot_file:
+            if not line.strip():
+                continue
+
+            entry = json.loads(line)
+            if entry["type"] == "header":
+                cohort = entry["cohort"]
+            elif entry["type"] == "survey":
+                surveys.append(entry["record"])
+            elif entry["type"] == "project":
+                projects.append(entry["record"])
+            else:
+                raise ValueError("Unknown snapshot entry type: {}".format(entry["type"]))
+
+    return Snapshot(cohort, surveys, projects)
+
+
+def save_plan(
+    path: str,
+    options: dict,
+    projects: List[dict],
+    students: List[dict],
+    assignments: List[handler.AssignmentTuple],
+    features: featuresdb.StudentFeatureTable = None,
+):
+    """Writes a plan: a summary line, one line per team with its evaluation, then one line per assignment
+    with the breakdown of its score
+
+    Each student is scored against the rest of their team, criterion by criterion, so
+    the breakdowns add up to the plan score. The teams are evaluated by
+    evaluate.evaluate_plan, and their scores add up to the plan score too.
+
+    Args:
+        path (str): The plan file; gzipped if it ends in .gz
+        options (dict): The build options the plan was made with
+        projects (List[dict]): All of the projects
+        students (List[dict]): All of the students, assigned or not
+        assignments (List[AssignmentTuple]): The assignments
+        features (StudentFeatureTable, optional): The compiled surveys
+    """
+    team_states = handler._build_team_states(projects, assignments, features)
+    evaluation = evaluate.evaluate_plan(projects, students, assignments, team_states.features)
+
+    with _open(path, "wt") as plan_file:
+        _write_line(
+            plan_file,
+            {
+                "type": "summary",
+                "options": options,
+                "students": len(students),
+                "assigned": len(assignments),
+                "plan_score": evaluation.score,
+                "unassigned": evaluation.unassigned,
+            },
+        )
+
+        for team in evaluation.teams:
+            _write_line(plan_file, dict(evaluate.get_team_summary(team), type="team"))
+
+        for assignment in assignments:
+            breakdown = handler._get_member_score_breakdown(
+                projects, team_states, assignment.project, assignment.student
+            )
+
+            _write_line(
+                plan_file,
+                {
+                    "type": "assignment",
+                    "project_id": assignment.project["id"],
+                    "project_name": assignment.project["fields"].get(handler.PROJECT_NAME_FIELD),
+                    "student_id": assignment.student.get("id"),
+                    "student_name": assignment.student["fields"].get(handler.SURVEY_STUDENT_NAME_FIELD),
+                    "track": assignment.student["fields"].get(handler.SURVEY_TRACK_FIELD),
+                    "score": sum(breakdown.values()),
+                    "breakdown": breakdown,
+                },
+            )
+
+    print("Saved the plan for {} of {} students to {}".format(len(assignments), len(students), path))
+
+
+def get_plan_path(snapshot_path: str) -> str:
+    """Returns the default plan file for a snapshot, next to it"""
+    for suffix in (".jsonl.gz", ".jsonl", ".gz"):
+        if snapshot_path.endswith(suffix):
+            return snapshot_path[: -len(suffix)] + ".plan.jsonl"
+
+    return snapshot_path + ".plan.jsonl"
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+def _write_line(output_file, entry: dict):
+    output_file.write(json.dumps(entry))
+    output_file.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture cohort snapshots and build teams from them offline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = commands.add_parser("capture", help="save a cohort's surveys and projects from Airtable")
+    capture_parser.add_argument("cohort", help="the cohort ID")
+    capture_parser.add_argument("snapshot", help="the snapshot file to write, gzipped if it ends in .gz")
+
+    plan_parser = commands.add_parser("plan", help="build teams from a snapshot and write the plan to a file")
+    plan_parser.add_argument("snapshot", help="the snapshot file to read")
+    plan_parser.add_argument("--output", default=None, help="the plan file; defaults to next to the snapshot")
+    plan_parser.add_argument("--options", default="{}", help="any other build options, as JSON")
+    plan_parser.add_argument("--engine", default=handler.BUILD_OPTION_DEFAULTS["engine"])
+    plan_parser.add_argument("--time-budget", type=float, default=handler.BUILD_OPTION_DEFAULTS["time_budget"])
+    plan_parser.add_argument("--local-search", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        capture_snapshot(args.cohort, args.snapshot)
+    else:
+        event = json.loads(args.options)
+        event.update(
+            {
+                "snapshot": args.snapshot,
+                "plan_output": args.output,
+                "engine": args.engine,
+                "time_budget": args.time_budget,
+                "local_search": args.local_search or event.get("local_search", False),
+            }
+        )
+
+        handler.build_teams(event, None)
+
+
+if __name__ == "__main__":
+    main()
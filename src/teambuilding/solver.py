@@ -0,0 +1,291 @@
+"""Assignment problem based team building engine.
+
+The greedy engine makes the best single assignment it can each round and never
+revisits a decision, so its teams depend on the order the surveys are in. This
+engine starts from the greedy teams and improves them by solving a series of
+linear assignment problems with SciPy.
+
+Each round picks a track and takes one student of that track off every team
+working on it, along with any of the track's students nobody could place. Every
+team keeps all of its other members, so the score of putting one of those
+students back on a team is known: the same ``_get_score`` criteria the greedy
+engine uses, against the rest of the team, with the team size criterion taken at
+the size the team would be. The students are then put back by solving the
+assignment problem of students to open seats, which respects the hard constraints
+by construction:
+
+* students only get seats on projects needing their track,
+* seats the greedy engine wouldn't assign, those scoring MIN_ASSIGNMENT_SCORE or
+  lower such as on a team with an incompatible member, are excluded; a student
+  with no other seat is left unplaced instead,
+* each team's number of the track's students stays within the team size bounds,
+  TEAM_SIZE_SLACK either side of the track's students per project needing the
+  track: no seat takes a team past the upper bound, and the seats below the lower
+  bound are filled before any student is left unplaced or seated elsewhere.
+
+Every other round, teams can take back more students than they gave, so seats
+move between teams and teams the greedy engine left too large or too small are
+brought within the bounds. The score of a seat then also counts the track's
+students already on the team scoring TEAM_SIZE_WEIGHT less, but not how the
+students put back on the same team fit with each other, so those rounds are
+approximate. The rounds in between keep the team sizes, giving each team one seat
+back, where the scores are exact.
+
+The round is kept if the plan as a whole scores better by ``handler._get_plan_score``,
+the objective every engine is judged by. Rounds continue until the wall-clock budget
+runs out, or until a number of rounds in a row find nothing better, and the best plan
+found is returned.
+"""
+# Standard library imports
+import random
+import time
+from typing import Dict, List, Tuple
+
+# Third party imports
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+# Local imports
+from teambuilding import features as featuresdb
+from teambuilding import handler
+
+# A student that isn't placed on any team
+UNASSIGNED = -1
+
+# Stop early once this many rounds in a row haven't found a better plan
+MAX_ROUNDS_WITHOUT_IMPROVEMENT = 200
+
+# How many students of a track a team may be off the track's average by, beyond rounding it up or down
+TEAM_SIZE_SLACK = 1
+
+
+def build_assignments(
+    projects: List[dict],
+    students: List[dict],
+    features: featuresdb.StudentFeatureTable = None,
+    time_budget: float = handler.BUILD_OPTION_DEFAULTS["time_budget"],
+    seed: int = 0,
+) -> List[handler.AssignmentTuple]:
+    """Builds the best teams it can find within the time budget
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students to assign
+        features (StudentFeatureTable, optional): The compiled surveys; compiled from the students if not provided
+        time_budget (float, optional): Wall-clock seconds to spend improving on the greedy teams
+        seed (int, optional): Seed for picking the students taken off each team, so runs are reproducible
+
+    Returns:
+        List[AssignmentTuple]: The assignments of the best plan found, scored against the rest of their team
+    """
+    deadline = time.monotonic() + time_budget
+
+    if features is None:
+        features = featuresdb.StudentFeatureTable(students)
+
+    # The greedy teams are the starting point, so the solver never does worse than greedy
+    greedy_assignments = handler._build_assignments_greedy(projects, students, features)
+    plan = _get_plan_from_assignments(projects, students, greedy_assignments)
+
+    best_plan = plan
+    best_score = greedy_score = _get_plan_score(projects, students, plan, features)
+
+    # The students of each track, and the projects they can be placed on
+    student_indexes_by_track: Dict[str, List[int]] = {}
+    for student_index, student in enumerate(students):
+        track = student["fields"].get(handler.SURVEY_TRACK_FIELD, None)
+        student_indexes_by_track.setdefault(track, []).append(student_index)
+
+    track_groups = []
+    for track, student_indexes in student_indexes_by_track.items():
+        project_indexes = [
+            project_index
+            for project_index, project in enumerate(projects)
+            if handler._is_track_match(project, students[student_indexes[0]])
+        ]
+        if project_indexes:
+            track_groups.append((student_indexes, project_indexes))
+
+    rng = random.Random(seed)
+    rounds = rounds_without_improvement = 0
+    while track_groups and time.monotonic() < deadline and rounds_without_improvement < MAX_ROUNDS_WITHOUT_IMPROVEMENT:
+        student_indexes, project_indexes = rng.choice(track_groups)
+
+        # Every other round keeps the team sizes, where putting the students back is scored exactly
+        plan = _reseat_students(
+            projects, students, best_plan, features, student_indexes, project_indexes, rng, rounds % 2 == 1
+        )
+        rounds += 1
+        score = _get_plan_score(projects, students, plan, features)
+
+        if score > best_score:
+            best_plan, best_score = plan, score
+            rounds_without_improvement = 0
+        else:
+            rounds_without_improvement += 1
+
+    print("Solver plan score: {} (greedy: {})".format(best_score, greedy_score))
+
+    return _get_assignments_from_plan(projects, students, best_plan, features)
+
+
+def _get_plan_score(
+    projects: List[dict], students: List[dict], plan: List[int], features: featuresdb.StudentFeatureTable
+) -> int:
+    """Scores a plan with ``handler._get_plan_score``"""
+    assignments = [
+        handler.AssignmentTuple(projects[project_index], student, None)
+        for student, project_index in zip(students, plan)
+        if project_index != UNASSIGNED
+    ]
+
+    return handler._get_plan_score(projects, students, assignments, features)
+
+
+def _reseat_students(
+    projects: List[dict],
+    students: List[dict],
+    plan: List[int],
+    features: featuresdb.StudentFeatureTable,
+    student_indexes: List[int],
+    project_indexes: List[int],
+    rng: random.Random,
+    resize: bool = True,
+) -> List[int]:
+    """Takes one of the track's students off each of the track's teams and optimally puts them back, within the
+    team size bounds
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The students
+        plan (List[int]): The index of the project each student is placed on, or UNASSIGNED
+        features (StudentFeatureTable): The compiled surveys
+        student_indexes (List[int]): The students on the track
+        project_indexes (List[int]): The projects the track's students can be placed on
+        rng (random.Random): Picks the student taken off each team
+        resize (bool, optional): Whether a team can take back more students than it gave, within the bounds
+
+    Returns:
+        List[int]: The new plan
+    """
+    plan = list(plan)
+
+    # The track's students on each team, and the ones that weren't placed at all
+    members_by_project: Dict[int, List[int]] = {project_index: [] for project_index in project_indexes}
+    reseated_student_indexes = []
+    for student_index in student_indexes:
+        if plan[student_index] == UNASSIGNED:
+            reseated_student_indexes.append(student_index)
+        elif plan[student_index] in members_by_project:
+            members_by_project[plan[student_index]].append(student_index)
+
+    for members in members_by_project.values():
+        if members:
+            reseated_student_indexes.append(rng.choice(members))
+
+    for student_index in reseated_student_indexes:
+        plan[student_index] = UNASSIGNED
+
+    team_states = _get_team_states(projects, students, plan, features)
+    track_id = features.track_ids[features.row(students[student_indexes[0]])]
+    average_team_size = team_states.get_average_team_size(track_id)
+    min_team_size, max_team_size = _get_team_size_bounds(len(student_indexes), len(project_indexes))
+
+    # A column per open seat, holding the size of the team before the seat is filled: every seat up to the upper
+    # bound when resizing, otherwise the one seat vacated. Then a column per student for leaving them unplaced,
+    # which costs more than any seat
+    seats_by_project: Dict[int, List[Tuple[int, int]]] = {}
+    number_of_seats = 0
+    for project_index in project_indexes:
+        team_size = team_states[handler._get_project_id(projects[project_index])].track_sizes[track_id]
+        sizes = range(team_size, max_team_size if resize else min(team_size + 1, max_team_size))
+        seats_by_project[project_index] = list(zip(range(number_of_seats, number_of_seats + len(sizes)), sizes))
+        number_of_seats += len(sizes)
+
+    # Seats the greedy engine wouldn't assign can't be used at all
+    costs = np.full((len(reseated_student_indexes), number_of_seats + len(reseated_student_indexes)), np.inf)
+    for row, student_index in enumerate(reseated_student_indexes):
+        for project_index, seats in seats_by_project.items():
+            if not seats:
+                continue
+
+            project = projects[project_index]
+            team_size = team_states[handler._get_project_id(project)].track_sizes[track_id]
+
+            # Scored at the team's current size, then at the size of each open seat instead
+            fit_score = handler._get_score(projects, [], project, students[student_index], team_states)
+            fit_score -= handler._get_team_size_score(average_team_size, team_size)
+
+            for column, size in seats:
+                score = fit_score + handler._get_team_size_score(average_team_size, size)
+                if score <= handler.MIN_ASSIGNMENT_SCORE:
+                    continue
+
+                # The track's students already on the team each score TEAM_SIZE_WEIGHT less for every seat filled
+                # past the first
+                score -= handler.TEAM_SIZE_WEIGHT * (size - team_size)
+
+                # Seats below the lower bound are worth more than leaving a student unplaced or seating them elsewhere
+                costs[row, column] = -score + (handler.BAD_FIT_SCORE if size < min_team_size else 0)
+
+        costs[row, number_of_seats + row] = -handler.BAD_FIT_SCORE
+
+    # Any students left over stay unplaced
+    seat_projects = [project_index for project_index, seats in seats_by_project.items() for _ in seats]
+    rows, columns = linear_sum_assignment(costs)
+    for row, column in zip(rows, columns):
+        if column < number_of_seats:
+            plan[reseated_student_indexes[row]] = seat_projects[column]
+
+    return plan
+
+
+def _get_team_size_bounds(number_of_students: int, number_of_projects: int) -> Tuple[int, int]:
+    """Returns the fewest and most students of a track a team may have, TEAM_SIZE_SLACK either side of the average"""
+    min_team_size = max(number_of_students // number_of_projects - TEAM_SIZE_SLACK, 0)
+    max_team_size = -(-number_of_students // number_of_projects) + TEAM_SIZE_SLACK
+
+    return min_team_size, max_team_size
+
+
+def _get_team_states(
+    projects: List[dict], students: List[dict], plan: List[int], features: featuresdb.StudentFeatureTable
+) -> handler.TeamStates:
+    """Builds the state of every team in a plan"""
+    team_states = handler._build_team_states(projects, [], features)
+
+    for student, project_index in zip(students, plan):
+        if project_index != UNASSIGNED:
+            team_states[handler._get_project_id(projects[project_index])].add(student)
+
+    return team_states
+
+
+def _get_plan_from_assignments(
+    projects: List[dict], students: List[dict], assignments: List[handler.AssignmentTuple]
+) -> List[int]:
+    """Converts a list of assignments into the project index of each student"""
+    project_indexes = {id(project): project_index for project_index, project in enumerate(projects)}
+    student_indexes = {id(student): student_index for student_index, student in enumerate(students)}
+
+    plan = [UNASSIGNED] * len(students)
+    for assignment in assignments:
+        plan[student_indexes[id(assignment.student)]] = project_indexes[id(assignment.project)]
+
+    return plan
+
+
+def _get_assignments_from_plan(
+    projects: List[dict], students: List[dict], plan: List[int], features: featuresdb.StudentFeatureTable
+) -> List[handler.AssignmentTuple]:
+    """Converts a plan into assignments, grouped by project, each scored against the rest of its team"""
+    team_states = _get_team_states(projects, students, plan, features)
+
+    assignments = []
+    for project_index, project in enumerate(projects):
+        for student_index, student in enumerate(students):
+            if plan[student_index] == project_index:
+                score = handler._get_member_score(projects, team_states, project, student)
+                assignments.append(handler.AssignmentTuple(project, student, score))
+
+    return assignments
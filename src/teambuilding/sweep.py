@@ -0,0 +1,249 @@
+"""Weight sweeps: build one cohort's teams with many sets of criteria weights.
+
+The criteria weights are constants in the handler, so trying new values means
+editing them and doing a full run. A sweep takes a grid, or a random sample, of
+weights to override by the name of their constant, and builds the teams of a
+cohort snapshot (see teambuilding.snapshot) with the matrix engine once for each,
+across a process pool. The engine takes the weights as data, so each worker
+compiles the surveys once and shares them between all of the runs it makes.
+
+Sweeps are matrix-only. The greedy, solver, multistart and local search engines
+read the weight constants from the handler, so they can't be run with a sweep's
+weights; a promising set of weights has to be tried on them by editing the
+constants and building the snapshot's teams with each engine offline.
+
+Every plan is judged by the whole-plan objective of ``evaluate.evaluate_plan``
+with the default weights, so plans built with different weights are compared on
+the same scale, along with the unweighted parts of the objective.
+
+Run from the src directory:
+
+    python -m teambuilding.sweep pt15.jsonl.gz --grid '{"TEAM_SIZE_WEIGHT": [100, 200, 400]}'
+    python -m teambuilding.sweep pt15.jsonl.gz --samples 20 --ranges '{"SURVEY_GENDER_BASE_WEIGHT": [250, 1000]}'
+"""
+# Standard library imports
+import argparse
+from collections import namedtuple
+import concurrent.futures
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import random
+import time
+from typing import Dict, List, Tuple
+
+# Local imports
+from teambuilding import evaluate
+from teambuilding import features as featuresdb
+from teambuilding import handler
+from teambuilding import matrix
+from teambuilding import snapshot
+
+SweepResult = namedtuple(
+    "SweepResult",
+    [
+        "overrides",
+        "objective",
+        "assigned",
+        "unassigned",
+        "conflicts",
+        "size_deviation",
+        "average_deviation",
+        "gender_pairs",
+        "ethnicity_pairs",
+        "seconds",
+    ],
+)
+
+# The cohort the runs in this process build teams for, set once per worker
+_cohort = None
+
+
+def get_grid(grid: Dict[str, List[int]]) -> List[Dict[str, int]]:
+    """Returns every combination of the values to try for each weight
+
+    Args:
+        grid (Dict[str, List[int]]): The values to try, by the name of the weight constant
+
+    Returns:
+        List[Dict[str, int]]: The weight overrides of each run
+    """
+    names = list(grid)
+
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def get_random_sample(ranges: Dict[str, Tuple[int, int]], samples: int, seed: int = 0) -> List[Dict[str, int]]:
+    """Returns weights drawn uniformly from a range for each weight
+
+    Args:
+        ranges (Dict[str, Tuple[int, int]]): The lowest and highest value, by the name of the weight constant
+        samples (int): The number of runs
+        seed (int, optional): Seed for the sample, so sweeps can be repeated
+
+    Returns:
+        List[Dict[str, int]]: The weight overrides of each run
+    """
+    generator = random.Random(seed)
+
+    return [{name: generator.randint(low, high) for name, (low, high) in ranges.items()} for _ in range(samples)]
+
+
+def run_sweep(
+    projects: List[dict], students: List[dict], configurations: List[Dict[str, int]], processes: int = None
+) -> List[SweepResult]:
+    """Builds the teams with the matrix engine once for each set of weights, across a process pool
+
+    Args:
+        projects (List[dict]): All of the projects
+        students (List[dict]): The student surveys
+        configurations (List[Dict[str, int]]): The weight overrides of each run, by the name of the weight constant
+        processes (int, optional): The size of the pool; defaults to the number of cores
+
+    Returns:
+        List[SweepResult]: The result of each run, in the order of the configurations
+
+    Raises:
+        ValueError: If a configuration overrides a weight that doesn't exist
+    """
+    # Checked up front, rather than failing in a worker part way through the sweep
+    for overrides in configurations:
+        handler._get_scoring_weights(overrides)
+
+    students = list(students)
+    handler._sort_surveys(students)
+
+    try:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count() or 1, initializer=_set_cohort, initargs=(projects, students)
+        )
+    except (OSError, NotImplementedError, ImportError) as error:
+        print("Unable to create a process pool, running the sweep in this process: {}".format(error))
+        _set_cohort(projects, students)
+        return [_run_configuration(overrides) for overrides in configurations]
+
+    with executor:
+        return list(executor.map(_run_configuration, configurations))
+
+
+def print_results(results: List[SweepResult]):
+    """Prints a table of the results, best objective first"""
+    names = sorted({name for result in results for name in result.overrides})
+
+    TABLE_FORMAT_STRING = " ".join(
+        ["{:>30}"] * len(names) + ["{:>12} {:>8} {:>10} {:>9} {:>9} {:>9} {:>7} {:>7} {:>8}"]
+    )
+    print(
+        TABLE_FORMAT_STRING.format(
+            *names,
+            "Objective",
+            "Assigned",
+            "Unassigned",
+            "Conflicts",
+            "Size dev",
+            "Avg dev",
+            "Gender",
+            "Ethn.",
+            "Seconds",
+        )
+    )
+    print("=" * (31 * len(names) + 89))
+
+    for result in sorted(results, key=lambda result: result.objective, reverse=True):
+        print(
+            TABLE_FORMAT_STRING.format(
+                *(result.overrides.get(name, "-") for name in names),
+                "{:.0f}".format(result.objective),
+                result.assigned,
+                result.unassigned,
+                result.conflicts,
+                "{:.1f}".format(result.size_deviation),
+                "{:.2f}".format(result.average_deviation),
+                result.gender_pairs,
+                result.ethnicity_pairs,
+                "{:.2f}".format(result.seconds),
+            )
+        )
+
+
+def write_results(path: str, results: List[SweepResult]):
+    """Writes the results to a CSV file, with a column for each weight that was overridden"""
+    names = sorted({name for result in results for name in result.overrides})
+    columns = [column for column in SweepResult._fields if column != "overrides"]
+
+    with open(path, "w", newline="", encoding="utf-8") as results_file:
+        writer = csv.writer(results_file)
+        writer.writerow(names + columns)
+        for result in results:
+            writer.writerow(
+                [result.overrides.get(name, "") for name in names] + [getattr(result, column) for column in columns]
+            )
+
+
+def _set_cohort(projects: List[dict], students: List[dict]):
+    """Compiles the surveys for the runs made in this process"""
+    global _cohort
+    _cohort = (projects, students, featuresdb.StudentFeatureTable(students))
+
+
+def _run_configuration(overrides: Dict[str, int]) -> SweepResult:
+    """Builds the teams of the cohort set for this process with one set of weights, and evaluates the plan"""
+    projects, students, features = _cohort
+    weights = handler._get_scoring_weights(overrides)
+
+    started = time.perf_counter()
+    # Students that can't be placed are reported by the engine; that's counted instead
+    with contextlib.redirect_stdout(io.StringIO()):
+        assignments = matrix.build_assignments(projects, students, features, weights)
+    seconds = time.perf_counter() - started
+
+    evaluation = evaluate.evaluate_plan(projects, students, assignments, features)
+    number_of_averages = sum(len(team.average_deviations) for team in evaluation.teams)
+
+    return SweepResult(
+        overrides,
+        evaluation.score,
+        len(assignments),
+        evaluation.unassigned,
+        sum(team.conflicts for team in evaluation.teams),
+        sum(team.size_deviation for team in evaluation.teams),
+        sum(sum(team.average_deviations.values()) for team in evaluation.teams) / max(number_of_averages, 1),
+        sum(team.gender_pairs for team in evaluation.teams),
+        sum(team.ethnicity_pairs for team in evaluation.teams),
+        seconds,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a cohort snapshot's teams with many sets of criteria weights, with the matrix engine only"
+    )
+    parser.add_argument("snapshot", help="the snapshot file to read")
+    parser.add_argument("--grid", default=None, help="the values to try per weight constant, as JSON")
+    parser.add_argument("--ranges", default=None, help="[low, high] to sample from per weight constant, as JSON")
+    parser.add_argument("--samples", type=int, default=10, help="the number of sets of weights to sample from --ranges")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the sample")
+    parser.add_argument("--processes", type=int, default=None, help="size of the process pool")
+    parser.add_argument("--output", default=None, help="a CSV file to also write the results to")
+    args = parser.parse_args()
+
+    if args.grid:
+        configurations = get_grid(json.loads(args.grid))
+    elif args.ranges:
+        configurations = get_random_sample(json.loads(args.ranges), args.samples, args.seed)
+    else:
+        parser.error("one of --grid or --ranges is required")
+
+    cohort_snapshot = snapshot.load_snapshot(args.snapshot)
+    results = run_sweep(cohort_snapshot.projects, cohort_snapshot.surveys, configurations, args.processes)
+
+    print_results(results)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Benchmarks build_teams end-to-end on synthetic cohorts.
+
+The Airtable DAO is stubbed out with a cohort from ``make_realistic_cohort``, so a
+run only measures team building. For each cohort size and engine it reports the
+wall-clock time, the number of team fit evaluations and evaluations per second,
+the peak memory traced by tracemalloc, and the quality of the plan as scored by
+``handler._get_plan_score``, the objective every engine is judged by.
+
+Evaluations are only counted in this process, so engines running work on a process
+pool, and the matrix engine, which scores whole rows at once, report fewer.
+
+Run from the src directory, or with ``make benchmark``:
+
+    python -m teambuilding.tests.benchmark --sizes 50x10,300x30 --engines greedy,matrix
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import time
+import tracemalloc
+import unittest.mock as mock
+
+import teambuilding.handler
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+DEFAULT_SIZES = "50x10,300x30,1000x100"
+LARGE_SIZES = "2000x200,5000x500"
+DEFAULT_ENGINES = "greedy,matrix"
+
+
+def run_benchmark(
+    number_of_students: int, number_of_projects: int, engine: str, seed: int = 0, memory: bool = True, **options
+) -> dict:
+    """Times one build_teams run on a synthetic cohort
+
+    tracemalloc slows everything down, so peak memory is measured on a second run.
+
+    Args:
+        number_of_students (int): Size of the cohort
+        number_of_projects (int): Number of projects
+        engine (str): The team building engine
+        seed (int, optional): Seed for the cohort
+        memory (bool, optional): Whether to measure peak memory
+        **options: Any other build options
+
+    Returns:
+        dict: The measurements
+    """
+    students, projects = make_realistic_cohort(seed, number_of_students, number_of_projects)
+    event = dict(options, cohort="BENCHMARK", engine=engine)
+
+    started = time.perf_counter()
+    surveys, assignments, evaluations = _run_build_teams(event, students, projects)
+    elapsed = time.perf_counter() - started
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        _run_build_teams(event, students, projects)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "students": number_of_students,
+        "projects": number_of_projects,
+        "engine": engine,
+        "seconds": elapsed,
+        "evaluations": evaluations,
+        "evaluations_per_second": evaluations / elapsed if elapsed else 0,
+        "peak_memory_mb": peak_memory / (1024 * 1024) if peak_memory is not None else None,
+        "assigned": len(assignments),
+        "plan_score": teambuilding.handler._get_plan_score(projects, surveys, assignments),
+    }
+
+
+def _run_build_teams(event: dict, students: list, projects: list) -> tuple:
+    """Runs build_teams with the DAO stubbed out
+
+    Returns:
+        tuple: The surveys build_teams was given, the assignments it wrote, and the number of team fit evaluations
+    """
+    # build_teams sorts the surveys in place, so it gets its own copy
+    surveys = copy.deepcopy(students)
+    assignments = []
+    evaluations = 0
+
+    get_team_fit_score = teambuilding.handler._get_team_fit_score
+
+    def counting_get_team_fit_score(*args):
+        nonlocal evaluations
+        evaluations += 1
+        return get_team_fit_score(*args)
+
+    def assign_students_to_projects(written_assignments):
+        for student, project, score in written_assignments:
+            assignments.append(teambuilding.handler.AssignmentTuple(project, student, score))
+
+    with mock.patch("labsdao.people.get_all_student_surveys", return_value=surveys), mock.patch(
+        "labsdao.projects.get_all_active_projects", return_value=projects
+    ), mock.patch("labsdao.projects.assign_students_to_projects", new=assign_students_to_projects), mock.patch(
+        "teambuilding.handler._get_team_fit_score", new=counting_get_team_fit_score
+    ), contextlib.redirect_stdout(
+        io.StringIO()
+    ):
+        teambuilding.handler.build_teams(event, None)
+
+    return surveys, assignments, evaluations
+
+
+def _parse_sizes(sizes: str) -> list:
+    """Parses "students x projects" pairs, e.g. "50x10,300x30" """
+    return [tuple(int(number) for number in size.split("x")) for size in sizes.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="students x projects, comma separated")
+    parser.add_argument("--large", action="store_true", help="also run {}".format(LARGE_SIZES))
+    parser.add_argument("--engines", default=DEFAULT_ENGINES, help="engines to compare, comma separated")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic cohorts")
+    parser.add_argument("--time-budget", type=float, default=None, help="time budget for the improving engines")
+    parser.add_argument("--local-search", action="store_true", help="run the local search after the engine")
+    parser.add_argument("--skip-memory", action="store_true", help="don't measure peak memory")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    args = parser.parse_args()
+
+    sizes = _parse_sizes(args.sizes)
+    if args.large:
+        sizes += _parse_sizes(LARGE_SIZES)
+
+    options = {"local_search": args.local_search}
+    if args.time_budget is not None:
+        options["time_budget"] = args.time_budget
+
+    TABLE_FORMAT_STRING = "{:>8} {:>8} {:<10} {:>10} {:>12} {:>12} {:>10} {:>10} {:>12}"
+    if not args.json:
+        print(
+            TABLE_FORMAT_STRING.format(
+                "Students",
+                "Projects",
+                "Engine",
+                "Seconds",
+                "Evaluations",
+                "Evals/sec",
+                "Peak MB",
+                "Assigned",
+                "Score",
+            )
+        )
+        print("=" * 100)
+
+    for number_of_students, number_of_projects in sizes:
+        for engine in args.engines.split(","):
+            result = run_benchmark(
+                number_of_students, number_of_projects, engine, args.seed, not args.skip_memory, **options
+            )
+
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(
+                    TABLE_FORMAT_STRING.format(
+                        result["students"],
+                        result["projects"],
+                        result["engine"],
+                        "{:.2f}".format(result["seconds"]),
+                        result["evaluations"],
+                        "{:.0f}".format(result["evaluations_per_second"]),
+                        "{:.1f}".format(result["peak_memory_mb"]) if result["peak_memory_mb"] is not None else "-",
+                        result["assigned"],
+                        result["plan_score"],
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
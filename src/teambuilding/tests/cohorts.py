@@ -0,0 +1,140 @@
+"""Reproducible cohorts of surveys and projects for the team building tests"""
+import random
+
+import teambuilding.handler
+
+
+def make_cohort(seed: int, number_of_students: int, number_of_projects: int):
+    """Builds a random but reproducible cohort of surveys and projects"""
+    rng = random.Random(seed)
+
+    tracks = ["WEB", "DS", "IOS"]
+    names = ["Student {:02d}".format(i) for i in range(number_of_students)]
+    averaged_fields = [field for field, _, _ in teambuilding.handler.AVERAGE_GOAL_CRITERIA]
+
+    students = []
+    for i in range(number_of_students):
+        fields = {
+            teambuilding.handler.SURVEY_TRACK_FIELD: rng.choice(tracks),
+            teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: [names[i]],
+        }
+        if rng.random() < 0.8:
+            fields[teambuilding.handler.SURVEY_GENDER_FIELD] = rng.choice(["GENDER-A", "GENDER-B", "GENDER-C"])
+        if rng.random() < 0.8:
+            fields[teambuilding.handler.SURVEY_ETHNICITIES_FIELD] = rng.sample(
+                ["ETHNICITY-A", "ETHNICITY-B", "ETHNICITY-C", "ETHNICITY-D"], rng.randint(1, 2)
+            )
+        if rng.random() < 0.2:
+            fields[teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD] = rng.sample(names, 2)
+        for field in averaged_fields:
+            if rng.random() < 0.85:
+                fields[field] = rng.randint(1, 5)
+
+        students.append({"id": "student_{:02d}".format(i), "fields": fields})
+
+    projects = []
+    for i in range(number_of_projects):
+        project_tracks = [tracks[i]] if i < len(tracks) else rng.sample(tracks, rng.randint(1, 2))
+        projects.append(
+            {
+                "id": "project_{:02d}".format(i),
+                "fields": {
+                    "id": "project_{:02d}".format(i),
+                    teambuilding.handler.PROJECT_NAME_FIELD: "Project {:02d}".format(i),
+                    teambuilding.handler.PROJECT_TRACKS_FIELD: project_tracks,
+                },
+            }
+        )
+
+    return students, projects
+
+
+# Roughly the mix of tracks in a Labs cohort, and the combinations of tracks projects ask for
+REALISTIC_TRACKS = [("WEB", 50), ("DS", 25), ("iOS", 10), ("Android", 8), ("UX", 7)]
+REALISTIC_PROJECT_TRACKS = [
+    (["WEB"], 20),
+    (["WEB", "DS"], 35),
+    (["WEB", "DS", "iOS"], 15),
+    (["WEB", "DS", "Android"], 10),
+    (["WEB", "DS", "iOS", "Android"], 10),
+    (["WEB", "UX"], 5),
+    (["WEB", "DS", "UX"], 5),
+]
+REALISTIC_GENDERS = [("Man", 60), ("Woman", 33), ("Non-binary", 4), ("Prefer not to say", 3)]
+REALISTIC_ETHNICITIES = [
+    "White",
+    "Black or African American",
+    "Hispanic or Latino",
+    "Asian",
+    "American Indian or Alaska Native",
+    "Native Hawaiian or Other Pacific Islander",
+    "Middle Eastern or North African",
+]
+
+
+def _choose_weighted(rng: random.Random, choices: list):
+    values, weights = zip(*choices)
+
+    return rng.choices(values, weights=weights)[0]
+
+
+def make_realistic_cohort(seed: int, number_of_students: int, number_of_projects: int):
+    """Builds a random but reproducible cohort shaped like the records the DAO returns
+
+    Every SURVEY_* field is filled in for most students, some students list one to three
+    ethnicities or other students they can't work with, and projects ask for the
+    combinations of tracks Labs projects usually do. Records have Airtable style IDs.
+    Survey answers are on the 1 to 5 scale the averaged criteria expect.
+    """
+    rng = random.Random(seed)
+
+    student_names = ["rec{:014d}".format(rng.randrange(10 ** 14)) for _ in range(number_of_students)]
+    averaged_fields = [field for field, _, _ in teambuilding.handler.AVERAGE_GOAL_CRITERIA]
+
+    students = []
+    for student_index in range(number_of_students):
+        fields = {
+            teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: [student_names[student_index]],
+            teambuilding.handler.SURVEY_TRACK_FIELD: _choose_weighted(rng, REALISTIC_TRACKS),
+        }
+        if rng.random() < 0.95:
+            fields[teambuilding.handler.SURVEY_GENDER_FIELD] = _choose_weighted(rng, REALISTIC_GENDERS)
+        if rng.random() < 0.9:
+            fields[teambuilding.handler.SURVEY_ETHNICITIES_FIELD] = rng.sample(
+                REALISTIC_ETHNICITIES, rng.choices([1, 2, 3], weights=[80, 15, 5])[0]
+            )
+        if rng.random() < 0.05:
+            fields[teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD] = rng.sample(
+                student_names, rng.randint(1, 3)
+            )
+        if rng.random() < 0.1:
+            fields[teambuilding.handler.SURVEY_PRODUCT_OPT_OUT_FIELD] = "Opted out of product {}".format(
+                rng.randrange(number_of_projects or 1)
+            )
+        for field in averaged_fields:
+            if rng.random() < 0.95:
+                fields[field] = rng.randint(1, 5)
+
+        students.append({"id": "rec{:014d}".format(rng.randrange(10 ** 14)), "fields": fields})
+
+    # The first two projects between them need every track, so every student can be placed
+    project_tracks = [["WEB", "DS", "iOS", "Android"], ["WEB", "DS", "UX"]]
+
+    projects = []
+    for project_index in range(number_of_projects):
+        project_id = "rec{:014d}".format(rng.randrange(10 ** 14))
+        if project_index >= len(project_tracks):
+            project_tracks.append(list(_choose_weighted(rng, REALISTIC_PROJECT_TRACKS)))
+        projects.append(
+            {
+                "id": project_id,
+                "fields": {
+                    "id": project_id,
+                    teambuilding.handler.PROJECT_NAME_FIELD: "Project {:03d}".format(project_index),
+                    teambuilding.handler.PROJECT_PRODUCT_NAME_FIELD: "Product {:03d}".format(project_index // 2),
+                    teambuilding.handler.PROJECT_TRACKS_FIELD: project_tracks[project_index],
+                },
+            }
+        )
+
+    return students, projects
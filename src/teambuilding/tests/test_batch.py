@@ -0,0 +1,83 @@
+import contextlib
+import copy
+import io
+import unittest
+import unittest.mock as mock
+
+import teambuilding.handler
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+COHORTS = {"PT15": make_realistic_cohort(0, 40, 5), "PT16": make_realistic_cohort(1, 30, 4)}
+
+
+def _run_build_teams(event):
+    """Runs build_teams with the DAO stubbed out, returning the (project ID, student ID) pairs of each write"""
+    with mock.patch(
+        "labsdao.people.get_all_student_surveys", side_effect=lambda cohort, fields: copy.deepcopy(COHORTS[cohort][0])
+    ) as get_surveys, mock.patch(
+        "labsdao.projects.get_all_active_projects", side_effect=lambda cohort, fields: COHORTS[cohort][1]
+    ), mock.patch(
+        "labsdao.projects.assign_students_to_projects"
+    ) as assign_students, contextlib.redirect_stdout(
+        io.StringIO()
+    ):
+        teambuilding.handler.build_teams(event, None)
+
+    writes = [
+        sorted((project["id"], student["id"]) for student, project, _ in call[0][0])
+        for call in assign_students.call_args_list
+    ]
+
+    return writes, sorted(call[0][0] for call in get_surveys.call_args_list)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.expected = sorted(
+            pair for cohort in sorted(COHORTS) for pair in _run_build_teams({"cohort": cohort})[0][0]
+        )
+
+    def test_one_write_for_every_cohort(self):
+        """
+        Every cohort is read, and their teams are the same as building each on its own, written together
+        """
+        writes, cohorts_read = _run_build_teams({"cohorts": ["PT15", "PT16"]})
+
+        self.assertEqual(cohorts_read, ["PT15", "PT16"])
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(writes[0], self.expected)
+
+    def test_list_event(self):
+        writes, _ = _run_build_teams(["PT16", "PT15"])
+
+        self.assertEqual(writes, [self.expected])
+
+    def test_without_process_pool(self):
+        """
+        Without a process pool, as in Lambda, the cohorts are built one after the other
+        """
+        with mock.patch("concurrent.futures.ProcessPoolExecutor", side_effect=OSError("no shared memory")):
+            writes, _ = _run_build_teams({"cohorts": ["PT15", "PT16"]})
+
+        self.assertEqual(writes, [self.expected])
+
+    def test_engines_with_their_own_pool(self):
+        """
+        With the multistart engine or decomposition, which run their own process pools, cohorts aren't built in
+        another pool as well
+        """
+        for options in ({"engine": "multistart", "starts": 2}, {"decompose": True}):
+            with mock.patch("teambuilding.batch._build_cohorts_in_pool") as build_cohorts_in_pool:
+                writes, _ = _run_build_teams(dict(options, cohorts=["PT15", "PT16"]))
+
+            build_cohorts_in_pool.assert_not_called()
+            self.assertEqual(len(writes), 1)
+
+    def test_single_cohort_options(self):
+        for option in ("snapshot", "checkpoint", "instrument"):
+            with self.assertRaises(ValueError):
+                teambuilding.handler._get_build_options({"cohorts": ["PT15"], option: "x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
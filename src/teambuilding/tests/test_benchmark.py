@@ -0,0 +1,37 @@
+import unittest
+
+import teambuilding.handler
+from teambuilding.tests.benchmark import run_benchmark
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+
+class TestRealisticCohort(unittest.TestCase):
+    def test_reproducible(self):
+        """
+        The same seed gives the same cohort
+        """
+        self.assertEqual(make_realistic_cohort(3, 50, 10), make_realistic_cohort(3, 50, 10))
+
+    def test_every_student_can_be_placed(self):
+        """
+        Every student's track is needed by at least one project
+        """
+        students, projects = make_realistic_cohort(3, 200, 10)
+
+        for student in students:
+            self.assertTrue(
+                any(teambuilding.handler._is_track_match(project, student) for project in projects), student
+            )
+
+
+class TestRunBenchmark(unittest.TestCase):
+    def test_greedy(self):
+        """
+        The benchmark runs build_teams against the stubbed DAO and measures the run
+        """
+        result = run_benchmark(50, 10, "greedy")
+
+        self.assertEqual(result["assigned"], 50)
+        self.assertGreater(result["evaluations"], 0)
+        self.assertGreater(result["peak_memory_mb"], 0)
+        self.assertEqual(result["plan_score"], run_benchmark(50, 10, "greedy", memory=False)["plan_score"])
@@ -0,0 +1,107 @@
+import unittest
+
+import teambuilding.handler
+import teambuilding.instrumentation
+from teambuilding.tests.cohorts import make_cohort, make_realistic_cohort
+
+
+def _scan_best_assignment(projects, assignments, students, team_states):
+    """The exhaustive scan the candidate queue replaces"""
+    highscore = 0
+    best_assignment = teambuilding.handler.AssignmentTuple(None, None, None)
+    for project in projects:
+        for student in students:
+            score = teambuilding.handler._get_score(projects, assignments, project, student, team_states)
+
+            if score > -5000:
+                if best_assignment.project is None or score >= highscore:
+                    best_assignment = teambuilding.handler.AssignmentTuple(project, student, score)
+                    highscore = score
+
+    return best_assignment
+
+
+def _check_every_round(test, projects, students, candidates_per_track):
+    """Runs the greedy loop with the queue, checking its pick against the exhaustive scan every round"""
+    assignments = []
+    unassigned_students = list(students)
+    team_states = teambuilding.handler._build_team_states(projects, assignments)
+    candidates = teambuilding.handler.CandidateQueue(projects, unassigned_students, team_states, candidates_per_track)
+
+    while unassigned_students:
+        expected = _scan_best_assignment(projects, assignments, unassigned_students, team_states)
+        best_assignment = candidates.get_best_assignment()
+
+        test.assertIs(best_assignment.project, expected.project)
+        test.assertIs(best_assignment.student, expected.student)
+        test.assertEqual(best_assignment.score, expected.score)
+
+        if best_assignment.project is None:
+            candidates.remove(unassigned_students.pop())
+        else:
+            assignments.append(best_assignment)
+            team_states[teambuilding.handler._get_project_id(best_assignment.project)].add(best_assignment.student)
+            unassigned_students.remove(best_assignment.student)
+            candidates.assign(best_assignment.project, best_assignment.student)
+
+
+class TestCandidateQueue(unittest.TestCase):
+    def test_matches_exhaustive_scan_every_round(self):
+        """
+        Every round, the queue picks the same assignment as scanning every project/student pair
+        """
+        for seed in range(5):
+            students, projects = make_cohort(seed, 30, 6)
+
+            _check_every_round(self, projects, students, teambuilding.handler.CANDIDATES_PER_TRACK)
+
+    def test_few_candidates_per_track(self):
+        """
+        Keeping only a couple of candidates per track still picks the same assignments, falling back to
+        scoring the rest of the students when the kept ones have all been assigned elsewhere
+        """
+        for candidates_per_track in (None, 1, 2):
+            recorder = teambuilding.instrumentation.Recorder()
+            with teambuilding.instrumentation.recording(recorder):
+                for seed in range(3):
+                    students, projects = make_realistic_cohort(seed, 40, 5)
+
+                    _check_every_round(self, projects, students, candidates_per_track)
+
+            counters = recorder.get_summary()["counters"]
+            if candidates_per_track is None:
+                self.assertEqual(counters.get("candidates_pruned_by_bound", 0), 0)
+            else:
+                self.assertGreater(counters["candidates_pruned_by_bound"], 0)
+                self.assertGreater(counters["candidate_lists_exhausted"], 0)
+
+    def test_score_cutoff(self):
+        """
+        Candidates scoring -5000 or less are never chosen
+        """
+        project_01 = {
+            "id": "project_01",
+            "fields": {"id": "project_01", teambuilding.handler.PROJECT_TRACKS_FIELD: ["DS"]},
+        }
+        projects = [project_01]
+
+        assigned_student_01 = {
+            "fields": {
+                teambuilding.handler.SURVEY_TRACK_FIELD: "DS",
+                teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Assigned Student 01"],
+                teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD: ["Unassigned Student 01"],
+            }
+        }
+        assignments = [teambuilding.handler.AssignmentTuple(project_01, assigned_student_01, 100)]
+
+        unassigned_student_01 = {
+            "fields": {
+                teambuilding.handler.SURVEY_TRACK_FIELD: "DS",
+                teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Unassigned Student 01"],
+            }
+        }
+
+        best_assignment = teambuilding.handler._get_best_assignment(projects, assignments, [unassigned_student_01])
+
+        self.assertIsNone(best_assignment.project)
+        self.assertIsNone(best_assignment.student)
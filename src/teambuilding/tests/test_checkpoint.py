@@ -0,0 +1,134 @@
+import contextlib
+import copy
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import teambuilding.checkpoint
+import teambuilding.handler
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+
+def _run_build_teams(event, context, students, projects):
+    """Runs build_teams with the DAO stubbed out, returning the (project ID, student ID) pairs written, if any"""
+    with mock.patch("labsdao.people.get_all_student_surveys", return_value=copy.deepcopy(students)), mock.patch(
+        "labsdao.projects.get_all_active_projects", return_value=projects
+    ), mock.patch("labsdao.projects.assign_students_to_projects") as assign_students, contextlib.redirect_stdout(
+        io.StringIO()
+    ):
+        teambuilding.handler.build_teams(event, context)
+
+    if not assign_students.called:
+        return None
+
+    return sorted((project["id"], student["id"]) for student, project, _ in assign_students.call_args[0][0])
+
+
+class TestCheckpointer(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "checkpoint.json")
+
+    def test_save_and_load(self):
+        """
+        A checkpoint is only loaded for the cohort it was saved for, and is gone once deleted
+        """
+        students, projects = make_realistic_cohort(0, 10, 2)
+        assignments = [teambuilding.handler.AssignmentTuple(projects[0], students[0], 100)]
+
+        checkpointer = teambuilding.checkpoint.Checkpointer(self.path, "PT15")
+        self.assertIsNone(checkpointer.load())
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            checkpointer.save(assignments, students[1:])
+            saved = checkpointer.load()
+            other_cohort = teambuilding.checkpoint.Checkpointer(self.path, "PT16").load()
+
+        self.assertEqual(saved["assignments"], [[projects[0]["id"], students[0]["id"], 100]])
+        self.assertEqual(saved["unassigned"], [student["id"] for student in students[1:]])
+        self.assertFalse(saved["complete"])
+        self.assertIsNone(other_cohort)
+
+        checkpointer.delete()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_resume(self):
+        """
+        Saved records are matched by ID; records that are gone are dropped and new students are placed last
+        """
+        students, projects = make_realistic_cohort(0, 10, 2)
+        saved = {
+            "cohort": "PT15",
+            "complete": False,
+            "assignments": [[projects[0]["id"], students[0]["id"], 100], [projects[1]["id"], "recGone", 50]],
+            "unassigned": [students[2]["id"], students[1]["id"], "recAlsoGone"],
+        }
+
+        assignments, unassigned_students = teambuilding.checkpoint.resume(saved, projects, students)
+
+        self.assertEqual(assignments, [teambuilding.handler.AssignmentTuple(projects[0], students[0], 100)])
+        self.assertEqual(unassigned_students, [students[2], students[1]] + students[3:])
+
+    def test_out_of_time(self):
+        """
+        Outside of Lambda a run never stops early; in Lambda it stops once the time to write the plan runs short
+        """
+        self.assertFalse(teambuilding.checkpoint.Checkpointer(self.path, "PT15").is_out_of_time())
+
+        context = mock.Mock()
+        context.get_remaining_time_in_millis.return_value = (teambuilding.handler.LAMBDA_TIME_RESERVE - 1) * 1000
+        self.assertTrue(teambuilding.checkpoint.Checkpointer(self.path, "PT15", context).is_out_of_time())
+
+
+class TestBuildTeamsWithCheckpoint(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "checkpoint.json")
+
+    def test_resume_after_timeout(self):
+        """
+        A run that runs out of time writes nothing, and the next one finishes with the same teams as a single run
+        """
+        students, projects = make_realistic_cohort(3, 60, 8)
+
+        expected = _run_build_teams("PT15", None, students, projects)
+
+        # Plenty of time for the first few rounds of the greedy engine, then not enough to carry on
+        remaining_times = iter([300000] * 20)
+        context = mock.Mock()
+        context.get_remaining_time_in_millis.side_effect = lambda: next(remaining_times, 1000)
+
+        event = {"cohort": "PT15", "checkpoint": self.path}
+        self.assertIsNone(_run_build_teams(event, context, students, projects))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            saved = teambuilding.checkpoint.Checkpointer(self.path, "PT15").load()
+        self.assertFalse(saved["complete"])
+        self.assertGreater(len(saved["assignments"]), 0)
+        self.assertLess(len(saved["assignments"]), len(students))
+
+        self.assertEqual(_run_build_teams(event, None, students, projects), expected)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_complete_checkpoint_is_only_written(self):
+        """
+        A complete plan left by a run that timed out while writing is written again without rebuilding it
+        """
+        students, projects = make_realistic_cohort(3, 30, 4)
+        checkpointer = teambuilding.checkpoint.Checkpointer(self.path, "PT15")
+        with contextlib.redirect_stdout(io.StringIO()):
+            checkpointer.save([teambuilding.handler.AssignmentTuple(projects[0], students[0], 0)], [], complete=True)
+
+        with mock.patch("teambuilding.handler._build_assignments") as build_assignments:
+            written = _run_build_teams({"cohort": "PT15", "checkpoint": self.path}, None, students, projects)
+
+        build_assignments.assert_not_called()
+        self.assertEqual(written, [(projects[0]["id"], students[0]["id"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import teambuilding.features
+import teambuilding.handler
+
+
+def _survey(name, incompatible_names=None):
+    fields = {teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: [name]}
+    if incompatible_names is not None:
+        fields[teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD] = incompatible_names
+
+    return {"fields": fields}
+
+
+class TestIncompatibilityIndex(unittest.TestCase):
+    def test_symmetric(self):
+        """
+        Listing a student as incompatible makes the pair incompatible in both directions,
+        whichever order the surveys are compiled in
+        """
+        features = teambuilding.features.StudentFeatureTable(
+            [
+                _survey("Student 01", ["Student 03"]),
+                _survey("Student 02"),
+                _survey("Student 03"),
+                _survey("Student 04", ["Student 01"]),
+            ]
+        )
+        index = features.incompatibilities
+
+        self.assertEqual(sorted(index.get_incompatible_rows(0)), [2, 3])
+        self.assertEqual(list(index.get_incompatible_rows(1)), [])
+        self.assertEqual(list(index.get_incompatible_rows(2)), [0])
+        self.assertEqual(list(index.get_incompatible_rows(3)), [0])
+
+        self.assertTrue(index.conflicts(2, 0b0001))
+        self.assertFalse(index.conflicts(2, 0b1010))
+
+    def test_unresolved_names(self):
+        """
+        Names that don't match any survey are reported
+        """
+        features = teambuilding.features.StudentFeatureTable(
+            [
+                _survey("Student 01", ["Studnet 02", "Student 02"]),
+                _survey("Student 02", ["Student 01", "Student 99"]),
+            ]
+        )
+
+        self.assertEqual(features.get_unresolved_names(), ["Studnet 02", "Student 99"])
+
+    def test_compatibility_score(self):
+        """
+        A student is a bad fit for a team with a member listing them as incompatible
+        """
+        project_01 = {"id": "project_01", "fields": {"id": "project_01"}}
+        student_01 = _survey("Student 01", ["Student 02"])
+        student_02 = _survey("Student 02")
+        student_03 = _survey("Student 03")
+
+        team = teambuilding.handler.TeamState(project_01)
+        team.add(student_01)
+
+        self.assertEqual(
+            teambuilding.handler._calculate_student_to_team_compatibility_score([], project_01, student_02, team),
+            teambuilding.handler.BAD_FIT_SCORE,
+        )
+        self.assertEqual(
+            teambuilding.handler._calculate_student_to_team_compatibility_score([], project_01, student_03, team), 0
+        )
@@ -0,0 +1,69 @@
+import unittest
+
+import teambuilding.decomposition
+import teambuilding.handler
+from teambuilding.tests.cohorts import make_cohort
+
+
+def _summarize(assignments):
+    return sorted(
+        (assignment.project["id"], assignment.student["id"], assignment.score) for assignment in assignments
+    )
+
+
+def _set_project_tracks(projects, project_tracks):
+    for project, tracks in zip(projects, project_tracks):
+        project["fields"][teambuilding.handler.PROJECT_TRACKS_FIELD] = tracks
+
+
+class TestGetComponents(unittest.TestCase):
+    def test_tracks_sharing_a_project_are_joined(self):
+        """
+        Tracks are in the same component when a project needs both
+        """
+        students, projects = make_cohort(1, 12, 4)
+        _set_project_tracks(projects, [["WEB"], ["ds"], ["DS", "IOS"], []])
+
+        components, unplaceable_student_indexes = teambuilding.decomposition.get_components(projects, students)
+
+        self.assertEqual(unplaceable_student_indexes, [])
+        self.assertEqual(sorted(component.project_indexes for component in components), [[0], [1, 2]])
+
+        for component in components:
+            for student_index in component.student_indexes:
+                for project_index in range(len(projects)):
+                    if teambuilding.handler._is_track_match(projects[project_index], students[student_index]):
+                        self.assertIn(project_index, component.project_indexes)
+
+    def test_unplaceable_students(self):
+        """
+        Students whose track isn't needed by any project are returned separately
+        """
+        students, projects = make_cohort(1, 12, 2)
+        _set_project_tracks(projects, [["WEB"], ["WEB"]])
+
+        components, unplaceable_student_indexes = teambuilding.decomposition.get_components(projects, students)
+
+        self.assertEqual(len(components), 1)
+        self.assertEqual(
+            sorted(components[0].student_indexes + unplaceable_student_indexes), list(range(len(students)))
+        )
+        for student_index in unplaceable_student_indexes:
+            self.assertNotEqual(students[student_index]["fields"][teambuilding.handler.SURVEY_TRACK_FIELD], "WEB")
+
+
+class TestBuildAssignments(unittest.TestCase):
+    def test_same_assignments_as_greedy(self):
+        """
+        Building each component separately makes the same assignments as building the whole cohort
+        """
+        for seed in range(3):
+            students, projects = make_cohort(seed, 40, 7)
+            _set_project_tracks(projects, [["WEB"], ["DS"], ["IOS"], ["WEB"], ["DS", "IOS"], ["DS"], ["WEB"]])
+
+            options = teambuilding.handler._get_build_options({"cohort": "PT15", "decompose": True})
+
+            greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+            assignments = teambuilding.decomposition.build_assignments(projects, students, None, options, 10)
+
+            self.assertEqual(_summarize(assignments), _summarize(greedy_assignments))
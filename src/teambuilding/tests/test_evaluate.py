@@ -0,0 +1,142 @@
+import contextlib
+import io
+import random
+import unittest
+
+import teambuilding.evaluate
+import teambuilding.handler
+import teambuilding.localsearch
+import teambuilding.multistart
+import teambuilding.solver
+from teambuilding.features import StudentFeatureTable
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+
+def _make_student(name, track, gender=None, ethnicities=None, incompatible_names=None, **responses):
+    fields = {teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: [name], teambuilding.handler.SURVEY_TRACK_FIELD: track}
+    if gender:
+        fields[teambuilding.handler.SURVEY_GENDER_FIELD] = gender
+    if ethnicities:
+        fields[teambuilding.handler.SURVEY_ETHNICITIES_FIELD] = ethnicities
+    if incompatible_names:
+        fields[teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD] = incompatible_names
+    fields.update(responses)
+
+    return {"id": name, "fields": fields}
+
+
+def _make_project(name, tracks):
+    return {"id": name, "fields": {teambuilding.handler.PROJECT_NAME_FIELD: name, "Tracks": tracks}}
+
+
+class TestEvaluatePlan(unittest.TestCase):
+    def test_team_breakdown(self):
+        """
+        Each part of a team's evaluation is counted from its members
+        """
+        git_field = teambuilding.handler.SURVEY_GIT_FIELD
+        projects = [_make_project("Project 1", ["WEB", "DS"]), _make_project("Project 2", ["WEB"])]
+        students = [
+            _make_student("A", "WEB", "Woman", ["E1", "E2"], **{git_field: 5}),
+            _make_student("B", "WEB", "Woman", ["E1"], ["C"], **{git_field: 3}),
+            _make_student("C", "WEB", "Man", ["E3"]),
+            _make_student("D", "DS", "Man"),
+            _make_student("E", "WEB"),
+        ]
+        assignments = [
+            teambuilding.handler.AssignmentTuple(projects[0], student, 0) for student in students[:4]
+        ] + [teambuilding.handler.AssignmentTuple(projects[1], students[4], 0)]
+
+        evaluation = teambuilding.evaluate.evaluate_plan(projects, students, assignments)
+        team = evaluation.teams[0]
+
+        self.assertEqual(team.size, 4)
+        # 3 WEB students against an average of 2, and 1 DS student against an average of 1
+        self.assertEqual(team.size_deviation, 1)
+        # An average of 4 against the desired 3; the students who didn't answer are left out
+        self.assertEqual(team.average_deviations[git_field], 1)
+        self.assertEqual(team.average_deviations[teambuilding.handler.SURVEY_DOCKER_FIELD], 0)
+        self.assertEqual((team.genders, team.gender_pairs), (2, 2))
+        self.assertEqual((team.ethnicities, team.ethnicity_pairs), (3, 1))
+        self.assertEqual(team.conflicts, 1)
+
+        self.assertEqual(evaluation.teams[1].size_deviation, 1)
+        self.assertEqual(evaluation.teams[1].conflicts, 0)
+        self.assertEqual(evaluation.unassigned, 0)
+        self.assertEqual(evaluation.score, sum(team.score for team in evaluation.teams))
+
+    def test_unassigned_students(self):
+        """
+        Students who could have been placed count as BAD_FIT_SCORE; students no project needs don't
+        """
+        projects = [_make_project("Project 1", ["WEB"])]
+        students = [_make_student("A", "WEB"), _make_student("B", "web"), _make_student("C", "DS")]
+        assignments = [teambuilding.handler.AssignmentTuple(projects[0], students[0], 0)]
+
+        evaluation = teambuilding.evaluate.evaluate_plan(projects, students, assignments)
+
+        self.assertEqual(evaluation.unassigned, 1)
+        self.assertEqual(evaluation.score, evaluation.teams[0].score + teambuilding.handler.BAD_FIT_SCORE)
+
+    def test_order_independent(self):
+        """
+        The objective of a plan doesn't depend on the order its assignments were made in
+        """
+        students, projects = make_realistic_cohort(0, 80, 8)
+        assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+
+        evaluation = teambuilding.evaluate.evaluate_plan(projects, students, assignments)
+
+        shuffled_assignments = list(assignments)
+        random.Random(0).shuffle(shuffled_assignments)
+        shuffled_evaluation = teambuilding.evaluate.evaluate_plan(projects, students, shuffled_assignments)
+
+        self.assertAlmostEqual(evaluation.score, shuffled_evaluation.score)
+        self.assertEqual(sum(team.size for team in evaluation.teams), len(assignments))
+
+    def test_empty_plan(self):
+        """
+        A plan without assignments only counts the students left unassigned
+        """
+        students, projects = make_realistic_cohort(0, 10, 2)
+
+        evaluation = teambuilding.evaluate.evaluate_plan(projects, students, [])
+
+        self.assertEqual(evaluation.unassigned, 10)
+        self.assertEqual(evaluation.score, 10 * teambuilding.handler.BAD_FIT_SCORE)
+
+    def test_engines_agree(self):
+        """
+        Every engine scores a plan the same as the evaluation does
+        """
+        students, projects = make_realistic_cohort(3, 60, 6)
+        features = StudentFeatureTable(students)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, start_score, choices = teambuilding.multistart._run_start(projects, students, features, 1)
+        assignments = [
+            teambuilding.handler.AssignmentTuple(projects[project_index], students[student_index], score)
+            for project_index, student_index, score in choices
+        ]
+
+        self.assertEqual(start_score, teambuilding.evaluate.evaluate_plan(projects, students, assignments).score)
+
+        # With a student left unplaced, so that counts too
+        assignments = assignments[1:]
+        plan = teambuilding.solver._get_plan_from_assignments(projects, students, assignments)
+        search = teambuilding.localsearch.LocalSearch(projects, assignments, features, students)
+
+        evaluation = teambuilding.evaluate.evaluate_plan(projects, students, assignments, features)
+
+        self.assertEqual(evaluation.unassigned, 1)
+        self.assertEqual(evaluation.score, teambuilding.handler._get_plan_score(projects, students, assignments))
+        self.assertEqual(teambuilding.solver._get_plan_score(projects, students, plan, features), evaluation.score)
+        self.assertEqual(search.score, evaluation.score)
+        self.assertEqual(
+            evaluation.score,
+            sum(team.score for team in evaluation.teams) + teambuilding.handler.BAD_FIT_SCORE * evaluation.unassigned,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import teambuilding.features
+import teambuilding.handler
+
+
+class TestStudentFeatureTable(unittest.TestCase):
+    def test_compiles_surveys(self):
+        """
+        Categorical answers are interned and missing answers are marked as such
+        """
+        student_01 = {
+            "fields": {
+                teambuilding.handler.SURVEY_TRACK_FIELD: "DS",
+                teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Student 01"],
+                teambuilding.handler.SURVEY_ETHNICITIES_FIELD: ["ETHNICITY-A", "ETHNICITY-B"],
+                teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD: ["Student 02"],
+                teambuilding.handler.SURVEY_GIT_FIELD: 4,
+            }
+        }
+        student_02 = {
+            "fields": {
+                teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Student 02"],
+                teambuilding.handler.SURVEY_GENDER_FIELD: "GENDER-A",
+                teambuilding.handler.SURVEY_ETHNICITIES_FIELD: ["ETHNICITY-B"],
+            }
+        }
+
+        features = teambuilding.features.StudentFeatureTable([student_01, student_02])
+        git_index = features.criterion_indexes[teambuilding.handler.SURVEY_GIT_FIELD]
+
+        self.assertEqual(len(features), 2)
+        self.assertEqual(features.row(student_01), 0)
+        self.assertEqual(features.row(student_02), 1)
+
+        self.assertEqual(list(features.track_ids), [features.tracks.get("DS"), -1])
+        self.assertEqual(list(features.gender_ids), [-1, features.genders.get("GENDER-A")])
+        self.assertEqual(features.name_ids[1], features.names.get("Student 02"))
+        self.assertEqual(list(features.get_incompatible_name_ids(0)), [features.names.get("Student 02")])
+        self.assertEqual(list(features.get_incompatible_name_ids(1)), [])
+        self.assertEqual(list(features.get_ethnicity_ids(1)), [features.ethnicities.get("ETHNICITY-B")])
+
+        self.assertEqual(features.responses[git_index][0], 4)
+        self.assertEqual(list(features.responded[git_index]), [1, 0])
+
+    def test_row_compiles_unseen_surveys(self):
+        """
+        Looking up a survey that isn't in the table yet adds it
+        """
+        features = teambuilding.features.StudentFeatureTable()
+        student_01 = {"fields": {teambuilding.handler.SURVEY_TRACK_FIELD: "WEB"}}
+
+        self.assertEqual(features.row(student_01), 0)
+        self.assertEqual(features.row(student_01), 0)
+        self.assertEqual(len(features), 1)
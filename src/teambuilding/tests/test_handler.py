@@ -1,6 +1,11 @@
+import contextlib
+import copy
+import io
 import unittest
+import unittest.mock as mock
 
 import teambuilding.handler
+from teambuilding.tests.cohorts import make_realistic_cohort
 
 
 class TestCalculateStudentToTeamCompatibilityScore(unittest.TestCase):
@@ -288,3 +293,159 @@ class TestCalculateStudentToTeamCompatibilityScore(unittest.TestCase):
 
         self.assertEquals(project_01_score, 0)
         self.assertEquals(project_02_score, 0)
+
+
+class TestGetBuildOptions(unittest.TestCase):
+    def test_cohort_string(self):
+        """
+        A plain cohort ID uses the default options
+        """
+        options = teambuilding.handler._get_build_options("PT15")
+
+        self.assertEqual(options["cohort"], "PT15")
+        self.assertEqual(options["engine"], "greedy")
+
+    def test_options_dict(self):
+        """
+        Options in the event override the defaults
+        """
+        options = teambuilding.handler._get_build_options({"cohort": "PT15", "engine": "matrix"})
+
+        self.assertEqual(options["cohort"], "PT15")
+        self.assertEqual(options["engine"], "matrix")
+
+    def test_missing_cohort(self):
+        """
+        The cohort ID is required
+        """
+        with self.assertRaises(ValueError):
+            teambuilding.handler._get_build_options({"engine": "matrix"})
+
+    def test_incremental_greedy_only(self):
+        """
+        Incremental runs place the new students with the greedy engine alone
+        """
+        teambuilding.handler._get_build_options({"cohort": "PT15", "incremental": True})
+
+        for options in ({"engine": "solver"}, {"decompose": True}, {"local_search": True}):
+            with self.assertRaises(ValueError):
+                teambuilding.handler._get_build_options(dict(options, cohort="PT15", incremental=True))
+
+
+class TestRecordFields(unittest.TestCase):
+    def _run_build_teams(self, event, students, projects):
+        """Runs build_teams with the DAO stubbed out to read only the fields asked for, returning the fields asked for
+        and the (project ID, student ID) pairs written"""
+
+        def project_records(records, fields):
+            if fields is None:
+                return copy.deepcopy(records)
+
+            return [
+                dict(record, fields={name: value for name, value in record["fields"].items() if name in fields})
+                for record in records
+            ]
+
+        with mock.patch(
+            "labsdao.people.get_all_student_surveys",
+            side_effect=lambda cohort, fields: project_records(students, fields),
+        ) as get_surveys, mock.patch(
+            "labsdao.projects.get_all_active_projects",
+            side_effect=lambda cohort, fields: project_records(projects, fields),
+        ) as get_projects, mock.patch(
+            "labsdao.projects.assign_students_to_projects"
+        ) as assign_students, contextlib.redirect_stdout(
+            io.StringIO()
+        ):
+            teambuilding.handler.build_teams(event, None)
+
+        pairs = sorted((project["id"], student["id"]) for student, project, _ in assign_students.call_args[0][0])
+
+        return get_surveys.call_args[0][1], get_projects.call_args[0][1], pairs
+
+    def test_projected_records_build_the_same_teams(self):
+        """
+        Only the fields the teams are built from are read by default, and the teams are the same as from full records
+        """
+        students, projects = make_realistic_cohort(2, 40, 5)
+        for record in students + projects:
+            record["fields"]["Tell us about yourself"] = "A long free-text answer " * 20
+
+        survey_fields, project_fields, pairs = self._run_build_teams({"cohort": "PT15"}, students, projects)
+
+        self.assertIn(teambuilding.handler.SURVEY_STUDENT_ID_FIELD, survey_fields)
+        self.assertIn(teambuilding.handler.SURVEY_STUDENT_TIMEZONE_FIELD, survey_fields)
+        self.assertIn(teambuilding.handler.PROJECT_TEAM_MEMBERS_FIELD, project_fields)
+        self.assertNotIn("Tell us about yourself", survey_fields + project_fields)
+
+        survey_fields, project_fields, full_pairs = self._run_build_teams(
+            {"cohort": "PT15", "full_records": True}, students, projects
+        )
+
+        self.assertIsNone(survey_fields)
+        self.assertIsNone(project_fields)
+        self.assertEqual(pairs, full_pairs)
+
+
+class TestGetTimeBudget(unittest.TestCase):
+    def test_no_context(self):
+        """
+        Outside of Lambda the configured time budget is used
+        """
+        options = teambuilding.handler._get_build_options({"cohort": "PT15", "time_budget": 30})
+
+        self.assertEqual(teambuilding.handler._get_time_budget(options, None), 30)
+
+    def test_lambda_remaining_time(self):
+        """
+        In Lambda the budget leaves time to write the assignments before the Lambda times out
+        """
+        options = teambuilding.handler._get_build_options({"cohort": "PT15", "time_budget": 600})
+        context = mock.Mock()
+        context.get_remaining_time_in_millis.return_value = 300000
+
+        self.assertEqual(
+            teambuilding.handler._get_time_budget(options, context), 300 - teambuilding.handler.LAMBDA_TIME_RESERVE
+        )
+
+
+class TestIncremental(unittest.TestCase):
+    def _make_cohort(self, seed):
+        students, projects = make_realistic_cohort(seed, 60, 8)
+        for index, student in enumerate(students):
+            student["fields"][teambuilding.handler.SURVEY_STUDENT_ID_FIELD] = ["recPerson{:03d}".format(index)]
+
+        return students, projects
+
+    def test_get_current_assignments(self):
+        """
+        Students listed on a project's Team Members are kept there, the rest are still to be placed, in order
+        """
+        students, projects = self._make_cohort(0)
+        projects[0]["fields"][teambuilding.handler.PROJECT_TEAM_MEMBERS_FIELD] = ["recPerson005", "recPerson001"]
+        projects[1]["fields"][teambuilding.handler.PROJECT_TEAM_MEMBERS_FIELD] = ["recPerson001", "recOther"]
+
+        current_assignments, unassigned_students = teambuilding.handler._get_current_assignments(projects, students)
+
+        self.assertEqual(
+            [(assignment.project, assignment.student) for assignment in current_assignments],
+            [(projects[0], students[1]), (projects[0], students[5])],
+        )
+        self.assertEqual(unassigned_students, [students[0]] + students[2:5] + students[6:])
+
+    def test_warm_start_matches_full_build(self):
+        """
+        Starting from the first assignments of a full greedy build places the rest of the students the same way
+        """
+        students, projects = self._make_cohort(1)
+        full_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+
+        current_assignments = full_assignments[:40]
+        kept_students = {id(assignment.student) for assignment in current_assignments}
+        remaining_students = [student for student in students if id(student) not in kept_students]
+
+        assignments = teambuilding.handler._build_assignments_greedy(
+            projects, remaining_students, None, current_assignments
+        )
+
+        self.assertEqual(assignments, full_assignments[40:])
@@ -0,0 +1,78 @@
+import json
+import threading
+import unittest
+
+import teambuilding.handler
+import teambuilding.instrumentation
+from teambuilding.tests.cohorts import make_cohort
+
+
+class TestRecording(unittest.TestCase):
+    def test_records_greedy_run(self):
+        """
+        Every criterion and the greedy engine's counters are recorded
+        """
+        students, projects = make_cohort(1, 30, 6)
+
+        recorder = teambuilding.instrumentation.Recorder()
+        with teambuilding.instrumentation.recording(recorder):
+            assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+
+        summary = json.loads(json.dumps(recorder.get_summary()))
+        criteria = summary["criteria"]
+        counters = summary["counters"]
+
+        self.assertEqual(
+            set(criteria), {"team_size", "compatibility", "ethnic_diversity", "gender_diversity", "average_goal"}
+        )
+        self.assertEqual(
+            set(criteria["average_goal"]), {field for field, _, _ in teambuilding.handler.AVERAGE_GOAL_CRITERIA}
+        )
+        self.assertEqual(
+            criteria["compatibility"]["calls"],
+            counters["candidates_scanned"]
+            - counters["candidates_pruned_by_track"]
+            - counters["candidates_pruned_by_bound"],
+        )
+        self.assertEqual(counters["greedy_rounds"], len(students))
+        self.assertGreater(criteria["team_size"]["calls"], len(assignments))
+        self.assertGreater(summary["seconds"], 0)
+
+    def test_resets_recorder(self):
+        """
+        The recorder stops recording once the block ends, even if it raised, and nothing records without one
+        """
+        current = teambuilding.instrumentation.current
+
+        with teambuilding.instrumentation.recording(None):
+            self.assertIsNone(current.recorder)
+
+        recorder = teambuilding.instrumentation.Recorder()
+        with self.assertRaises(RuntimeError):
+            with teambuilding.instrumentation.recording(recorder):
+                self.assertIs(current.recorder, recorder)
+                raise RuntimeError()
+
+        self.assertIsNone(current.recorder)
+
+        students, projects = make_cohort(1, 12, 3)
+        teambuilding.handler._build_assignments_greedy(projects, students)
+        self.assertEqual(recorder.calls, {})
+        self.assertEqual(recorder.counters, {})
+
+    def test_records_own_thread_only(self):
+        """
+        Work done on other threads while recording isn't recorded
+        """
+        students, projects = make_cohort(1, 12, 3)
+
+        recorder = teambuilding.instrumentation.Recorder()
+        with teambuilding.instrumentation.recording(recorder):
+            thread = threading.Thread(
+                target=teambuilding.handler._build_assignments_greedy, args=(projects, students)
+            )
+            thread.start()
+            thread.join()
+
+        self.assertEqual(recorder.calls, {})
+        self.assertEqual(recorder.counters, {})
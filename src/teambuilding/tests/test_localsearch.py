@@ -0,0 +1,81 @@
+import random
+import unittest
+from collections import Counter
+
+import teambuilding.handler
+import teambuilding.localsearch
+from teambuilding.features import StudentFeatureTable
+from teambuilding.tests.cohorts import make_cohort
+
+
+def _get_plan_score(projects, assignments, features):
+    """Scores every assignment against the rest of its team from scratch"""
+    team_states = teambuilding.handler._build_team_states(projects, assignments, features)
+
+    score = 0
+    for assignment in assignments:
+        team = team_states[teambuilding.handler._get_project_id(assignment.project)]
+        team.remove(assignment.student)
+        score += teambuilding.handler._get_score(projects, [], assignment.project, assignment.student, team_states)
+        team.add(assignment.student)
+
+    return score
+
+
+def _get_team_sizes(assignments):
+    return Counter(
+        assignment.student["fields"][teambuilding.handler.SURVEY_TRACK_FIELD] for assignment in assignments
+    )
+
+
+class TestLocalSearch(unittest.TestCase):
+    def test_improves_plan(self):
+        """
+        The search never makes the plan worse, and its incremental score matches scoring the plan from scratch
+        """
+        for seed in range(3):
+            students, projects = make_cohort(seed, 40, 6)
+            features = StudentFeatureTable(students)
+
+            greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students, features)
+
+            search = teambuilding.localsearch.LocalSearch(projects, greedy_assignments, features)
+            initial_score = search.score
+            self.assertEqual(initial_score, _get_plan_score(projects, greedy_assignments, features))
+
+            rng = random.Random(seed)
+            for _ in range(500):
+                search.try_random_change(rng)
+
+            assignments = search.get_assignments()
+            self.assertGreaterEqual(search.score, initial_score)
+            self.assertEqual(search.score, _get_plan_score(projects, assignments, features))
+            self.assertEqual(search.score, sum(assignment.score for assignment in assignments))
+
+    def test_constraints(self):
+        """
+        Students stay on projects needing their track and the number of students placed per track is unchanged
+        """
+        students, projects = make_cohort(4, 40, 6)
+
+        greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+        assignments = teambuilding.localsearch.improve_assignments(projects, greedy_assignments, None, 5)
+
+        self.assertEqual(len(assignments), len(greedy_assignments))
+        self.assertEqual(_get_team_sizes(assignments), _get_team_sizes(greedy_assignments))
+        for assignment in assignments:
+            self.assertTrue(teambuilding.handler._is_track_match(assignment.project, assignment.student))
+
+    def test_iteration_budget(self):
+        """
+        No changes are tried with an iteration budget of zero
+        """
+        students, projects = make_cohort(4, 20, 4)
+
+        greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+        assignments = teambuilding.localsearch.improve_assignments(projects, greedy_assignments, None, 5, 0)
+
+        self.assertEqual(
+            sorted((assignment.project["id"], assignment.student["id"]) for assignment in assignments),
+            sorted((assignment.project["id"], assignment.student["id"]) for assignment in greedy_assignments),
+        )
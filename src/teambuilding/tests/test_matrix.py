@@ -0,0 +1,75 @@
+import unittest
+
+import teambuilding.handler
+import teambuilding.matrix
+from teambuilding.tests.cohorts import make_cohort
+
+
+def _summarize(assignments):
+    return [(assignment.project["id"], assignment.student["id"], assignment.score) for assignment in assignments]
+
+
+class TestScoreMatrix(unittest.TestCase):
+    def test_initial_scores_match_get_score(self):
+        """
+        Every cell of the matrix matches the score calculated by _get_score
+        """
+        students, projects = make_cohort(1, 20, 5)
+
+        score_matrix = teambuilding.matrix.ScoreMatrix(projects, students)
+
+        for project_index, project in enumerate(projects):
+            for student_index, student in enumerate(students):
+                expected = teambuilding.handler._get_score(projects, [], project, student)
+                if expected == teambuilding.handler.BAD_FIT_SCORE:
+                    self.assertFalse(score_matrix.track_matches[project_index, student_index])
+                else:
+                    self.assertEqual(
+                        score_matrix.team_scores[project_index, student_index]
+                        + score_matrix.team_size_scores[project_index, student_index],
+                        expected,
+                    )
+
+    def test_same_assignments_as_greedy(self):
+        """
+        The matrix engine makes the same assignments, in the same order, as the greedy engine
+        """
+        for seed in range(5):
+            students, projects = make_cohort(seed, 30, 6)
+
+            greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+            matrix_assignments = teambuilding.matrix.build_assignments(projects, students)
+
+            self.assertEqual(_summarize(matrix_assignments), _summarize(greedy_assignments))
+
+    def test_student_without_track(self):
+        """
+        A student without a track has no team size score in either engine, however full the teams are
+        """
+        students, projects = make_cohort(2, 30, 6)
+        del students[0]["fields"][teambuilding.handler.SURVEY_TRACK_FIELD]
+
+        score_matrix = teambuilding.matrix.ScoreMatrix(projects, students)
+        assignments = []
+        for student_index, student in enumerate(students[1:], 1):
+            project_index = next(
+                project_index
+                for project_index, project in enumerate(projects)
+                if teambuilding.handler._is_track_match(project, student)
+            )
+            score_matrix.assign(project_index, student_index)
+            assignments.append(teambuilding.handler.AssignmentTuple(projects[project_index], student, None))
+
+        for project in projects:
+            self.assertEqual(
+                teambuilding.handler._calculate_team_size_score(projects, assignments, project, students[0]), 0
+            )
+        self.assertEqual(list(score_matrix.team_size_scores[:, 0]), [0] * len(projects))
+
+    def test_no_projects(self):
+        """
+        Students that can't be matched are dropped
+        """
+        students, _ = make_cohort(1, 3, 0)
+
+        self.assertEqual(teambuilding.matrix.build_assignments([], students), [])
@@ -0,0 +1,98 @@
+import concurrent.futures
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+import unittest.mock as mock
+
+import teambuilding.handler
+import teambuilding.multistart
+from teambuilding.tests.cohorts import make_cohort
+
+
+class _Python38ProcessPoolExecutor(concurrent.futures.ProcessPoolExecutor):
+    """A process pool whose shutdown takes the arguments it does on Python 3.8, without cancel_futures"""
+
+    def shutdown(self, wait=True):
+        super().shutdown(wait=wait)
+
+
+def _summarize(assignments):
+    return [(assignment.project["id"], assignment.student["id"], assignment.score) for assignment in assignments]
+
+
+class TestMultiStart(unittest.TestCase):
+    def test_first_start_is_greedy(self):
+        """
+        Start 0 keeps the students in the order given, making the same assignments as the greedy engine
+        """
+        students, projects = make_cohort(1, 30, 6)
+
+        _, score, choices = teambuilding.multistart._run_start(projects, students, None, 0)
+        greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+
+        self.assertEqual(
+            [(projects[p]["id"], students[s]["id"], score) for p, s, score in choices], _summarize(greedy_assignments)
+        )
+        self.assertEqual(score, teambuilding.handler._get_plan_score(projects, students, greedy_assignments))
+
+    def test_keeps_best_start(self):
+        """
+        The best scoring start is kept, so the plan is never worse than the greedy engine's
+        """
+        students, projects = make_cohort(2, 30, 6)
+
+        assignments = teambuilding.multistart.build_assignments(projects, students, None, 4)
+        greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students)
+
+        self.assertGreaterEqual(
+            teambuilding.handler._get_plan_score(projects, students, assignments),
+            teambuilding.handler._get_plan_score(projects, students, greedy_assignments),
+        )
+
+    def test_no_process_pool(self):
+        """
+        The starts run in this process when a process pool isn't available, with the same result
+        """
+        students, projects = make_cohort(2, 30, 6)
+
+        with mock.patch("concurrent.futures.ProcessPoolExecutor", mock.Mock(side_effect=OSError("No shared memory"))):
+            sequential_assignments = teambuilding.multistart.build_assignments(projects, students, None, 4)
+
+        pool_assignments = teambuilding.multistart.build_assignments(projects, students, None, 4)
+
+        self.assertEqual(_summarize(sequential_assignments), _summarize(pool_assignments))
+
+    def test_python38_process_pool(self):
+        """
+        The pool is shut down without the cancel_futures argument Python 3.8 doesn't have
+        """
+        students, projects = make_cohort(2, 30, 6)
+
+        with mock.patch("concurrent.futures.ProcessPoolExecutor", _Python38ProcessPoolExecutor):
+            assignments = teambuilding.multistart.build_assignments(projects, students, None, 4, 0)
+
+        self.assertTrue(assignments)
+
+    def test_exits_after_process_pool(self):
+        """
+        The interpreter exits once a pooled build returns, even with starts left past the deadline
+        """
+        script = textwrap.dedent(
+            """
+            import teambuilding.multistart
+            from teambuilding.tests.cohorts import make_cohort
+
+            students, projects = make_cohort(2, 30, 6)
+            print(len(teambuilding.multistart.build_assignments(projects, students, None, 8, 0)))
+            """
+        )
+        src = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        completed = subprocess.run(
+            [sys.executable, "-c", script], cwd=src, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60
+        )
+
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertIn(b"Multi-start plan score", completed.stdout)
@@ -0,0 +1,121 @@
+import contextlib
+import copy
+import io
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import teambuilding.handler
+import teambuilding.snapshot
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_round_trip(self):
+        """
+        Surveys and projects come back as they were saved, gzipped or not
+        """
+        students, projects = make_realistic_cohort(0, 30, 5)
+
+        for file_name in ("cohort.jsonl", "cohort.jsonl.gz"):
+            path = os.path.join(self.directory, file_name)
+            teambuilding.snapshot.save_snapshot(path, teambuilding.snapshot.Snapshot("PT15", students, projects))
+
+            self.assertEqual(
+                teambuilding.snapshot.load_snapshot(path), teambuilding.snapshot.Snapshot("PT15", students, projects)
+            )
+
+    def test_capture_snapshot(self):
+        """
+        Captures read the cohort's surveys and active projects through the DAO
+        """
+        students, projects = make_realistic_cohort(0, 10, 3)
+        path = os.path.join(self.directory, "cohort.jsonl.gz")
+
+        with mock.patch("labsdao.people.get_all_student_surveys", return_value=students) as get_surveys, mock.patch(
+            "labsdao.projects.get_all_active_projects", return_value=projects
+        ) as get_projects, contextlib.redirect_stdout(io.StringIO()):
+            teambuilding.snapshot.capture_snapshot("PT15", path)
+
+        get_surveys.assert_called_once_with("PT15")
+        get_projects.assert_called_once_with("PT15")
+        self.assertEqual(teambuilding.snapshot.load_snapshot(path).surveys, students)
+
+    def test_build_teams_from_snapshot(self):
+        """
+        Building from a snapshot doesn't use the DAO, and writes a plan whose breakdowns add up to its score
+        """
+        students, projects = make_realistic_cohort(1, 60, 8)
+        snapshot_path = os.path.join(self.directory, "cohort.jsonl.gz")
+        teambuilding.snapshot.save_snapshot(snapshot_path, teambuilding.snapshot.Snapshot("PT15", students, projects))
+
+        with mock.patch("labsdao.people.get_all_student_surveys") as get_surveys, mock.patch(
+            "labsdao.projects.get_all_active_projects"
+        ) as get_projects, mock.patch(
+            "labsdao.projects.assign_students_to_projects"
+        ) as assign_students, contextlib.redirect_stdout(
+            io.StringIO()
+        ):
+            teambuilding.handler.build_teams({"snapshot": snapshot_path}, None)
+
+        get_surveys.assert_not_called()
+        get_projects.assert_not_called()
+        assign_students.assert_not_called()
+
+        with open(os.path.join(self.directory, "cohort.plan.jsonl")) as plan_file:
+            summary, *lines = [json.loads(line) for line in plan_file]
+
+        teams = [line for line in lines if line["type"] == "team"]
+        assignments = [line for line in lines if line["type"] == "assignment"]
+        self.assertEqual(len(teams), len(projects))
+        self.assertEqual(summary["plan_score"], sum(team["score"] for team in teams))
+
+        self.assertEqual(summary["type"], "summary")
+        self.assertEqual(summary["options"]["snapshot"], snapshot_path)
+        self.assertEqual(summary["assigned"], len(assignments))
+        self.assertEqual(summary["students"], len(students))
+
+        for assignment in assignments:
+            self.assertEqual(assignment["score"], sum(assignment["breakdown"].values()))
+            self.assertIn(teambuilding.handler.SURVEY_STUDENT_TIMEZONE_FIELD, assignment["breakdown"])
+        self.assertEqual(summary["plan_score"], sum(assignment["score"] for assignment in assignments))
+
+    def test_plan_matches_greedy(self):
+        """
+        The plan file has the same assignments and scores as the plan scorer
+        """
+        students, projects = make_realistic_cohort(2, 40, 6)
+        surveys = copy.deepcopy(students)
+        assignments = teambuilding.handler._build_assignments_greedy(projects, surveys)
+
+        path = os.path.join(self.directory, "plan.jsonl")
+        with contextlib.redirect_stdout(io.StringIO()):
+            teambuilding.snapshot.save_plan(path, {}, projects, surveys, assignments)
+
+        with open(path) as plan_file:
+            summary, *lines = [json.loads(line) for line in plan_file]
+        lines = [line for line in lines if line["type"] == "assignment"]
+
+        self.assertEqual(
+            summary["plan_score"], teambuilding.handler._get_plan_score(projects, surveys, assignments)
+        )
+        self.assertEqual(
+            [(line["project_id"], line["student_id"]) for line in lines],
+            [(assignment.project["id"], assignment.student["id"]) for assignment in assignments],
+        )
+
+    def test_get_plan_path(self):
+        self.assertEqual(teambuilding.snapshot.get_plan_path("pt15.jsonl.gz"), "pt15.plan.jsonl")
+        self.assertEqual(teambuilding.snapshot.get_plan_path("pt15.jsonl"), "pt15.plan.jsonl")
+        self.assertEqual(teambuilding.snapshot.get_plan_path("pt15"), "pt15.plan.jsonl")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import unittest.mock as mock
+from collections import Counter
+from random import Random
+
+import teambuilding.handler
+import teambuilding.solver
+from teambuilding.features import StudentFeatureTable
+from teambuilding.tests.cohorts import make_cohort
+
+
+def _get_team_sizes(assignments):
+    return Counter(
+        (assignment.project["id"], assignment.student["fields"][teambuilding.handler.SURVEY_TRACK_FIELD])
+        for assignment in assignments
+    )
+
+
+def _get_team_size_bounds(projects, students, track):
+    number_of_students = sum(
+        1 for student in students if student["fields"][teambuilding.handler.SURVEY_TRACK_FIELD] == track
+    )
+    number_of_projects = sum(1 for project in projects if track in project["fields"]["Tracks"])
+
+    return teambuilding.solver._get_team_size_bounds(number_of_students, number_of_projects)
+
+
+class TestSolver(unittest.TestCase):
+    def test_never_worse_than_greedy(self):
+        """
+        The solver starts from the greedy teams and only keeps better plans
+        """
+        for seed in range(3):
+            students, projects = make_cohort(seed, 40, 6)
+            features = StudentFeatureTable(students)
+
+            greedy_assignments = teambuilding.handler._build_assignments_greedy(projects, students, features)
+            solver_assignments = teambuilding.solver.build_assignments(projects, students, features, 5)
+
+            self.assertGreaterEqual(
+                teambuilding.handler._get_plan_score(projects, students, solver_assignments, features),
+                teambuilding.handler._get_plan_score(projects, students, greedy_assignments, features),
+            )
+
+    def test_constraints(self):
+        """
+        Students are only placed on projects needing their track, and no team has more of a track than the bound
+        """
+        students, projects = make_cohort(4, 40, 6)
+
+        solver_assignments = teambuilding.solver.build_assignments(projects, students, None, 5)
+
+        for assignment in solver_assignments:
+            self.assertTrue(teambuilding.handler._is_track_match(assignment.project, assignment.student))
+
+        for (project_id, track), size in _get_team_sizes(solver_assignments).items():
+            self.assertLessEqual(size, _get_team_size_bounds(projects, students, track)[1])
+
+    def test_rebalances_greedy_sizes(self):
+        """
+        Teams the greedy engine made too large or too small are brought within the team size bounds
+        """
+        students, projects = make_cohort(8, 24, 4)
+        for student in students:
+            student["fields"][teambuilding.handler.SURVEY_TRACK_FIELD] = "WEB"
+            student["fields"].pop(teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD, None)
+        for project in projects:
+            project["fields"][teambuilding.handler.PROJECT_TRACKS_FIELD] = ["WEB"]
+
+        # Every student on the first team but one
+        lopsided_assignments = [
+            teambuilding.handler.AssignmentTuple(projects[0] if index else projects[1], student, 0)
+            for index, student in enumerate(students)
+        ]
+
+        with mock.patch("teambuilding.handler._build_assignments_greedy", return_value=lopsided_assignments):
+            assignments = teambuilding.solver.build_assignments(projects, students, None, 10)
+
+        min_team_size, max_team_size = _get_team_size_bounds(projects, students, "WEB")
+        self.assertEqual(len(assignments), len(students))
+        self.assertEqual(len(_get_team_sizes(assignments)), len(projects))
+        for size in _get_team_sizes(assignments).values():
+            self.assertGreaterEqual(size, min_team_size)
+            self.assertLessEqual(size, max_team_size)
+        self.assertGreater(
+            teambuilding.handler._get_plan_score(projects, students, assignments),
+            teambuilding.handler._get_plan_score(projects, students, lopsided_assignments),
+        )
+
+    def test_incompatible_seats_excluded(self):
+        """
+        No student is seated on a team with someone either of them listed as incompatible
+        """
+        students, projects = make_cohort(6, 40, 6)
+        names = [student["fields"][teambuilding.handler.SURVEY_STUDENT_NAME_FIELD][0] for student in students]
+        for index, student in enumerate(students):
+            student["fields"][teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD] = [
+                names[(index + offset) % len(names)] for offset in (1, 3, 7)
+            ]
+
+        assignments = teambuilding.solver.build_assignments(projects, students, None, 2)
+
+        teams = {}
+        for assignment in assignments:
+            teams.setdefault(assignment.project["id"], []).append(assignment.student["fields"])
+
+        for members in teams.values():
+            for member in members:
+                for other_member in members:
+                    self.assertNotIn(
+                        other_member[teambuilding.handler.SURVEY_STUDENT_NAME_FIELD][0],
+                        member[teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD],
+                    )
+
+    def test_excluded_seats_left_empty(self):
+        """
+        A student whose only seats score too low to be assigned is left unplaced rather than seated on one
+        """
+        students, projects = make_cohort(7, 2, 8)
+        for student in students:
+            student["fields"][teambuilding.handler.SURVEY_TRACK_FIELD] = "WEB"
+        projects = [project for project in projects if teambuilding.handler._is_track_match(project, students[0])]
+        self.assertGreater(len(projects), 1)
+
+        unplaced = teambuilding.solver.UNASSIGNED
+        features = StudentFeatureTable(students)
+        get_score = teambuilding.handler._get_score
+
+        def get_score_excluding_first_student(projects, assignments, project, student, team_states=None):
+            if student is students[0]:
+                return teambuilding.handler.BAD_FIT_SCORE
+
+            return get_score(projects, assignments, project, student, team_states)
+
+        with mock.patch("teambuilding.handler._get_score", get_score_excluding_first_student):
+            plan = teambuilding.solver._reseat_students(
+                projects, students, [unplaced, unplaced], features, [0, 1], list(range(len(projects))), Random(0)
+            )
+
+        self.assertEqual(plan[0], unplaced)
+        self.assertNotEqual(plan[1], unplaced)
+
+    def test_reproducible(self):
+        """
+        The same seed gives the same plan
+        """
+        students, projects = make_cohort(5, 30, 5)
+
+        first = teambuilding.solver.build_assignments(projects, students, None, 5, seed=1)
+        second = teambuilding.solver.build_assignments(projects, students, None, 5, seed=1)
+
+        self.assertEqual(
+            [(assignment.project["id"], assignment.student["id"]) for assignment in first],
+            [(assignment.project["id"], assignment.student["id"]) for assignment in second],
+        )
@@ -0,0 +1,113 @@
+import contextlib
+import io
+import unittest
+
+import teambuilding.evaluate
+import teambuilding.handler
+import teambuilding.matrix
+import teambuilding.sweep
+from teambuilding.tests.cohorts import make_realistic_cohort
+
+
+class TestScoringWeights(unittest.TestCase):
+    def test_default_weights(self):
+        """
+        The default weights are the module's weight constants
+        """
+        weights = teambuilding.handler._get_scoring_weights()
+
+        self.assertEqual(weights.team_size, teambuilding.handler.TEAM_SIZE_WEIGHT)
+        self.assertEqual(weights.gender, teambuilding.handler.SURVEY_GENDER_BASE_WEIGHT)
+        self.assertEqual(
+            list(weights.average_goals), [weight for _, _, weight in teambuilding.handler.AVERAGE_GOAL_CRITERIA]
+        )
+
+    def test_overrides(self):
+        """
+        Weights are overridden by the name of their constant, and unknown names are rejected
+        """
+        weights = teambuilding.handler._get_scoring_weights({"TEAM_SIZE_WEIGHT": 1, "SURVEY_GIT_WEIGHT": 2})
+
+        self.assertEqual(weights.team_size, 1)
+        self.assertEqual(weights.ethnicity, teambuilding.handler.SURVEY_BASE_ETHNICITY_WEIGHT)
+        criterion_index = [field for field, _, _ in teambuilding.handler.AVERAGE_GOAL_CRITERIA].index(
+            teambuilding.handler.SURVEY_GIT_FIELD
+        )
+        self.assertEqual(weights.average_goals[criterion_index], 2)
+
+        with self.assertRaises(ValueError):
+            teambuilding.handler._get_scoring_weights({"GIT_WEIGHT": 2})
+
+    def test_matrix_engine_takes_weights(self):
+        """
+        The matrix engine with the default weights matches the greedy engine, and other weights change its scores
+        """
+        students, projects = make_realistic_cohort(0, 60, 8)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = teambuilding.handler._build_assignments_greedy(projects, students)
+            assignments = teambuilding.matrix.build_assignments(
+                projects, students, weights=teambuilding.handler._get_scoring_weights()
+            )
+            reweighted = teambuilding.matrix.build_assignments(
+                projects, students, weights=teambuilding.handler._get_scoring_weights({"TEAM_SIZE_WEIGHT": 0})
+            )
+
+        self.assertEqual(assignments, expected)
+        self.assertNotEqual(
+            [assignment.score for assignment in reweighted], [assignment.score for assignment in expected]
+        )
+
+
+class TestSweep(unittest.TestCase):
+    def test_get_grid(self):
+        self.assertEqual(
+            teambuilding.sweep.get_grid({"TEAM_SIZE_WEIGHT": [100, 200], "SURVEY_GIT_WEIGHT": [50]}),
+            [
+                {"TEAM_SIZE_WEIGHT": 100, "SURVEY_GIT_WEIGHT": 50},
+                {"TEAM_SIZE_WEIGHT": 200, "SURVEY_GIT_WEIGHT": 50},
+            ],
+        )
+
+    def test_get_random_sample(self):
+        """
+        Samples stay within their ranges and are the same for the same seed
+        """
+        ranges = {"TEAM_SIZE_WEIGHT": (100, 300), "SURVEY_GENDER_BASE_WEIGHT": (0, 10)}
+
+        sample = teambuilding.sweep.get_random_sample(ranges, 20, seed=3)
+
+        self.assertEqual(len(sample), 20)
+        self.assertTrue(all(100 <= overrides["TEAM_SIZE_WEIGHT"] <= 300 for overrides in sample))
+        self.assertTrue(all(0 <= overrides["SURVEY_GENDER_BASE_WEIGHT"] <= 10 for overrides in sample))
+        self.assertEqual(teambuilding.sweep.get_random_sample(ranges, 20, seed=3), sample)
+
+    def test_run_sweep(self):
+        """
+        Every configuration gets a result, in order, and the default weights score the same as build_teams would
+        """
+        students, projects = make_realistic_cohort(1, 60, 8)
+        configurations = [{}, {"TEAM_SIZE_WEIGHT": 0}, {"SURVEY_GENDER_BASE_WEIGHT": 2000}]
+
+        results = teambuilding.sweep.run_sweep(projects, students, configurations, processes=2)
+
+        self.assertEqual([result.overrides for result in results], configurations)
+        self.assertTrue(all(result.assigned + result.unassigned <= len(students) for result in results))
+
+        surveys = list(students)
+        teambuilding.handler._sort_surveys(surveys)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assignments = teambuilding.handler._build_assignments_greedy(projects, surveys)
+        self.assertAlmostEqual(
+            results[0].objective, teambuilding.evaluate.evaluate_plan(projects, surveys, assignments).score
+        )
+
+    def test_unknown_weight(self):
+        students, projects = make_realistic_cohort(0, 10, 2)
+
+        with self.assertRaises(ValueError):
+            teambuilding.sweep.run_sweep(projects, students, [{"NOT_A_WEIGHT": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+
+import teambuilding.handler
+
+
+class TestTeamState(unittest.TestCase):
+    def test_add_updates_aggregates(self):
+        """
+        Adding students keeps the running sums, counts and counters up to date
+        """
+        project_01 = {"id": "project_01", "fields": {"id": "project_01"}}
+
+        team = teambuilding.handler.TeamState(project_01)
+        team.add(
+            {
+                "fields": {
+                    teambuilding.handler.SURVEY_TRACK_FIELD: "DS",
+                    teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Student 01"],
+                    teambuilding.handler.SURVEY_GENDER_FIELD: "GENDER-A",
+                    teambuilding.handler.SURVEY_ETHNICITIES_FIELD: ["ETHNICITY-A", "ETHNICITY-B"],
+                    teambuilding.handler.SURVEY_INCOMPATIBLE_STUDENT_NAMES_FIELD: ["Student 03"],
+                    teambuilding.handler.SURVEY_GIT_FIELD: 2,
+                }
+            }
+        )
+        team.add(
+            {
+                "fields": {
+                    teambuilding.handler.SURVEY_TRACK_FIELD: "WEB",
+                    teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Student 02"],
+                    teambuilding.handler.SURVEY_GENDER_FIELD: "GENDER-A",
+                    teambuilding.handler.SURVEY_ETHNICITIES_FIELD: ["ETHNICITY-A"],
+                    teambuilding.handler.SURVEY_GIT_FIELD: 5,
+                }
+            }
+        )
+
+        features = team.features
+        git_index = features.criterion_indexes[teambuilding.handler.SURVEY_GIT_FIELD]
+        docker_index = features.criterion_indexes[teambuilding.handler.SURVEY_DOCKER_FIELD]
+
+        self.assertEqual(len(team.students), 2)
+        self.assertEqual(team.get_track_size("DS"), 1)
+        self.assertEqual(team.get_track_size("WEB"), 1)
+        self.assertEqual(team.get_track_size("IOS"), 0)
+        self.assertEqual(team.response_sums[git_index], 7)
+        self.assertEqual(team.response_counts[git_index], 2)
+        self.assertEqual(team.response_counts[docker_index], 0)
+        self.assertEqual(team.gender_counter[features.genders.get("GENDER-A")], 2)
+        self.assertEqual(team.ethnicity_counter[features.ethnicities.get("ETHNICITY-A")], 2)
+        self.assertEqual(team.ethnicity_counter[features.ethnicities.get("ETHNICITY-B")], 1)
+        self.assertEqual(team.member_mask, 0b11)
+
+    def test_from_assignments(self):
+        """
+        Only the assignments for the team's project are replayed into the state
+        """
+        project_01 = {"id": "project_01", "fields": {"id": "project_01"}}
+        project_02 = {"id": "project_02", "fields": {"id": "project_02"}}
+
+        student_01 = {"fields": {teambuilding.handler.SURVEY_TRACK_FIELD: "DS"}}
+        student_02 = {"fields": {teambuilding.handler.SURVEY_TRACK_FIELD: "DS"}}
+
+        assignments = [
+            teambuilding.handler.AssignmentTuple(project_01, student_01, 100),
+            teambuilding.handler.AssignmentTuple(project_02, student_02, 100),
+        ]
+
+        team = teambuilding.handler.TeamState.from_assignments(project_01, assignments)
+
+        self.assertEqual(team.students, [student_01])
+        self.assertEqual(team.get_track_size("DS"), 1)
+
+    def test_score_with_state_matches_score_without_state(self):
+        """
+        Scoring against maintained team states gives the same result as replaying the assignments
+        """
+        project_01 = {
+            "id": "project_01",
+            "fields": {"id": "project_01", teambuilding.handler.PROJECT_TRACKS_FIELD: ["DS"]},
+        }
+        project_02 = {
+            "id": "project_02",
+            "fields": {"id": "project_02", teambuilding.handler.PROJECT_TRACKS_FIELD: ["DS"]},
+        }
+        projects = [project_01, project_02]
+
+        assigned_student_01 = {
+            "fields": {
+                teambuilding.handler.SURVEY_TRACK_FIELD: "DS",
+                teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Assigned Student 01"],
+                teambuilding.handler.SURVEY_GENDER_FIELD: "GENDER-A",
+                teambuilding.handler.SURVEY_GIT_FIELD: 5,
+            }
+        }
+        assignments = [teambuilding.handler.AssignmentTuple(project_01, assigned_student_01, 100)]
+
+        team_states = teambuilding.handler._build_team_states(projects, [])
+        team_states["project_01"].add(assigned_student_01)
+
+        student_to_score = {
+            "fields": {
+                teambuilding.handler.SURVEY_TRACK_FIELD: "DS",
+                teambuilding.handler.SURVEY_STUDENT_NAME_FIELD: ["Unassigned Student 01"],
+                teambuilding.handler.SURVEY_GENDER_FIELD: "GENDER-A",
+                teambuilding.handler.SURVEY_GIT_FIELD: 1,
+            }
+        }
+
+        for project in projects:
+            self.assertEqual(
+                teambuilding.handler._get_score(projects, assignments, project, student_to_score, team_states),
+                teambuilding.handler._get_score(projects, assignments, project, student_to_score),
+            )
+
+
+class TestTeamStates(unittest.TestCase):
+    def test_track_counters(self):
+        """
+        The per-track counters follow assignments and give the same average as counting every team and project
+        """
+        project_01 = {
+            "id": "project_01",
+            "fields": {"id": "project_01", teambuilding.handler.PROJECT_TRACKS_FIELD: ["DS", "WEB"]},
+        }
+        project_02 = {
+            "id": "project_02",
+            "fields": {"id": "project_02", teambuilding.handler.PROJECT_TRACKS_FIELD: ["DS", "DS"]},
+        }
+        projects = [project_01, project_02]
+
+        student_01 = {"fields": {teambuilding.handler.SURVEY_TRACK_FIELD: "DS"}}
+        student_02 = {"fields": {teambuilding.handler.SURVEY_TRACK_FIELD: "DS"}}
+        student_03 = {"fields": {teambuilding.handler.SURVEY_TRACK_FIELD: "WEB"}}
+
+        assignments = [
+            teambuilding.handler.AssignmentTuple(project_01, student_01, 100),
+            teambuilding.handler.AssignmentTuple(project_02, student_02, 100),
+            teambuilding.handler.AssignmentTuple(project_02, student_03, 100),
+        ]
+
+        team_states = teambuilding.handler._build_team_states(projects, assignments)
+        tracks = team_states.features.tracks
+
+        self.assertEqual(team_states.projects_requiring_track[tracks.get("DS")], 2)
+        self.assertEqual(team_states.projects_requiring_track[tracks.get("WEB")], 1)
+        self.assertEqual(team_states.assigned_per_track[tracks.get("DS")], 2)
+        self.assertEqual(team_states.get_average_team_size(tracks.get("DS")), 1.0)
+        self.assertEqual(team_states.get_average_team_size(tracks.get("WEB")), 1.0)
+
+        team_states["project_02"].remove(student_02)
+
+        self.assertEqual(team_states.assigned_per_track[tracks.get("DS")], 1)
+        self.assertEqual(
+            teambuilding.handler._get_average_team_size_for_track(projects, assignments[:1], "DS", team_states), 0.5
+        )